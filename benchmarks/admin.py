@@ -0,0 +1,42 @@
+# -*- coding: utf-8 -*-
+"""
+Admin site the endpoint benchmarks run the job workflow against.
+"""
+from __future__ import unicode_literals
+
+from django import forms
+from django.contrib import admin
+
+from django_admin_rq.admin import JobAdminMixin, MAIN_RUN_VIEW, PREVIEW_RUN_VIEW, FORM_VIEW
+from django_admin_rq.models import JobStatus
+
+site = admin.AdminSite(name='benchmark')
+
+
+class BenchmarkForm(forms.Form):
+    upload = forms.FileField(required=False)
+    note = forms.CharField(required=False)
+
+
+class JobStatusAdmin(JobAdminMixin, admin.ModelAdmin):
+    change_list_template = 'django_admin_rq/change_list.html'
+    list_display = ('job_uuid', 'job_name', 'status', 'progress', 'created_on')
+
+    def get_job_names(self):
+        return ['benchmark']
+
+    def get_job_title(self, job_name):
+        return 'Benchmark'
+
+    def get_workflow_views(self, job_name):
+        return FORM_VIEW, PREVIEW_RUN_VIEW, MAIN_RUN_VIEW
+
+    def get_job_form_class(self, job_name, request=None, object_id=None, view_name=None, extra_context=None):
+        return BenchmarkForm
+
+    def get_job_callable(self, job_name, preview=True, request=None, object_id=None, view_name=None):
+        from benchmarks.jobs import benchmark_job
+        return benchmark_job
+
+
+site.register(JobStatus, JobStatusAdmin)
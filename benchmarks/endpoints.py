@@ -0,0 +1,248 @@
+# -*- coding: utf-8 -*-
+"""
+Load tests the status endpoints and the job workflow views with concurrent clients against a large JobStatus table.
+Redis is replaced with fakeredis, so only a local SQLite database is needed.
+
+    python -m benchmarks.endpoints --rows 200000 --clients 8 --writers 2 --duration 10
+    BENCHMARK_STATUS_BACKEND=django_admin_rq.backends.RedisStatusBackend python -m benchmarks.endpoints
+
+Every scenario runs --clients threads for --duration seconds and reports the latency percentiles and the number of
+queries per request.  Scenarios:
+
+    status      status polls with ETags of started jobs while --writers threads write their progress
+    batch       batch status requests for --batch-size started jobs
+    run-page    reloads of a run page (JobAdminMixin.get_job_context)
+    upload      form posts with an upload of --upload-size bytes (JobAdminMixin.serialize_form)
+    changelist  the JobStatus changelist with the job links
+"""
+from __future__ import division, print_function, unicode_literals
+
+import argparse
+import os
+import random
+import re
+import shutil
+import tempfile
+import threading
+import time
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'benchmarks.settings')
+# Uploaded files go to a temporary MEDIA_ROOT that is deleted on exit
+_media_root = None
+if 'BENCHMARK_MEDIA_ROOT' not in os.environ:
+    _media_root = os.environ['BENCHMARK_MEDIA_ROOT'] = tempfile.mkdtemp(prefix='django-admin-rq-benchmarks-')
+
+import fakeredis  # noqa: E402
+import django_rq.queues  # noqa: E402
+
+# All queues and the status backend share one in-memory redis
+_redis = fakeredis.FakeStrictRedis()
+django_rq.queues.get_redis_connection = lambda config, use_strict_redis=False: _redis
+
+import django  # noqa: E402
+
+django.setup()
+
+from django.contrib.auth import get_user_model  # noqa: E402
+from django.core.files.uploadedfile import SimpleUploadedFile  # noqa: E402
+from django.core.management import call_command  # noqa: E402
+from django.db import connection  # noqa: E402
+from django.test import Client  # noqa: E402
+from django.test.utils import CaptureQueriesContext  # noqa: E402
+
+from benchmarks.utils import percentile, populate  # noqa: E402
+from django_admin_rq import conf  # noqa: E402
+from django_admin_rq.models import JobStatus, STATUS_STARTED  # noqa: E402
+
+SCENARIOS = ('status', 'batch', 'run-page', 'upload', 'changelist')
+
+
+class Results(object):
+    """
+    Collects the latency and query count of every request of a scenario from all threads.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.timings = []
+        self.queries = []
+        self.errors = 0
+
+    def add(self, timing, queries, ok=True):
+        with self.lock:
+            self.timings.append(timing)
+            self.queries.append(queries)
+            if not ok:
+                self.errors += 1
+
+    def report(self, label, duration):
+        if not self.timings:
+            print('{:<16} no requests'.format(label))
+            return
+        print('{:<16} {:>7} req {:>8.1f} req/s   p50 {:8.2f}   p95 {:8.2f}   p99 {:8.2f}   max {:8.2f} ms   '
+              '{:5.1f} queries/req (max {})   {} errors'.format(
+                  label, len(self.timings), len(self.timings) / duration, percentile(self.timings, 0.5),
+                  percentile(self.timings, 0.95), percentile(self.timings, 0.99), max(self.timings),
+                  sum(self.queries) / len(self.queries), max(self.queries), self.errors))
+
+
+def get_client():
+    user, created = get_user_model().objects.get_or_create(
+        username='benchmark', defaults={'is_staff': True, 'is_superuser': True}
+    )
+    client = Client()
+    client.force_login(user)
+    return client
+
+
+def timed(results, request):
+    with CaptureQueriesContext(connection) as captured:
+        start = time.time()
+        response = request()
+        timing = (time.time() - start) * 1000
+    results.add(timing, len(captured), response.status_code < 400)
+    return response
+
+
+def get_start_url(client):
+    """
+    Returns the url that starts a new run of the benchmark job.
+    """
+    response = client.get('/admin/django_admin_rq/jobstatus/')
+    return re.search(r'href="([^"]*job/benchmark/form/[^"]*)"', response.content.decode()).group(1)
+
+
+def status_client(results, deadline, job_uuids):
+    client = get_client()
+    etags = {}
+    while time.time() < deadline:
+        job_uuid = random.choice(job_uuids)
+        headers = {'HTTP_IF_NONE_MATCH': etags[job_uuid]} if job_uuid in etags else {}
+        response = timed(results, lambda: client.get('/django-admin-rq/job/status/{}/'.format(job_uuid), **headers))
+        if response.has_header('ETag'):
+            etags[job_uuid] = response['ETag']
+
+
+def progress_writer(results, deadline, job_uuids):
+    job_statuses = list(JobStatus.objects.filter(job_uuid__in=job_uuids))
+    while time.time() < deadline:
+        job_status = random.choice(job_statuses)
+        with CaptureQueriesContext(connection) as captured:
+            start = time.time()
+            job_status.set_progress(random.randint(0, 99))
+            timing = (time.time() - start) * 1000
+        results.add(timing, len(captured))
+
+
+def batch_client(results, deadline, job_uuids, batch_size):
+    client = get_client()
+    while time.time() < deadline:
+        sample = ','.join(random.sample(job_uuids, batch_size))
+        timed(results, lambda: client.get('/django-admin-rq/job/status/', {'job_uuid': sample}))
+
+
+def start_run_page():
+    """
+    Starts a run of the benchmark job and returns the client and the url of its run page.
+    """
+    client = get_client()
+    url = client.post(get_start_url(client), {'note': 'benchmark'})['Location']
+    client.get(url)  # Starts the job
+    return client, url
+
+
+def run_page_client(results, deadline, client, url):
+    while time.time() < deadline:
+        timed(results, lambda: client.get(url))
+
+
+def upload_client(results, deadline, upload_size):
+    client = get_client()
+    start_url = get_start_url(client)
+    while time.time() < deadline:
+        upload = SimpleUploadedFile('upload.csv', b'x' * upload_size)
+        timed(results, lambda: client.post(start_url, {'note': 'benchmark', 'upload': upload}))
+
+
+def changelist_client(results, deadline):
+    client = get_client()
+    while time.time() < deadline:
+        timed(results, lambda: client.get('/admin/django_admin_rq/jobstatus/'))
+
+
+def run_threads(targets):
+    threads = [threading.Thread(target=target, args=args) for target, args in targets]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+
+def _closing(target):
+    """
+    Closes the thread's database connection once target returns.
+    """
+    def wrapper(*args):
+        try:
+            target(*args)
+        finally:
+            connection.close()
+    return wrapper
+
+
+def run_scenario(name, args, job_uuids):
+    if name == 'run-page':
+        # The runs are started before the threads, concurrent starts wait for SQLite's write lock and time out
+        run_pages = [start_run_page() for _ in range(args.clients)]
+    deadline = time.time() + args.duration
+    results = Results()
+    targets = []
+    if name == 'status':
+        targets = [(status_client, (results, deadline, job_uuids))] * args.clients
+        writes = Results()
+        targets += [(progress_writer, (writes, deadline, job_uuids))] * args.writers
+    elif name == 'batch':
+        targets = [(batch_client, (results, deadline, job_uuids, args.batch_size))] * args.clients
+    elif name == 'run-page':
+        targets = [(run_page_client, (results, deadline, client, url)) for client, url in run_pages]
+    elif name == 'upload':
+        targets = [(upload_client, (results, deadline, args.upload_size))] * args.clients
+    elif name == 'changelist':
+        targets = [(changelist_client, (results, deadline))] * args.clients
+    run_threads([(_closing(target), target_args) for target, target_args in targets])
+    results.report(name, args.duration)
+    if name == 'status' and args.writers:
+        writes.report('progress write', args.duration)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=100000, help='Number of finished JobStatus rows in the table')
+    parser.add_argument('--running', type=int, default=1000, help='Number of started jobs the pollers poll')
+    parser.add_argument('--clients', type=int, default=4, help='Number of concurrent clients per scenario')
+    parser.add_argument('--writers', type=int, default=2, help='Number of concurrent progress writers')
+    parser.add_argument('--duration', type=float, default=5, help='Seconds every scenario runs')
+    parser.add_argument('--batch-size', type=int, default=50, help='Number of jobs per batch status request')
+    parser.add_argument('--upload-size', type=int, default=1024 * 1024, help='Bytes per uploaded file')
+    parser.add_argument('--scenario', action='append', choices=SCENARIOS, help='Scenarios to run, default all')
+    args = parser.parse_args()
+
+    call_command('migrate', verbosity=0)
+    populate(args.rows, progress=100)
+    populate(args.running, status=STATUS_STARTED, progress=50)
+    job_uuids = list(JobStatus.objects.filter(status=STATUS_STARTED).values_list('job_uuid', flat=True)
+                     [:args.running])
+    get_client()  # Creates the benchmark user before the threads log in
+    print('Status backend {}, {} clients, {} writers, {} s per scenario'.format(
+        conf.STATUS_BACKEND.rsplit('.', 1)[-1], args.clients, args.writers, args.duration
+    ))
+    try:
+        for name in args.scenario or SCENARIOS:
+            run_scenario(name, args, job_uuids)
+    finally:
+        if _media_root is not None:
+            shutil.rmtree(_media_root, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
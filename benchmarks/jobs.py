@@ -0,0 +1,8 @@
+# -*- coding: utf-8 -*-
+from django_rq import job
+
+
+@job
+def benchmark_job(job_status, form_data, extra_context):
+    job_status.start()
+    job_status.finish()
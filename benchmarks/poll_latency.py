@@ -0,0 +1,72 @@
+# -*- coding: utf-8 -*-
+"""
+Measures the latency of the lookups the status poll and the rq exception handler run against a large JobStatus table.
+
+    python -m benchmarks.poll_latency --rows 1000000 --compare
+
+With --compare the lookups are measured once without the indexes of migration 0002 and once with them.
+"""
+from __future__ import print_function, unicode_literals
+
+import argparse
+import os
+import random
+import time
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'benchmarks.settings')
+
+import django  # noqa: E402
+
+django.setup()
+
+from django.core.management import call_command  # noqa: E402
+
+from benchmarks.utils import percentile, populate  # noqa: E402
+from django_admin_rq.models import JobStatus, STATUS_FINISHED  # noqa: E402
+
+
+def measure(label, lookup, values):
+    timings = []
+    for value in values:
+        start = time.time()
+        lookup(value)
+        timings.append((time.time() - start) * 1000)
+    print('{:<40} p50 {:8.3f} ms   p95 {:8.3f} ms   max {:8.3f} ms'.format(
+        label, percentile(timings, 0.5), percentile(timings, 0.95), max(timings)
+    ))
+
+
+def run(samples):
+    # Only columns of migration 0001 are selected, later columns don't exist while it is measured without indexes
+    rows = JobStatus.objects.values_list('pk', flat=True)
+    sample = list(JobStatus.objects.order_by('?').values_list('job_uuid', 'job_id')[:samples])
+    random.shuffle(sample)
+    measure('get(job_uuid=...) (status poll)', lambda value: rows.get(job_uuid=value),
+            [job_uuid for job_uuid, job_id in sample])
+    measure('get(job_id=...) (exception handler)', lambda value: rows.get(job_id=value),
+            [job_id for job_uuid, job_id in sample])
+    measure('filter(status=...)[:50] (dashboard)',
+            lambda value: list(rows.filter(status=value).order_by('-created_on')[:50]),
+            [STATUS_FINISHED] * min(samples, 20))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=1000000, help='Number of JobStatus rows in the table')
+    parser.add_argument('--samples', type=int, default=200, help='Number of lookups per measurement')
+    parser.add_argument('--compare', action='store_true', help='Also measure without the indexes of 0002')
+    args = parser.parse_args()
+
+    call_command('migrate', verbosity=0)
+    populate(args.rows, progress=100)
+    if args.compare:
+        call_command('migrate', 'django_admin_rq', '0001', verbosity=0)
+        print('Without indexes')
+        run(args.samples)
+        call_command('migrate', 'django_admin_rq', verbosity=0)
+        print('With indexes')
+    run(args.samples)
+
+
+if __name__ == '__main__':
+    main()
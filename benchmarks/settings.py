@@ -0,0 +1,70 @@
+# -*- coding: utf-8 -*-
+"""
+Minimal settings to run the benchmarks against a local SQLite database.
+"""
+import os
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+SECRET_KEY = 'django-admin-rq-benchmarks'
+DEBUG = False
+ALLOWED_HOSTS = ['testserver']
+
+INSTALLED_APPS = [
+    'django.contrib.admin',
+    'django.contrib.auth',
+    'django.contrib.contenttypes',
+    'django.contrib.sessions',
+    'django.contrib.messages',
+    'django.contrib.staticfiles',
+    'rest_framework',
+    'django_rq',
+    'django_admin_rq',
+]
+
+DATABASES = {
+    'default': {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': os.environ.get('BENCHMARK_DB', os.path.join(BASE_DIR, 'benchmark.sqlite3')),
+        # Concurrent pollers and writers wait for the write lock instead of failing
+        'OPTIONS': {'timeout': 30},
+    }
+}
+
+MIDDLEWARE = MIDDLEWARE_CLASSES = [
+    'django.contrib.sessions.middleware.SessionMiddleware',
+    'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'django.contrib.messages.middleware.MessageMiddleware',
+]
+
+ROOT_URLCONF = 'benchmarks.urls'
+
+# benchmarks.endpoints points this at a temporary directory it deletes on exit
+MEDIA_ROOT = os.environ.get('BENCHMARK_MEDIA_ROOT', os.path.join(BASE_DIR, 'media'))
+STATIC_URL = '/static/'
+
+TEMPLATES = [
+    {
+        'BACKEND': 'django.template.backends.django.DjangoTemplates',
+        'APP_DIRS': True,
+        'OPTIONS': {
+            'context_processors': [
+                'django.contrib.auth.context_processors.auth',
+                'django.contrib.messages.context_processors.messages',
+                'django.template.context_processors.request',
+            ],
+        },
+    },
+]
+
+RQ_QUEUES = {
+    'default': {
+        'HOST': 'localhost',
+        'PORT': 6379,
+        'DB': 0,
+    }
+}
+
+DJANGO_ADMIN_RQ_STATUS_BACKEND = os.environ.get(
+    'BENCHMARK_STATUS_BACKEND', 'django_admin_rq.backends.DatabaseStatusBackend'
+)
@@ -0,0 +1,9 @@
+# -*- coding: utf-8 -*-
+from django.conf.urls import include, url
+
+from benchmarks.admin import site
+
+urlpatterns = [
+    url(r'^admin/', site.urls),
+    url(r'^django-admin-rq/', include('django_admin_rq.urls')),
+]
@@ -0,0 +1,31 @@
+# -*- coding: utf-8 -*-
+"""
+Helpers shared by the benchmarks.
+"""
+from __future__ import print_function, unicode_literals
+
+from django.db import transaction
+
+from django_admin_rq.models import JobStatus, STATUS_FINISHED, _get_uuid
+
+
+def populate(rows, batch_size=10000, status=STATUS_FINISHED, **fields):
+    """
+    Fills the JobStatus table up to rows rows with the given status.
+    """
+    existing = JobStatus.objects.filter(status=status).count()
+    while existing < rows:
+        count = min(batch_size, rows - existing)
+        with transaction.atomic():
+            JobStatus.objects.bulk_create([
+                JobStatus(job_uuid=_get_uuid(), job_id=_get_uuid(), status=status, **fields)
+                for _ in range(count)
+            ])
+        existing += count
+        print('\r{} {} rows'.format(existing, status.lower()), end='', flush=True)
+    print()
+
+
+def percentile(timings, fraction):
+    timings = sorted(timings)
+    return timings[min(len(timings) - 1, int(len(timings) * fraction))]
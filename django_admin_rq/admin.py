@@ -1,46 +1,61 @@
 # -*- coding: utf-8 -*-
 from __future__ import unicode_literals
-import copy
-import os
+import logging
 import re
-from collections import OrderedDict
+import warnings
 from functools import update_wrapper
 from urllib.parse import urlencode, urljoin
 from uuid import uuid4
 
 import django
-from django.conf import settings
-
-from django.contrib.contenttypes.models import ContentType
+import django_rq
+from django.contrib.admin.options import IS_POPUP_VAR
 from django.contrib.staticfiles.templatetags.staticfiles import static
-from django.core.files.storage import FileSystemStorage
 from django.core.files.uploadedfile import UploadedFile
 from django.core.urlresolvers import reverse
 from django.db import models
-from django.db import transaction
-from django.http import HttpResponseRedirect
+from django.db import IntegrityError, transaction
+from django.db.models.query import QuerySet
+from django.http import Http404, HttpResponseRedirect
 from django.template import RequestContext
 from django.template.response import TemplateResponse
-from django.utils import six
 from django.utils.decorators import method_decorator
+from django.utils import timezone
 from django.utils.encoding import force_text
 from django.views.decorators.csrf import csrf_protect
 
-from django_admin_rq.models import JobStatus
+from django_admin_rq import conf
+from django_admin_rq.exceptions import JobPayloadTooLarge
+from django_admin_rq.forms import JobScheduleForm
+from django_admin_rq.jobs import create_job, get_job_callable_queue, get_job_decorator, run_with_concurrency_limits
+from django_admin_rq.locks import claim_idempotency_key
+from django_admin_rq.models import ACTIVE_STATUSES, JobRun, JobStatus, LARGE_FIELDS
+from django_admin_rq.payloads import LazyFormData, LazyJobStatus
+from django_admin_rq.scheduler import add_scheduled_job
+from django_admin_rq.serialization import (
+    CONTENT_TYPE_PREFIX, CONTENT_TYPE_RE_PATTERN, deserialize_form_data, form_data_as_dict, get_form_data_hash,
+    is_instance_list, serialize_instance, serialize_queryset
+)
+from django_admin_rq.storage import acquire_files, get_file_value, get_form_data_files, save_job_file
+from django_admin_rq.signals import job_enqueued
+from django_admin_rq.uploads import ChunkedUploadedFile
+
+logger = logging.getLogger(__name__)
 
 csrf_protect_m = method_decorator(csrf_protect)
 
-_CONTENT_TYPE_PREFIX = 'contenttype://'
-_CONTENT_TYPE_RE_PATTERN = 'contenttype://([a-zA-Z-_]+)\.([a-zA-Z]+):(\d{1,10})'
+_CONTENT_TYPE_PREFIX = CONTENT_TYPE_PREFIX
+_CONTENT_TYPE_RE_PATTERN = CONTENT_TYPE_RE_PATTERN
 
 FORM_VIEW = 'form'
 PREVIEW_RUN_VIEW = 'preview_run'
 MAIN_RUN_VIEW = 'main_run'
 COMPLETE_VIEW = 'complete'
 
-_fs = FileSystemStorage(os.path.join(settings.MEDIA_ROOT, 'django_admin_rq'))
-if not os.path.isdir(_fs.location):
-    os.makedirs(_fs.location)
+_RUN_ID_RE = re.compile(r'^[a-f0-9]{6,32}$')
+
+JOB_PRIORITY_NORMAL = 'normal'
+JOB_PRIORITY_HIGH = 'high'
 
 
 class JobAdminMixin(object):
@@ -75,7 +90,10 @@ class JobAdminMixin(object):
         ]
         return job_urls + urls
 
-    def get_workflow_url(self, view_name, job_name, object_id=None):
+    def get_workflow_url(self, view_name, job_name, object_id=None, run_id=None):
+        """
+        Returns the url of the given workflow view, with run_id as its job-id if given.
+        """
         info = self.model._meta.app_label, self.model._meta.model_name
         url_kwargs = {'job_name': job_name}
         if object_id:
@@ -88,6 +106,8 @@ class JobAdminMixin(object):
             url = reverse('admin:%s_%s_job_run' % info, kwargs=url_kwargs, current_app=self.admin_site.name)
         else:
             url = reverse('admin:%s_%s_job_complete' % info, kwargs=url_kwargs, current_app=self.admin_site.name)
+        if run_id:
+            url = urljoin(url, '?{}'.format(urlencode({'job-id': run_id})))
         return url
 
     def get_job_names(self):
@@ -173,6 +193,104 @@ class JobAdminMixin(object):
         """
         return {}
 
+    def get_job_action_callable(self, job_name, request=None):
+        """
+        Returns the function decorated with :func:`~django_rq.job` the changelist action of this job runs over the
+        selected objects or None to not offer the job as action.
+        It is enqueued once per chunk of selected objects as ``job_callable(job_status, object_ids, extra_context)``.
+        """
+        return None
+
+    def get_job_action_chunk_size(self, job_name):
+        """
+        Returns the number of selected objects each job of the changelist action processes,
+        ``DJANGO_ADMIN_RQ_JOB_ACTION_CHUNK_SIZE`` by default.
+        """
+        return conf.JOB_ACTION_CHUNK_SIZE
+
+    def get_job_queue(self, job_name, preview=True, request=None, object_id=None):
+        """
+        Returns the name of the queue the job is enqueued on or None for the queue the job callable was decorated
+        with, 'default' if it has none.
+        """
+        return None
+
+    def get_job_priority(self, job_name, preview=True, request=None, object_id=None):
+        """
+        Returns JOB_PRIORITY_NORMAL or JOB_PRIORITY_HIGH.  High priority jobs are enqueued at the front of their queue.
+        """
+        return JOB_PRIORITY_NORMAL
+
+    def can_schedule_job(self, job_name):
+        """
+        Returns boolean whether or not the job form offers to start the main run at a given time or in the
+        off-peak window instead of right away.  Scheduled jobs are enqueued by the run_job_scheduler command.
+        """
+        return False
+
+    def get_job_off_peak_window(self, job_name):
+        """
+        Returns the daily window of quiet hours the job can be scheduled in, a pair of 'HH:MM' start and end times,
+        or None.  Defaults to ``DJANGO_ADMIN_RQ_OFF_PEAK_WINDOW``.
+        """
+        return conf.OFF_PEAK_WINDOW
+
+    def get_job_schedule_form(self, job_name, data=None):
+        """
+        Returns the form the main run is scheduled with on the job form, see
+        :func:`~django_admin_rq.admin.JobAdminMixin.can_schedule_job`.
+        """
+        return JobScheduleForm(data, prefix='schedule', off_peak_window=self.get_job_off_peak_window(job_name))
+
+    def get_job_concurrency_limit(self, job_name, preview=True):
+        """
+        Returns how many jobs of this job name may run at the same time or None for no limit.
+        Jobs over the limit are parked with the status WAITING until a slot is free.
+        """
+        return None
+
+    def get_job_user_concurrency_limit(self, job_name, preview=True):
+        """
+        Returns how many jobs of this job name a single user may run at the same time or None for no limit.
+        """
+        return None
+
+    def get_job_semaphores(self, request, job_name, preview=True):
+        """
+        Returns the list of (name, limit) pairs of the concurrency limits the job runs under.
+        """
+        semaphores = []
+        prefix = '{}.{}:{}'.format(self.model._meta.app_label, self.model._meta.model_name, job_name)
+        limit = self.get_job_concurrency_limit(job_name, preview)
+        if limit is not None:
+            semaphores.append((prefix, limit))
+        user_limit = self.get_job_user_concurrency_limit(job_name, preview)
+        if user_limit is not None and request.user.pk is not None:
+            semaphores.append(('{}:user:{}'.format(prefix, request.user.pk), user_limit))
+        return semaphores
+
+    def use_long_polling(self, job_name):
+        """
+        Returns boolean whether or not the run page long polls the job's status instead of polling it.
+        A long poll holds a web worker until the status changes, so this needs an async or threaded worker class.
+        Defaults to ``DJANGO_ADMIN_RQ_LONG_POLLING``.
+        """
+        return conf.LONG_POLLING
+
+    def show_job_result(self, job_name, preview=True):
+        """
+        Returns boolean whether or not the run page loads and shows the job's result once the job finished.
+        The result is fetched from the result url after the page loaded.
+        """
+        return False
+
+    def show_job_log(self, job_name, preview=True):
+        """
+        Returns boolean whether or not the run page shows the lines the job logged with
+        :meth:`~django_admin_rq.models.JobStatus.log`.  The log is tailed while the job runs.
+        """
+        return True
+
     def get_job_media(self, job_name, request=None, object_id=None, view_name=None):
         """
         Returns an instance of :class:`django.forms.widgets.Media` used to inject extra css and js into the workflow
@@ -211,17 +329,67 @@ class JobAdminMixin(object):
         return FORM_VIEW, PREVIEW_RUN_VIEW, MAIN_RUN_VIEW, COMPLETE_VIEW
 
     def get_workflow_start_url(self, job_name, object_id=None):
+        """
+        Returns the url of the first workflow view with a new job-id, every job-id starts a new run.
+        """
+        run_id = uuid4().hex
         if FORM_VIEW in self.get_workflow_views(job_name):
-            url = self.get_workflow_url(FORM_VIEW, job_name, object_id)
+            return self.get_workflow_url(FORM_VIEW, job_name, object_id, run_id)
+        elif PREVIEW_RUN_VIEW in self.get_workflow_views(job_name):
+            return self.get_workflow_url(PREVIEW_RUN_VIEW, job_name, object_id, run_id)
         else:
-            if PREVIEW_RUN_VIEW in self.get_workflow_views(job_name):
-                url = self.get_workflow_url(PREVIEW_RUN_VIEW, job_name, object_id)
-            else:
-                url = self.get_workflow_url(MAIN_RUN_VIEW, job_name, object_id)
-        params = {
-            'job-id': uuid4().hex[:6]
-        }
-        return urljoin(url, '?{}'.format(urlencode(params)))
+            return self.get_workflow_url(MAIN_RUN_VIEW, job_name, object_id, run_id)
+
+    def get_actions(self, request):
+        actions = super(JobAdminMixin, self).get_actions(request)
+        if self.actions is None or IS_POPUP_VAR in request.GET:
+            return actions
+        for job_name in self.get_job_names():
+            if callable(self.get_job_action_callable(job_name, request=request)):
+                name = 'job_{}'.format(job_name)
+                actions[name] = (self.get_job_action(job_name), name, self.get_job_title(job_name))
+        return actions
+
+    def get_job_action(self, job_name):
+        """
+        Returns the changelist action that runs the job over the selected objects.
+        """
+        def action(modeladmin, request, queryset):
+            return modeladmin.run_job_action(request, job_name, queryset)
+        return action
+
+    def run_job_action(self, request, job_name, queryset):
+        """
+        Fans the job out over the selected objects in chunks of
+        :func:`~django_admin_rq.admin.JobAdminMixin.get_job_action_chunk_size` and redirects to the main run page of
+        a new job run, which shows the progress of all chunks.
+        """
+        object_ids = list(queryset.values_list('pk', flat=True))
+        chunk_size = self.get_job_action_chunk_size(job_name)
+        opts = self.model._meta
+        job_run = JobRun(run_id=uuid4().hex, job_name=job_name, user_id=request.user.pk)
+        job_run.set_form_data([{
+            'name': 'objects',
+            'label': force_text(opts.verbose_name_plural).capitalize(),
+            'value': len(object_ids),
+            'display_value': '{} {}'.format(
+                len(object_ids), force_text(opts.verbose_name if len(object_ids) == 1 else opts.verbose_name_plural)
+            ),
+            'file_name': None,
+        }], save=False)
+        job_status = JobStatus.objects.create(job_name=job_name)
+        job_run.set_job_status(MAIN_RUN_VIEW, job_status, save=False)
+        job_run.save()
+        job_callable = self.get_job_action_callable(job_name, request=request)
+        queue_name = self.get_job_queue(job_name, preview=False, request=request)
+        # The children are created with one query and enqueued in one redis pipeline
+        job_status.fan_out(
+            job_callable,
+            [object_ids[index:index + chunk_size] for index in range(0, len(object_ids), chunk_size)],
+            self.get_job_callable_extra_context(request, job_name, preview=False),
+            queues=[queue_name or get_job_callable_queue(job_callable).name],
+        )
+        return HttpResponseRedirect(self.get_workflow_url(MAIN_RUN_VIEW, job_name, run_id=job_run.run_id))
 
     @csrf_protect_m
     def changelist_view(self, request, extra_context=None):
@@ -262,113 +430,136 @@ class JobAdminMixin(object):
 
     def serialize_form(self, form):
         """
-        Given this job's bound form return the form's data as a session serializable object
+        Given this job's bound form return the form's data as a JSON serializable object
         The field order is preserved from the original form
         """
         data = []
         for field_name, field in form.fields.items():
             if field_name in form.cleaned_data:
                 form_value = form.cleaned_data[field_name]
-                display_value = None
+                display_value = file_name = None
                 if isinstance(form_value, models.Model):
-                    ctype = ContentType.objects.get_for_model(form_value)
-                    form_value = '{0}{1}.{2}:{3}'.format(
-                        _CONTENT_TYPE_PREFIX,
-                        ctype.app_label,
-                        ctype.model,
-                        form_value.pk
+                    form_value = serialize_instance(form_value)
+                elif isinstance(form_value, QuerySet) or is_instance_list(form_value):
+                    # Model multiple choices are stored as a compact list of primary keys
+                    form_value, count, model = serialize_queryset(form_value)
+                    display_value = '{} {}'.format(
+                        count, force_text(model._meta.verbose_name if count == 1 else model._meta.verbose_name_plural)
                     )
                 elif isinstance(form_value, UploadedFile):
-                    file_name = _fs.get_available_name(form_value.name)
-                    file_path = _fs.path(file_name)
-                    with open(file_path, 'wb+') as destination:
-                        for chunk in form_value.chunks():
-                            destination.write(chunk)
-                    form_value = file_path
-                    display_value = file_name
+                    original_name = form_value.name
+                    # Storages move uploads Django already spooled to a temporary file instead of copying them
+                    file_name = save_job_file(form_value)
+                    if isinstance(form_value, ChunkedUploadedFile):
+                        form_value.close()
+                        form_value.upload.delete()
+                    form_value = get_file_value(file_name)
+                    display_value = original_name if conf.DEDUPLICATE_FILES else file_name
                 data.append({
                     'name': field_name,
                     'label': force_text(field.label) if field.label else None,
                     'value': form_value,
                     'display_value': display_value,
+                    'file_name': file_name,
                 })
         return data
 
-    def _get_job_session_key(self, job_name):
-        return 'django_admin_rq_{}'.format(job_name)
+    def get_run_id(self, request):
+        """
+        Returns the job-id of the request's url or None if it has none.
+        """
+        run_id = request.GET.get('job-id', '')
+        return run_id if _RUN_ID_RE.match(run_id) else None
 
-    def _start_job_session(self, request, job_name):
-        request.session[self._get_job_session_key(job_name)] = {}
+    def get_job_run(self, request, job_name):
+        """
+        Returns the :class:`~django_admin_rq.models.JobRun` of the request's job-id.
+        Raises Http404 if the run does not exist or belongs to another user.
+        """
+        job_runs = request.__dict__.setdefault('_django_admin_rq_job_runs', {})
+        if job_name not in job_runs:
+            run_id = self.get_run_id(request)
+            job_run = None
+            if run_id is not None:
+                job_run = JobRun.objects.filter(run_id=run_id, job_name=job_name, user_id=request.user.pk).first()
+            if job_run is None:
+                raise Http404
+            job_runs[job_name] = job_run
+        return job_runs[job_name]
+
+    def _clear_form_data_cache(self, request, job_name):
+        getattr(request, '_django_admin_rq_form_data', {}).pop(job_name, None)
 
     def get_session_data(self, request, job_name):
-        key = self._get_job_session_key(job_name)
-        if key not in request.session:
-            self._start_job_session(request, job_name)
-        return request.session[key]
+        warnings.warn(
+            'JobAdminMixin.get_session_data() is deprecated, use get_job_run() which returns the JobRun.',
+            DeprecationWarning, stacklevel=2
+        )
+        return self.get_job_run(request, job_name)
 
-    def get_session_form_data_as_list(self, request, job_name):
+    def get_run_form_data_as_list(self, request, job_name):
         """
-        Retrieve form data that was serialized to the session in :func:`~django_admin_rq.admin.JobAdminMixin.job_form`
+        Retrieve form data that was serialized to the job run in :func:`~django_admin_rq.admin.JobAdminMixin.job_form`
         Values prefixed with 'contenttype:' are replace with the instantiated Model versions.
+        The form data is deserialized once per request, model instances of the same type are loaded with one query.
         """
-        form_data = []
-        serialized_data = self.get_session_data(request, job_name).get('form_data', [])
-
-        for field_data in copy.deepcopy(serialized_data):  # Don't modify the serialized session data
-            value = field_data['value']
-            if isinstance(value, six.string_types):
-                if value.startswith(_CONTENT_TYPE_PREFIX):
-                    match = re.search(_CONTENT_TYPE_RE_PATTERN, value)
-                    if match:
-                        field_data['value'] = ContentType.objects.get(
-                            app_label=match.group(1),
-                            model=match.group(2)
-                        ).get_object_for_this_type(**{
-                            'pk': match.group(3)
-                        })
-            form_data.append(field_data)
-
-        return form_data
+        if not hasattr(request, '_django_admin_rq_form_data'):
+            request._django_admin_rq_form_data = {}
+        if job_name not in request._django_admin_rq_form_data:
+            request._django_admin_rq_form_data[job_name] = deserialize_form_data(
+                self.get_job_run(request, job_name).get_form_data()
+            )
+        return request._django_admin_rq_form_data[job_name]
 
-    def get_session_form_data_as_dict(self, request, job_name):
+    def get_run_form_data_as_dict(self, request, job_name):
         """
         Convenience method to have the form data like form.cleaned_data
         """
-        data_dict = OrderedDict()
-        for value_dict in self.get_session_form_data_as_list(request, job_name):
-            data_dict[value_dict['name']] = value_dict['value']
-        return data_dict
+        return form_data_as_dict(self.get_run_form_data_as_list(request, job_name))
 
-    def set_session_job_status(self, request, job_name, job_status, view_name):
+    def get_session_form_data_as_list(self, request, job_name):
+        warnings.warn(
+            'JobAdminMixin.get_session_form_data_as_list() is deprecated, use get_run_form_data_as_list().',
+            DeprecationWarning, stacklevel=2
+        )
+        return self.get_run_form_data_as_list(request, job_name)
+
+    def get_session_form_data_as_dict(self, request, job_name):
+        warnings.warn(
+            'JobAdminMixin.get_session_form_data_as_dict() is deprecated, use get_run_form_data_as_dict().',
+            DeprecationWarning, stacklevel=2
+        )
+        return self.get_run_form_data_as_dict(request, job_name)
+
+    def set_run_job_status(self, request, job_name, job_status, view_name):
         """
-        Serializes the given :class:`~django_admin_rq.models.JobStatus` to this job's session.
+        Stores the given :class:`~django_admin_rq.models.JobStatus` as the status of the given view in the job run.
         """
         if isinstance(job_status, JobStatus) and job_status.pk:
-            ctype = ContentType.objects.get_for_model(job_status)
-            status = '{0}{1}.{2}:{3}'.format(_CONTENT_TYPE_PREFIX, ctype.app_label, ctype.model, job_status.pk)
-            session_data = self.get_session_data(request, job_name)
-            session_data['{}_job_status'.format(view_name)] = status
-            request.session.modified = True
+            self.get_job_run(request, job_name).set_job_status(view_name, job_status)
         else:
-            raise ValueError('job_status must be an instance of {} that has a valid pk.'.format(JobStatus.__class__.__name__))
+            raise ValueError('job_status must be an instance of {} that has a valid pk.'.format(JobStatus.__name__))
 
-    def get_session_job_status(self, request, job_name, view_name):
+    def get_run_job_status(self, request, job_name, view_name):
         """
         Returns an instance of :class:`~django_admin_rq.models.JobStatus` representing the status for the given view.
-        Returns None if the reference is missing from the session.
-        """
-        session_data = self.get_session_data(request, job_name)
-        status = session_data.get('{}_job_status'.format(view_name), None)
-        if status is not None and isinstance(status, six.string_types) and status.startswith(_CONTENT_TYPE_PREFIX):
-            match = re.search(_CONTENT_TYPE_RE_PATTERN, status)
-            if match:
-                return ContentType.objects.get(
-                    app_label=match.group(1),
-                    model=match.group(2)
-                ).get_object_for_this_type(**{
-                    'pk': match.group(3)
-                })
-        return None
+        Returns None if the job run did not start that job yet.
+        """
+        return self.get_job_run(request, job_name).get_job_status(view_name)
+
+    def set_session_job_status(self, request, job_name, job_status, view_name):
+        warnings.warn(
+            'JobAdminMixin.set_session_job_status() is deprecated, use set_run_job_status().',
+            DeprecationWarning, stacklevel=2
+        )
+        return self.set_run_job_status(request, job_name, job_status, view_name)
+
+    def get_session_job_status(self, request, job_name, view_name):
+        warnings.warn(
+            'JobAdminMixin.get_session_job_status() is deprecated, use get_run_job_status().',
+            DeprecationWarning, stacklevel=2
+        )
+        return self.get_run_job_status(request, job_name, view_name)
 
     def get_job_context(self, request, job_name, object_id, view_name):
         """
@@ -390,8 +581,8 @@ class JobAdminMixin(object):
             preview_run_view=PREVIEW_RUN_VIEW,
             main_run_view=MAIN_RUN_VIEW,
             complete_view=COMPLETE_VIEW,
-            form_data_list=self.get_session_form_data_as_list(request, job_name),
-            form_data_dict=self.get_session_form_data_as_dict(request, job_name),
+            form_data_list=self.get_run_form_data_as_list(request, job_name),
+            form_data_dict=self.get_run_form_data_as_dict(request, job_name),
             preview=preview,
             job_media=self.get_job_media(job_name, request=request, object_id=object_id, view_name=view_name),
         )
@@ -414,54 +605,227 @@ class JobAdminMixin(object):
                 'admin:%s_%s_changelist' % info, current_app=self.admin_site.name
             )
         if view_name in (PREVIEW_RUN_VIEW, MAIN_RUN_VIEW):
-            job_status = self.get_session_job_status(request, job_name, view_name)
+            job_status = self.get_run_job_status(request, job_name, view_name)
             if job_status is None:
                 # job_status is None when no job has been started
                 job_callable = self.get_job_callable(job_name, preview, request=request, object_id=object_id,
                                                      view_name=view_name)
                 if callable(job_callable):
-                    job_status = JobStatus()
-                    job_status.save()
-                    self.set_session_job_status(request, job_name, job_status, view_name)
-                    context.update({
-                        'job_status': job_status,
-                        'job_status_url': job_status.url()  # The frontend starts polling the status url if it's present
-                    })
-                    job_callable.delay(
-                        job_status,
-                        self.get_session_form_data_as_dict(request, job_name),
-                        self.get_job_callable_extra_context(request, job_name, preview, object_id)
+                    job_status = JobStatus(
+                        job_uuid=uuid4().hex,
+                        job_name=job_name,
+                        artifact_namespace=self.get_job_artifact_namespace(request, job_name, object_id) or '',
+                    )
+                    job_status.set_input_files(
+                        get_form_data_files(self.get_job_run(request, job_name).get_form_data()),
+                        save=False
                     )
+                    # Saved before the idempotency key is claimed, so a concurrent identical run finds it
+                    job_status.save()
+                    duplicate = self.get_duplicate_job_status(request, job_name, job_status.job_uuid, object_id,
+                                                              view_name)
+                    if duplicate is not None:
+                        # The same job is already queued or running, attach to it instead of enqueueing it again
+                        job_status.delete()
+                        job_status = duplicate
+                        self.set_run_job_status(request, job_name, job_status, view_name)
+                        context['job_status'] = job_status
+                        context.update(self._get_job_status_urls(job_name, job_status))
+                    else:
+                        acquire_files(job_status.get_input_files())
+                        self.set_run_job_status(request, job_name, job_status, view_name)
+                        context['job_status'] = job_status
+                        run_at = self.get_job_run(request, job_name).run_at if not preview else None
+                        if run_at is not None and run_at <= timezone.now():
+                            run_at = None
+                        self.enqueue_job(request, job_name, job_status, job_callable, preview, object_id,
+                                         run_at=run_at)
+                        if not job_status.is_failed():
+                            # The frontend starts polling the status url if it's present
+                            context.update(self._get_job_status_urls(job_name, job_status))
             else:
                 context['job_status'] = job_status
-                # do not set job_status_url in this case otherwise it'll be an endless redirect loop
+                # do not set job_status_url for finished jobs otherwise it'll be an endless redirect loop
+                if job_status.is_finished() and self.show_job_result(job_name, preview):
+                    context['job_result_url'] = job_status.result_url()
+                elif job_status.status in ACTIVE_STATUSES:
+                    # Keep polling after a reload and on the page of a changelist action
+                    context.update(self._get_job_status_urls(job_name, job_status))
+            if context.get('job_status') is not None and self.show_job_log(job_name, preview):
+                context.update({
+                    'job_log_url': context['job_status'].log_url(),
+                    'job_log_poll_interval': conf.LOG_POLL_INTERVAL,
+                })
 
+        # Every workflow url carries the run's job-id
+        run_id = self.get_job_run(request, job_name).run_id
+        context.update({
+            'run_id': run_id,
+            'form_view_url': self.get_workflow_url(FORM_VIEW, job_name, object_id, run_id),
+            'main_run_view_url': self.get_workflow_url(MAIN_RUN_VIEW, job_name, object_id, run_id),
+        })
         if COMPLETE_VIEW in self.get_workflow_views(job_name):
-            context['complete_view_url'] = self.get_workflow_url(COMPLETE_VIEW, job_name, object_id)
+            context['complete_view_url'] = self.get_workflow_url(COMPLETE_VIEW, job_name, object_id, run_id)
         else:
             context['complete_view_url'] = None
         return context
 
-    def check_job_id(self, request, job_name):
-        if 'job-id' in request.GET:
-            job_id = request.GET['job-id']
-            stored_job_id = self.get_session_data(request, job_name).get('job-id', None)
-            if job_id != stored_job_id:
-                self._start_job_session(request, job_name)
-                self.get_session_data(request, job_name)['job-id'] = job_id
-                request.session.modified = True
+    def _get_job_status_urls(self, job_name, job_status):
+        return {
+            'job_status_url': job_status.url(),
+            'job_status_wait_url': job_status.wait_url() if self.use_long_polling(job_name) else None,
+            'job_cancel_url': job_status.cancel_url(),
+        }
+
+    def get_job_idempotency_key(self, request, job_name, object_id=None, view_name=None):
+        """
+        Returns the key that identifies identical runs of this job or None to always enqueue a new job.
+        While a job with the same key is queued or running, starting the job attaches to it instead.
+        By default runs with the same job name, view, object and form data are identical.
+        """
+        if not conf.IDEMPOTENT_JOBS:
+            return None
+        return '{}.{}:{}:{}:{}:{}'.format(
+            self.model._meta.app_label,
+            self.model._meta.model_name,
+            job_name,
+            view_name,
+            object_id or '',
+            get_form_data_hash(self.get_job_run(request, job_name).get_form_data())
+        )
+
+    def get_duplicate_job_status(self, request, job_name, job_uuid, object_id=None, view_name=None):
+        """
+        Claims this run's idempotency key for the saved job status with job_uuid that is about to be enqueued.
+        Returns the :class:`~django_admin_rq.models.JobStatus` that holds the key instead while it is alive, see
+        :meth:`~django_admin_rq.models.JobStatus.is_alive`, None if the job has to be enqueued.
+        """
+        key = self.get_job_idempotency_key(request, job_name, object_id=object_id, view_name=view_name)
+        if key is None:
+            return None
+        duplicates = {}
+
+        def is_stale(holder):
+            duplicates[holder] = JobStatus.objects.defer(*LARGE_FIELDS).filter(job_uuid=holder).first()
+            return duplicates[holder] is None or not duplicates[holder].is_alive()
+
+        holder = claim_idempotency_key(key, job_uuid, is_stale)
+        if holder is None:
+            logger.warning('Job %s is enqueued without claiming its contended idempotency key %s', job_name, key)
+            return None
+        return duplicates.get(holder) if holder != job_uuid else None
+
+    def get_job_artifact_namespace(self, request, job_name, object_id=None):
+        """
+        Returns the namespace of the artifacts the job can share with other runs or None to not cache artifacts.
+        By default the preview and main run and repeated runs with the same object and form data share artifacts.
+        """
+        return get_form_data_hash([
+            self.model._meta.app_label,
+            self.model._meta.model_name,
+            job_name,
+            object_id or '',
+            self.get_job_run(request, job_name).get_form_data(),
+        ])
+
+    def use_lazy_job_payload(self, job_name):
+        """
+        Returns boolean whether or not the job callable receives lightweight references instead of the pickled
+        JobStatus and form data.  The references behave like the originals and load them on first access.
+        Defaults to ``DJANGO_ADMIN_RQ_LAZY_PAYLOADS``.
+        """
+        return conf.LAZY_PAYLOADS
+
+    def get_job_args(self, request, job_name, job_status, preview=True, object_id=None):
+        """
+        Returns the tuple of arguments the job callable is enqueued with.
+        """
+        extra_context = self.get_job_callable_extra_context(request, job_name, preview, object_id)
+        if self.use_lazy_job_payload(job_name):
+            return (
+                LazyJobStatus(job_status.job_uuid),
+                LazyFormData(self.get_job_run(request, job_name).get_form_data()),
+                extra_context,
+            )
+        return job_status, self.get_run_form_data_as_dict(request, job_name), extra_context
+
+    def enqueue_job(self, request, job_name, job_status, job_callable, preview=True, object_id=None, run_at=None):
+        """
+        Enqueues the job callable, or schedules it to be enqueued at the datetime run_at, and returns the rq job.
+        Fails the job status and returns None if the payload exceeds ``DJANGO_ADMIN_RQ_MAX_PAYLOAD_SIZE``.
+        """
+        args = self.get_job_args(request, job_name, job_status, preview, object_id)
+        queue_name = self.get_job_queue(job_name, preview, request=request, object_id=object_id)
+        semaphores = self.get_job_semaphores(request, job_name, preview)
+        decorated_callable = job_callable
+        if semaphores:
+            # The wrapper runs the job callable once the job holds a slot under every limit
+            args = (job_callable, job_status.job_uuid, semaphores) + tuple(args)
+            job_callable = run_with_concurrency_limits
+        if queue_name is not None:
+            queue = django_rq.get_queue(queue_name)
+        else:
+            queue = get_job_callable_queue(decorated_callable)
+        # The payload is pickled once, the size check reads the data rq stores
+        job = create_job(queue, job_callable, args, decorated_callable=decorated_callable)
+        payload_size = len(job.data)
+        logger.debug('Job %s %s has a payload of %d bytes', job_name, job_status, payload_size)
+        if conf.MAX_PAYLOAD_SIZE is not None and payload_size > conf.MAX_PAYLOAD_SIZE:
+            error = JobPayloadTooLarge(payload_size, conf.MAX_PAYLOAD_SIZE)
+            logger.warning('Job %s %s was not enqueued: %s', job_name, job_status, error)
+            job_status.set_failure_reason(force_text(error))
+            job_status.fail()
+            return None
+        # Before the job is enqueued, cancelling and the exception handler find the job status by the rq job id
+        job_status.set_job_id(job.get_id())
+        if run_at is not None:
+            job_status.schedule(run_at)
+            add_scheduled_job(job, run_at)
+        else:
+            decorator = get_job_decorator(decorated_callable)
+            at_front = bool(decorator and decorator.at_front) or \
+                self.get_job_priority(job_name, preview, request=request, object_id=object_id) == JOB_PRIORITY_HIGH
+            queue.enqueue_job(job, at_front=at_front)
+        job_enqueued.send(
+            sender=self.__class__, job_name=job_name, job_status=job_status, job=job, payload_size=payload_size
+        )
+        return job
+
+    def check_job_id(self, request, job_name, object_id=None):
+        """
+        Starts the job run of the url's job-id on first access.
+        Returns a redirect to a new run if the url has no job-id.
+        """
+        run_id = self.get_run_id(request)
+        if run_id is None:
+            return HttpResponseRedirect(self.get_workflow_start_url(job_name, object_id))
+        try:
+            with transaction.atomic():
+                job_run, created = JobRun.objects.get_or_create(run_id=run_id, defaults={
+                    'job_name': job_name,
+                    'user_id': request.user.pk,
+                    'object_id': object_id or '',
+                })
+        except IntegrityError:
+            # A concurrent request for the same job-id created the run
+            job_run = JobRun.objects.get(run_id=run_id)
+        if job_run.job_name != job_name or job_run.user_id != request.user.pk or \
+                job_run.object_id != force_text(object_id or ''):
+            raise Http404
+        request.__dict__.setdefault('_django_admin_rq_job_runs', {})[job_name] = job_run
+        return None
 
     def job_form(self, request, job_name='', object_id=None):
-        self.check_job_id(request, job_name)
-        return self.job_serve(request, job_name, object_id, FORM_VIEW)
+        return self.check_job_id(request, job_name, object_id) or \
+            self.job_serve(request, job_name, object_id, FORM_VIEW)
 
     def job_run(self, request, job_name='', object_id=None, view_name=None):
-        self.check_job_id(request, job_name)
-        return self.job_serve(request, job_name, object_id, view_name)
+        return self.check_job_id(request, job_name, object_id) or \
+            self.job_serve(request, job_name, object_id, view_name)
 
     def job_complete(self, request, job_name='', object_id=None):
-        self.check_job_id(request, job_name)
-        return self.job_serve(request, job_name, object_id, COMPLETE_VIEW)
+        return self.check_job_id(request, job_name, object_id) or \
+            self.job_serve(request, job_name, object_id, COMPLETE_VIEW)
 
     def job_serve(self, request, job_name='', object_id=None, view_name=None, extra_context=None):
         context = self.get_job_context(request, job_name, object_id, view_name)
@@ -475,20 +839,27 @@ class JobAdminMixin(object):
                 initial = self.get_job_form_initial(request, job_name, object_id=object_id, view_name=view_name,
                                                     extra_context=extra_context)
                 form = form_class(initial=initial)
+                if self.can_schedule_job(job_name):
+                    context['schedule_form'] = self.get_job_schedule_form(job_name)
             else:
                 form_class = self.get_job_form_class(job_name, request=request, object_id=object_id,
                                                      view_name=view_name, extra_context=extra_context,)
                 form = form_class(request.POST, request.FILES)
-                if form.is_valid():
-                    # Save the serialized form data to the session
-                    session_data = self.get_session_data(request, job_name)
-                    session_data['form_data'] = self.serialize_form(form)
-                    request.session.modified = True
+                schedule_form = None
+                if self.can_schedule_job(job_name):
+                    schedule_form = context['schedule_form'] = self.get_job_schedule_form(job_name, request.POST)
+                if form.is_valid() and (schedule_form is None or schedule_form.is_valid()):
+                    # Save the serialized form data and when to run the main job to the job run
+                    job_run = self.get_job_run(request, job_name)
+                    job_run.set_form_data(self.serialize_form(form), save=False)
+                    job_run.run_at = schedule_form.get_run_at() if schedule_form is not None else None
+                    job_run.save(update_fields=('form_data', 'run_at', 'updated_on'))
+                    self._clear_form_data_cache(request, job_name)
 
                     if PREVIEW_RUN_VIEW in self.get_workflow_views(job_name):
-                        url = self.get_workflow_url(PREVIEW_RUN_VIEW, job_name, object_id)
+                        url = self.get_workflow_url(PREVIEW_RUN_VIEW, job_name, object_id, job_run.run_id)
                     else:
-                        url = self.get_workflow_url(MAIN_RUN_VIEW, job_name, object_id)
+                        url = self.get_workflow_url(MAIN_RUN_VIEW, job_name, object_id, job_run.run_id)
                     return HttpResponseRedirect(url)
             context['form'] = form
             return TemplateResponse(
@@ -0,0 +1,243 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+import hashlib
+import os
+import time
+from uuid import uuid4
+
+from django.utils.encoding import force_bytes, force_text
+from django.utils.module_loading import import_string
+from django.utils.six.moves import cPickle as pickle
+
+from django_admin_rq import conf
+from django_admin_rq.backends import get_redis_connection, zadd
+
+_cache = None
+_MISSING = object()
+
+
+def get_artifact_cache():
+    """
+    Returns the artifact cache configured with ``DJANGO_ADMIN_RQ_ARTIFACT_CACHE``.
+    """
+    global _cache
+    if _cache is None:
+        _cache = import_string(conf.ARTIFACT_CACHE)()
+    return _cache
+
+
+class BaseArtifactCache(object):
+    """
+    Stores pickled intermediate results of jobs for ``DJANGO_ADMIN_RQ_ARTIFACT_TTL`` seconds.
+    Once the cache holds more than ``DJANGO_ADMIN_RQ_ARTIFACT_MAX_SIZE`` bytes the least recently used artifacts
+    are evicted.
+    """
+
+    def __init__(self, ttl=None, max_size=None):
+        self.ttl = ttl or conf.ARTIFACT_TTL
+        self.max_size = max_size or conf.ARTIFACT_MAX_SIZE
+
+    def get(self, key, default=None):
+        raise NotImplementedError
+
+    def set(self, key, value, ttl=None):
+        raise NotImplementedError
+
+    def delete(self, key):
+        raise NotImplementedError
+
+    def dumps(self, value):
+        return pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+
+
+class FileArtifactCache(BaseArtifactCache):
+    """
+    Keeps artifacts in files in ``DJANGO_ADMIN_RQ_ARTIFACT_DIR``.
+    Only preview and main jobs running on the same host share them.
+    """
+
+    def __init__(self, directory=None, **kwargs):
+        super(FileArtifactCache, self).__init__(**kwargs)
+        self.directory = directory or conf.ARTIFACT_DIR
+
+    def path(self, key):
+        return os.path.join(self.directory, '{}.artifact'.format(hashlib.sha1(force_bytes(key)).hexdigest()))
+
+    def get(self, key, default=None):
+        path = self.path(key)
+        try:
+            with open(path, 'rb') as f:
+                if pickle.load(f) < time.time():
+                    value = _MISSING
+                else:
+                    value = pickle.load(f)
+        except (IOError, OSError, EOFError, pickle.UnpicklingError):
+            return default
+        if value is _MISSING:
+            self._remove(path)
+            return default
+        # The modification time orders the artifacts for eviction
+        os.utime(path, None)
+        return value
+
+    def set(self, key, value, ttl=None):
+        data = self.dumps(value)
+        if len(data) > self.max_size:
+            return
+        if not os.path.isdir(self.directory):
+            os.makedirs(self.directory)
+        path = self.path(key)
+        # Written to a temporary file first so readers never see a partial artifact
+        tmp_path = '{}.{}.tmp'.format(path, uuid4().hex)
+        with open(tmp_path, 'wb') as f:
+            pickle.dump(time.time() + (ttl or self.ttl), f, protocol=pickle.HIGHEST_PROTOCOL)
+            f.write(data)
+        os.rename(tmp_path, path)
+        self.evict()
+
+    def delete(self, key):
+        self._remove(self.path(key))
+
+    def evict(self):
+        """
+        Deletes the least recently used artifacts until the cache fits in max_size.
+        """
+        entries, total_size = [], 0
+        for name in os.listdir(self.directory):
+            if not name.endswith('.artifact'):
+                continue
+            path = os.path.join(self.directory, name)
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+            total_size += stat.st_size
+        for mtime, size, path in sorted(entries):
+            if total_size <= self.max_size:
+                break
+            self._remove(path)
+            total_size -= size
+
+    def _remove(self, path):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+
+class RedisArtifactCache(BaseArtifactCache):
+    """
+    Keeps artifacts in redis so all workers share them.
+    The size of every artifact is tracked in a hash and their total in a counter, their last use in a sorted set.
+    """
+    key_prefix = 'django_admin_rq:artifact:'
+    sizes_key = 'django_admin_rq:artifact-sizes'
+    used_key = 'django_admin_rq:artifact-used'
+    total_size_key = 'django_admin_rq:artifact-total-size'
+    # Number of least recently used artifacts evict() looks at per redis round trip
+    evict_batch_size = 100
+
+    def get(self, key, default=None):
+        connection = get_redis_connection()
+        data = connection.get(self.key_prefix + key)
+        if data is None:
+            return default
+        zadd(connection, self.used_key, {key: time.time()})
+        return pickle.loads(data)
+
+    def set(self, key, value, ttl=None):
+        data = self.dumps(value)
+        if len(data) > self.max_size:
+            return
+        connection = get_redis_connection()
+        previous_size = int(connection.hget(self.sizes_key, key) or 0)
+        pipe = connection.pipeline()
+        pipe.set(self.key_prefix + key, data, ex=int(ttl or self.ttl))
+        pipe.hset(self.sizes_key, key, len(data))
+        zadd(pipe, self.used_key, {key: time.time()})
+        pipe.incrby(self.total_size_key, len(data) - previous_size)
+        pipe.execute()
+        self.evict()
+
+    def delete(self, key):
+        self._delete(key)
+
+    def _delete(self, key):
+        """
+        Deletes the artifact and returns its size, 0 if it was deleted concurrently.
+        """
+        connection = get_redis_connection()
+        size = int(connection.hget(self.sizes_key, key) or 0)
+        pipe = connection.pipeline()
+        pipe.delete(self.key_prefix + key)
+        pipe.hdel(self.sizes_key, key)
+        pipe.zrem(self.used_key, key)
+        if not pipe.execute()[1]:
+            return 0
+        connection.incrby(self.total_size_key, -size)
+        return size
+
+    def evict(self):
+        """
+        Deletes the least recently used artifacts until their total size fits in max_size, expired artifacts on the
+        way are forgotten.  Costs a single redis call while the cache fits.
+        """
+        connection = get_redis_connection()
+        while True:
+            total_size = int(connection.get(self.total_size_key) or 0)
+            if total_size <= self.max_size:
+                return
+            keys = [
+                force_text(key) for key in
+                connection.zrangebyscore(self.used_key, '-inf', '+inf', start=0, num=self.evict_batch_size)
+            ]
+            if not keys:
+                connection.set(self.total_size_key, 0)  # Only counted artifacts that were deleted meanwhile
+                return
+            pipe = connection.pipeline()
+            for key in keys:
+                pipe.exists(self.key_prefix + key)
+            for key, exists in zip(keys, pipe.execute()):
+                if exists and total_size <= self.max_size:
+                    break
+                total_size -= self._delete(key)
+
+
+class Artifacts(object):
+    """
+    The artifacts of one job run, see :attr:`~django_admin_rq.models.JobStatus.artifacts`.
+    Runs with the same namespace, e.g. a preview and the following main run, share their artifacts.
+    Without a namespace nothing is cached.
+    """
+
+    def __init__(self, namespace, cache=None):
+        self.namespace = namespace
+        self.cache = cache
+
+    def key(self, name):
+        return '{}:{}'.format(self.namespace, name)
+
+    def get(self, name, default=None):
+        if not self.namespace:
+            return default
+        return (self.cache or get_artifact_cache()).get(self.key(name), default)
+
+    def set(self, name, value, ttl=None):
+        if self.namespace:
+            (self.cache or get_artifact_cache()).set(self.key(name), value, ttl)
+
+    def delete(self, name):
+        if self.namespace:
+            (self.cache or get_artifact_cache()).delete(self.key(name))
+
+    def get_or_set(self, name, compute, ttl=None):
+        """
+        Returns the artifact name, calls compute() and stores its return value if there is none.
+        """
+        value = self.get(name, _MISSING)
+        if value is _MISSING:
+            value = compute()
+            self.set(name, value, ttl)
+        return value
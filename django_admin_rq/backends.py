@@ -0,0 +1,206 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+import json
+
+import redis
+from django.utils.encoding import force_text
+from django.utils.module_loading import import_string
+
+from django_admin_rq import conf
+
+_backend = None
+
+
+def get_status_backend():
+    """
+    Returns the status backend configured with ``DJANGO_ADMIN_RQ_STATUS_BACKEND``.
+    """
+    global _backend
+    if _backend is None:
+        _backend = import_string(conf.STATUS_BACKEND)()
+    return _backend
+
+
+def get_redis_connection():
+    """
+    Returns the redis connection of the queue configured with ``DJANGO_ADMIN_RQ_REDIS_QUEUE``.
+    """
+    import django_rq
+    return django_rq.get_connection(conf.REDIS_QUEUE)
+
+
+def zadd(connection, name, mapping):
+    """
+    Adds the members of mapping to the sorted set name with their scores.  connection may be a pipeline.
+    redis-py 3 takes the mapping, older versions keyword arguments.
+    """
+    if redis.VERSION >= (3,):
+        return connection.zadd(name, mapping)
+    return connection.zadd(name, **mapping)
+
+
+def get_status_channel(job_uuid):
+    """
+    Returns the redis pub/sub channel status updates of the given job are published on.
+    """
+    return 'django_admin_rq:status-updates:{}'.format(job_uuid)
+
+
+class BaseStatusBackend(object):
+    """
+    Stores the frequently changing fields (status and progress) of :class:`~django_admin_rq.models.JobStatus`.
+    """
+
+    def set_progress(self, job_status):
+        """
+        Called on every progress update.
+        """
+        raise NotImplementedError
+
+    def set_status(self, job_status):
+        """
+        Called on state transitions (start, finish, fail).  The job status row must be persisted here.
+        """
+        raise NotImplementedError
+
+    def set_status_many(self, job_statuses):
+        """
+        Called with the job statuses of a transition that applies to many jobs at once, e.g. cancelling the chunk
+        jobs of a fanned out job.
+        """
+        for job_status in job_statuses:
+            self.set_status(job_status)
+
+    def get(self, job_uuid):
+        """
+        Returns a dict with the keys status and progress or None if the backend doesn't know the job.
+        """
+        return None
+
+    def get_many(self, job_uuids):
+        """
+        Returns a dict mapping job_uuid to the dict :func:`get` returns for all jobs the backend knows.
+        """
+        return {}
+
+    def publish(self, job_status):
+        """
+        Publishes status and progress to the job's channel so waiting status requests return immediately.
+        """
+        if conf.PUBLISH_STATUS:
+            get_redis_connection().publish(
+                get_status_channel(job_status.job_uuid),
+                json.dumps({'status': job_status.status, 'progress': job_status.progress})
+            )
+
+    def publish_many(self, job_statuses):
+        """
+        Publishes the updates of several jobs in one redis pipeline.
+        """
+        if conf.PUBLISH_STATUS:
+            pipe = get_redis_connection().pipeline(transaction=False)
+            for job_status in job_statuses:
+                pipe.publish(
+                    get_status_channel(job_status.job_uuid),
+                    json.dumps({'status': job_status.status, 'progress': job_status.progress})
+                )
+            pipe.execute()
+
+    def _save_status_many(self, job_statuses):
+        """
+        Writes the status and finished_on of the job status rows with one query per distinct pair of values.
+        """
+        from django_admin_rq.models import JobStatus
+
+        groups = {}
+        for job_status in job_statuses:
+            groups.setdefault((job_status.status, job_status.finished_on), []).append(job_status.pk)
+        for (status, finished_on), pks in groups.items():
+            JobStatus.objects.filter(pk__in=pks).update(status=status, finished_on=finished_on)
+
+
+class DatabaseStatusBackend(BaseStatusBackend):
+    """
+    Writes every update straight to the database.
+    """
+
+    def set_progress(self, job_status):
+        job_status._save_fields('progress', 'items_processed')
+        self.publish(job_status)
+
+    def set_status(self, job_status):
+        job_status._save_fields(*job_status.transition_fields)
+        self.publish(job_status)
+
+    def set_status_many(self, job_statuses):
+        self._save_status_many(job_statuses)
+        self.publish_many(job_statuses)
+
+
+class RedisStatusBackend(BaseStatusBackend):
+    """
+    Keeps status and progress in redis and only writes the database row on state transitions.
+    """
+    key_prefix = 'django_admin_rq:status:'
+
+    def __init__(self, connection=None):
+        self.connection = connection or get_redis_connection()
+
+    def get_key(self, job_uuid):
+        return '{}{}'.format(self.key_prefix, job_uuid)
+
+    def _store(self, job_status, transition=True, pipe=None):
+        key = self.get_key(job_status.job_uuid)
+        execute = pipe is None
+        if execute:
+            pipe = self.connection.pipeline()
+        if transition:
+            pipe.hmset(key, {'status': job_status.status, 'progress': job_status.progress})
+        else:
+            # A progress update never overwrites the status of a concurrent transition
+            pipe.hset(key, 'progress', job_status.progress)
+            pipe.hsetnx(key, 'status', job_status.status)
+        pipe.expire(key, conf.STATUS_TTL)
+        if execute:
+            pipe.execute()
+
+    def set_progress(self, job_status):
+        self._store(job_status, transition=False)
+        self.publish(job_status)
+
+    def set_status(self, job_status):
+        job_status._save_fields(*job_status.transition_fields)
+        self._store(job_status)
+        self.publish(job_status)
+
+    def set_status_many(self, job_statuses):
+        self._save_status_many(job_statuses)
+        pipe = self.connection.pipeline()
+        for job_status in job_statuses:
+            self._store(job_status, pipe=pipe)
+        pipe.execute()
+        self.publish_many(job_statuses)
+
+    def _parse(self, data):
+        if not data:
+            return None
+        data = dict((force_text(key), force_text(value)) for key, value in data.items())
+        return {
+            'status': data.get('status'),
+            'progress': int(data.get('progress', 0)),
+        }
+
+    def get(self, job_uuid):
+        return self._parse(self.connection.hgetall(self.get_key(job_uuid)))
+
+    def get_many(self, job_uuids):
+        pipe = self.connection.pipeline()
+        for job_uuid in job_uuids:
+            pipe.hgetall(self.get_key(job_uuid))
+        states = {}
+        for job_uuid, data in zip(job_uuids, pipe.execute()):
+            state = self._parse(data)
+            if state is not None:
+                states[job_uuid] = state
+        return states
@@ -0,0 +1,131 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+import os
+import tempfile
+
+from django.conf import settings
+
+# Dotted path to the class that stores the frequently changing fields of JobStatus
+STATUS_BACKEND = getattr(
+    settings, 'DJANGO_ADMIN_RQ_STATUS_BACKEND', 'django_admin_rq.backends.DatabaseStatusBackend'
+)
+
+# Name of the RQ_QUEUES entry whose redis connection django-admin-rq uses for its own keys
+REDIS_QUEUE = getattr(settings, 'DJANGO_ADMIN_RQ_REDIS_QUEUE', 'default')
+
+# Seconds a job's status is kept in redis after its last update
+STATUS_TTL = getattr(settings, 'DJANGO_ADMIN_RQ_STATUS_TTL', 60 * 60 * 24)
+
+# A coalesced progress update is written once it moved at least this many percent...
+PROGRESS_MIN_DELTA = getattr(settings, 'DJANGO_ADMIN_RQ_PROGRESS_MIN_DELTA', 5)
+
+# ...or once this many seconds passed since the last write
+PROGRESS_MIN_INTERVAL = getattr(settings, 'DJANGO_ADMIN_RQ_PROGRESS_MIN_INTERVAL', 1.0)
+
+# Seconds between reductions of a fanned out job's progress from its children's progress
+FAN_OUT_REDUCE_INTERVAL = getattr(settings, 'DJANGO_ADMIN_RQ_FAN_OUT_REDUCE_INTERVAL', 1.0)
+
+# Publish status and progress updates on a redis channel per job for the long polling status view
+PUBLISH_STATUS = getattr(settings, 'DJANGO_ADMIN_RQ_PUBLISH_STATUS', True)
+
+# Let the run page long poll the status instead of polling it.  Every waiting tab holds a web worker for up to
+# LONG_POLL_TIMEOUT seconds, only enable it with an async or threaded worker class
+LONG_POLLING = getattr(settings, 'DJANGO_ADMIN_RQ_LONG_POLLING', False)
+
+# Maximum seconds the long polling status view waits for a change before it answers
+LONG_POLL_TIMEOUT = getattr(settings, 'DJANGO_ADMIN_RQ_LONG_POLL_TIMEOUT', 25)
+
+# Maximum number of jobs the batch status view answers in one request
+BATCH_STATUS_LIMIT = getattr(settings, 'DJANGO_ADMIN_RQ_BATCH_STATUS_LIMIT', 100)
+
+# Finished and failed job statuses older than this many seconds are deleted by prune_job_statuses
+PRUNE_MAX_AGE = getattr(settings, 'DJANGO_ADMIN_RQ_PRUNE_MAX_AGE', 60 * 60 * 24 * 30)
+
+# Number of job statuses deleted per query when pruning
+PRUNE_BATCH_SIZE = getattr(settings, 'DJANGO_ADMIN_RQ_PRUNE_BATCH_SIZE', 1000)
+
+# Number of characters the result view reads from the database per query
+RESULT_CHUNK_SIZE = getattr(settings, 'DJANGO_ADMIN_RQ_RESULT_CHUNK_SIZE', 64 * 1024)
+
+# Dotted path to the storage class uploaded job files are saved with, MEDIA_ROOT/django_admin_rq if None
+FILE_STORAGE = getattr(settings, 'DJANGO_ADMIN_RQ_FILE_STORAGE', None)
+
+# Directory partial chunked uploads are written to.  On the same filesystem as the file storage
+# completed uploads are moved into place instead of being copied
+UPLOAD_DIR = getattr(
+    settings, 'DJANGO_ADMIN_RQ_UPLOAD_DIR', os.path.join(settings.MEDIA_ROOT, 'django_admin_rq_uploads')
+)
+
+# Size in bytes of the chunks the browser sends to the chunked upload view
+UPLOAD_CHUNK_SIZE = getattr(settings, 'DJANGO_ADMIN_RQ_UPLOAD_CHUNK_SIZE', 8 * 1024 * 1024)
+
+# Maximum size in bytes of a chunked upload, None for no limit
+UPLOAD_MAX_SIZE = getattr(settings, 'DJANGO_ADMIN_RQ_UPLOAD_MAX_SIZE', 10 * 1024 * 1024 * 1024)
+
+# Store uploaded job files once per content hash
+DEDUPLICATE_FILES = getattr(settings, 'DJANGO_ADMIN_RQ_DEDUPLICATE_FILES', False)
+
+# Enqueue jobs with lightweight references instead of the pickled JobStatus and form data
+LAZY_PAYLOADS = getattr(settings, 'DJANGO_ADMIN_RQ_LAZY_PAYLOADS', False)
+
+# Maximum size in bytes of a pickled job payload, larger payloads fail at enqueue time.  None disables the check
+MAX_PAYLOAD_SIZE = getattr(settings, 'DJANGO_ADMIN_RQ_MAX_PAYLOAD_SIZE', None)
+
+# Attach to the queued or running job with the same job name, object and form data instead of enqueueing it again
+IDEMPOTENT_JOBS = getattr(settings, 'DJANGO_ADMIN_RQ_IDEMPOTENT_JOBS', True)
+
+# Seconds a job holds its idempotency key at most
+IDEMPOTENCY_TTL = getattr(settings, 'DJANGO_ADMIN_RQ_IDEMPOTENCY_TTL', 60 * 60 * 24)
+
+# Seconds after which the slot of a job under a concurrency limit expires unless the running job refreshes it,
+# which it does every third of this.  Slots of crashed jobs are freed after this
+CONCURRENCY_TIMEOUT = getattr(settings, 'DJANGO_ADMIN_RQ_CONCURRENCY_TIMEOUT', 10 * 60)
+
+# Dotted path of the cache preview and main jobs share intermediate results through
+ARTIFACT_CACHE = getattr(settings, 'DJANGO_ADMIN_RQ_ARTIFACT_CACHE', 'django_admin_rq.artifacts.FileArtifactCache')
+
+# Seconds artifacts are kept
+ARTIFACT_TTL = getattr(settings, 'DJANGO_ADMIN_RQ_ARTIFACT_TTL', 60 * 60)
+
+# Bytes the artifact cache holds at most before the least recently used artifacts are evicted
+ARTIFACT_MAX_SIZE = getattr(settings, 'DJANGO_ADMIN_RQ_ARTIFACT_MAX_SIZE', 512 * 1024 * 1024)
+
+# Directory of the FileArtifactCache
+ARTIFACT_DIR = getattr(
+    settings, 'DJANGO_ADMIN_RQ_ARTIFACT_DIR', os.path.join(tempfile.gettempdir(), 'django_admin_rq_artifacts')
+)
+
+# Seconds of finished and failed jobs the metrics view aggregates by default
+METRICS_MAX_AGE = getattr(settings, 'DJANGO_ADMIN_RQ_METRICS_MAX_AGE', 60 * 60 * 24)
+
+# Retry policies by job name, the keyword arguments of django_admin_rq.retry.RetryPolicy, e.g.
+# {'import': {'max_attempts': 5, 'backoff': 30}}.  Failed jobs of other job names are not retried
+RETRY_POLICIES = getattr(settings, 'DJANGO_ADMIN_RQ_RETRY_POLICIES', {})
+
+# Number of selected objects each chunk job of a changelist action processes by default
+JOB_ACTION_CHUNK_SIZE = getattr(settings, 'DJANGO_ADMIN_RQ_JOB_ACTION_CHUNK_SIZE', 100)
+
+# Number of characters of the traceback the exception handler stores as failure reason of a failed job
+FAILURE_REASON_MAX_LENGTH = getattr(settings, 'DJANGO_ADMIN_RQ_FAILURE_REASON_MAX_LENGTH', 10000)
+
+# Daily window of quiet hours heavy jobs can be scheduled in from the job form, a pair of 'HH:MM' start and end
+# times in the current time zone, e.g. ('22:00', '06:00').  None disables the option
+OFF_PEAK_WINDOW = getattr(settings, 'DJANGO_ADMIN_RQ_OFF_PEAK_WINDOW', None)
+
+# Seconds the run_job_scheduler command sleeps between looking for due jobs
+SCHEDULER_INTERVAL = getattr(settings, 'DJANGO_ADMIN_RQ_SCHEDULER_INTERVAL', 5.0)
+
+# Seconds a run of the run_job_scheduler command counts as a running scheduler, at least three of its intervals.
+# Must exceed the period of a cron job running it with --burst.  Without a running scheduler retries are enqueued
+# right away instead of after their backoff
+SCHEDULER_HEARTBEAT_TIMEOUT = getattr(settings, 'DJANGO_ADMIN_RQ_SCHEDULER_HEARTBEAT_TIMEOUT', 120)
+
+# Number of lines the log of a job keeps, older lines are dropped
+LOG_MAX_LENGTH = getattr(settings, 'DJANGO_ADMIN_RQ_LOG_MAX_LENGTH', 1000)
+
+# Seconds the log of a job is kept after its last line
+LOG_TTL = getattr(settings, 'DJANGO_ADMIN_RQ_LOG_TTL', 60 * 60 * 24)
+
+# Seconds the run page waits at most between requests for new log lines of a running job
+LOG_POLL_INTERVAL = getattr(settings, 'DJANGO_ADMIN_RQ_LOG_POLL_INTERVAL', 5)
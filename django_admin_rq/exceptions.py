@@ -1,21 +1,70 @@
 # -*- coding: utf-8 -*-
 from __future__ import unicode_literals
 
+import logging
 import traceback
 
+from django.db import close_old_connections
 from django_rq import get_failed_queue
 
-from django_admin_rq.models import JobStatus, STATUS_FAILED
+from django_admin_rq import conf
+from django_admin_rq.models import ACTIVE_STATUSES, JobStatus, LARGE_FIELDS
+from django_admin_rq.retry import get_retry_policy, retry_job
+
+logger = logging.getLogger(__name__)
+
+
+class JobPayloadTooLarge(Exception):
+    """
+    Raised when a job's pickled payload exceeds ``DJANGO_ADMIN_RQ_MAX_PAYLOAD_SIZE``.
+    """
+
+    def __init__(self, size, max_size):
+        self.size = size
+        self.max_size = max_size
+        super(JobPayloadTooLarge, self).__init__(
+            'The job payload of {} bytes exceeds the limit of {} bytes.'.format(size, max_size)
+        )
+
+
+class JobCancelled(Exception):
+    """
+    Raised in a job whose job status was cancelled, see :meth:`~django_admin_rq.models.JobStatus.check_cancelled`.
+    """
+
+    def __init__(self, job_uuid):
+        self.job_uuid = job_uuid
+        super(JobCancelled, self).__init__('Job {} was cancelled.'.format(job_uuid))
 
 
 def exception_handler(job, *exc_info):
+    """
+    rq exception handler that retries the job under the retry policy of its job name, see
+    :mod:`django_admin_rq.retry`, or fails its job status and moves the job to the failed queue.
+    """
+    if isinstance(exc_info[1], JobCancelled):
+        # The job stopped because it was cancelled, its job status already is CANCELLED
+        return
+    # A lost database connection would fail the queries below as well
+    close_old_connections()
+    exc_string = ''.join(traceback.format_exception(*exc_info))
     try:
-        job_status = JobStatus.objects.get(job_id=job.get_id())
-        job_status.status = STATUS_FAILED
-        job_status.save(update_fields=['status'])
-    except:
-        pass
+        job_status = JobStatus.objects.defer(*LARGE_FIELDS).filter(job_id=job.get_id()).first()
+        if job_status is not None and job_status.status in ACTIVE_STATUSES:
+            policy = get_retry_policy(job_status.job_name)
+            if policy is not None and policy.should_retry(exc_info[1], job_status.attempts):
+                delay = policy.get_delay(job_status.attempts)
+                logger.warning('Job %s %s failed in attempt %d of %d, retrying in %s seconds',
+                               job_status.job_name, job_status, job_status.attempts, policy.max_attempts, delay)
+                retry_job(job, job_status, delay)
+                return False
+            # Keeps a failure reason the job set itself and the end of the traceback with the exception
+            JobStatus.objects.filter(pk=job_status.pk, failure_reason='').update(
+                failure_reason=exc_string[-conf.FAILURE_REASON_MAX_LENGTH:]
+            )
+            job_status.fail()
+    except Exception:
+        logger.exception('Failed to handle the failure of job %s', job.get_id())
 
     fq = get_failed_queue()
-    exc_string = ''.join(traceback.format_exception(*exc_info))
     fq.quarantine(job, exc_info=exc_string)
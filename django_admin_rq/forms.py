@@ -0,0 +1,97 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django import forms
+from django.contrib.admin.widgets import AdminSplitDateTime
+from django.core.exceptions import ValidationError
+from django.core.urlresolvers import reverse
+from django.utils import timezone
+from django.utils.html import format_html
+from django.utils.translation import ugettext_lazy as _
+
+from django_admin_rq import conf
+from django_admin_rq.scheduler import get_next_window_start, parse_time
+from django_admin_rq.uploads import ChunkedUpload
+
+SCHEDULE_NOW = 'now'
+SCHEDULE_AT = 'at'
+SCHEDULE_OFF_PEAK = 'off_peak'
+
+
+class ChunkedFileInput(forms.Widget):
+    """
+    Uploads the selected file in resumable chunks to the ``admin-rq-upload`` view while the form is being filled in.
+    Only the id of the completed upload is submitted with the form.
+    """
+
+    class Media:
+        js = ('django_admin_rq/js/django_admin_rq_upload.js',)
+
+    def render(self, name, value, attrs=None, renderer=None):
+        return format_html(
+            '<span class="admin-rq-chunked-upload" data-upload-url="{}" data-chunk-size="{}">'
+            '<input type="file"> <progress max="100" value="0"></progress>{}</span>',
+            reverse('admin-rq-upload'),
+            conf.UPLOAD_CHUNK_SIZE,
+            forms.HiddenInput().render(name, value, dict(self.attrs, **(attrs or {})))
+        )
+
+
+class ChunkedFileField(forms.CharField):
+    """
+    A file field for very large files.  Cleans to an :class:`~django.core.files.uploadedfile.UploadedFile`
+    which :func:`~django_admin_rq.admin.JobAdminMixin.serialize_form` moves into the job file storage.
+    """
+    widget = ChunkedFileInput
+    default_error_messages = {
+        'incomplete': _('The file has not been uploaded completely.'),
+    }
+
+    def to_python(self, value):
+        value = super(ChunkedFileField, self).to_python(value)
+        if value in self.empty_values:
+            return None
+        upload = ChunkedUpload.load(value)
+        if upload is None or not upload.is_complete():
+            raise ValidationError(self.error_messages['incomplete'], code='incomplete')
+        return upload.as_uploaded_file()
+
+
+class JobScheduleForm(forms.Form):
+    """
+    Lets the user start the main run of a job right away, at a given time or in the next off-peak window.
+    """
+    schedule = forms.ChoiceField(label=_('Run'), widget=forms.RadioSelect, initial=SCHEDULE_NOW, required=False)
+    run_at = forms.SplitDateTimeField(label=_('Run at'), required=False, widget=AdminSplitDateTime)
+
+    def __init__(self, *args, **kwargs):
+        self.off_peak_window = kwargs.pop('off_peak_window', None)
+        super(JobScheduleForm, self).__init__(*args, **kwargs)
+        choices = [(SCHEDULE_NOW, _('Now')), (SCHEDULE_AT, _('At the given time'))]
+        if self.off_peak_window:
+            choices.append((SCHEDULE_OFF_PEAK, _('In the next off-peak window ({} - {})').format(
+                *[parse_time(value).strftime('%H:%M') for value in self.off_peak_window]
+            )))
+        self.fields['schedule'].choices = choices
+
+    def clean(self):
+        cleaned_data = super(JobScheduleForm, self).clean()
+        if cleaned_data.get('schedule') == SCHEDULE_AT and 'run_at' not in self.errors:
+            if cleaned_data.get('run_at') is None:
+                self.add_error('run_at', self.fields['run_at'].error_messages['required'])
+            elif cleaned_data['run_at'] <= timezone.now():
+                self.add_error('run_at', _('Enter a time in the future.'))
+        return cleaned_data
+
+    def get_run_at(self):
+        """
+        Returns the datetime the main run is scheduled for or None to run it right away.
+        """
+        schedule = self.cleaned_data['schedule']
+        if schedule == SCHEDULE_AT:
+            return self.cleaned_data['run_at']
+        if schedule == SCHEDULE_OFF_PEAK:
+            now = timezone.now()
+            run_at = get_next_window_start(self.off_peak_window, now)
+            return run_at if run_at > now else None
+        return None
@@ -0,0 +1,177 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+import threading
+
+import django_rq
+from django.utils import six
+from django.utils.encoding import force_text
+from rq import get_current_job
+from rq.decorators import job as job_decorator
+from rq.exceptions import NoSuchJobError
+from rq.utils import parse_timeout
+
+from django_admin_rq import conf
+from django_admin_rq.backends import get_redis_connection
+from django_admin_rq.locks import (
+    SEMAPHORE_LIMITS_KEY, acquire_semaphore, add_semaphore_waiter, pop_semaphore_waiters, refresh_semaphore,
+    release_semaphore
+)
+from django_admin_rq.models import ACTIVE_STATUSES, JobStatus, LARGE_FIELDS
+
+
+def get_job_decorator(job_callable):
+    """
+    Returns the rq ``@job`` decorator job_callable was decorated with or None.
+    """
+    delay = getattr(job_callable, 'delay', None)
+    for cell in getattr(delay, '__closure__', None) or ():
+        if isinstance(cell.cell_contents, job_decorator):
+            return cell.cell_contents
+    return None
+
+
+def get_job_callable_queue(job_callable):
+    """
+    Returns the queue of job_callable's ``@job`` decorator, the 'default' queue if it has none.
+    """
+    decorator = get_job_decorator(job_callable)
+    if decorator is None:
+        return django_rq.get_queue('default')
+    if isinstance(decorator.queue, six.string_types):
+        return django_rq.get_queue(decorator.queue)
+    return decorator.queue
+
+
+def create_job(queue, job_callable, args, job_id=None, decorated_callable=None, kwargs=None, options=None):
+    """
+    Returns a new rq job job_callable(*args, **kwargs) for queue that isn't saved yet, its pickled payload is
+    ``job.data``.  The timeout, result_ttl, ttl, description and meta options of the ``@job`` decorator of
+    decorated_callable, by default job_callable, apply unless options, a dict of them, overrides them.
+    """
+    decorator = get_job_decorator(decorated_callable or job_callable)
+    job_options = {}
+    if decorator is not None:
+        job_options.update(
+            timeout=parse_timeout(decorator.timeout), result_ttl=parse_timeout(decorator.result_ttl),
+            ttl=parse_timeout(decorator.ttl), description=decorator.description, meta=decorator.meta
+        )
+    job_options.update(options or {})
+    job_options['timeout'] = job_options.get('timeout') or queue._default_timeout
+    return queue.job_class.create(
+        job_callable, args=args, kwargs=kwargs, connection=queue.connection, id=job_id, origin=queue.name,
+        **job_options
+    )
+
+
+class SemaphoreRefresher(threading.Thread):
+    """
+    Extends the expiry of the semaphore slots a job holds while it runs, so only the slots of crashed jobs expire.
+    """
+
+    def __init__(self, names, token, interval=None):
+        super(SemaphoreRefresher, self).__init__()
+        self.daemon = True
+        self.names = names
+        self.token = token
+        self.interval = interval or conf.CONCURRENCY_TIMEOUT / 3.0
+        self.stopped = threading.Event()
+
+    def run(self):
+        while not self.stopped.wait(self.interval):
+            for name in self.names:
+                refresh_semaphore(name, self.token)
+
+    def stop(self):
+        self.stopped.set()
+
+
+def run_with_concurrency_limits(job_callable, job_uuid, semaphores, *args):
+    """
+    Runs job_callable(*args) once the job with job_uuid holds a slot of each semaphore, a list of (name, limit) pairs.
+    While any limit is reached the job status is marked waiting and the job is parked in redis without holding a
+    worker, releasing a slot enqueues the longest waiting job again.
+    """
+    acquired = []
+    for name, limit in semaphores:
+        if not acquire_semaphore(name, limit, job_uuid):
+            break
+        acquired.append(name)
+    else:
+        refresher = SemaphoreRefresher(acquired, job_uuid)
+        refresher.start()
+        try:
+            return job_callable(*args)
+        finally:
+            refresher.stop()
+            release_semaphores(semaphores, job_uuid)
+    release_semaphores([semaphore for semaphore in semaphores if semaphore[0] in acquired], job_uuid)
+
+    job_status = JobStatus.objects.defer(*LARGE_FIELDS).filter(job_uuid=job_uuid).first()
+    if job_status is None or job_status.status not in ACTIVE_STATUSES:
+        return None  # The job status was deleted or cancelled in the meantime
+    if job_status.is_queued():
+        job_status.wait()
+    current_job = get_current_job()
+    queue = django_rq.get_queue(current_job.origin)
+    job = queue.job_class.create(
+        run_with_concurrency_limits, args=(job_callable, job_uuid, semaphores) + tuple(args),
+        connection=queue.connection, timeout=current_job.timeout, result_ttl=current_job.result_ttl,
+        ttl=current_job.ttl, description=current_job.description, origin=queue.name
+    )
+    job.save()
+    # The exception handler and cancelling find the job status by the id of the job that runs it
+    job_status.set_job_id(job.get_id())
+    name, limit = semaphores[len(acquired)]
+    add_semaphore_waiter(name, limit, '{}:{}'.format(job.get_id(), queue.name))
+    # A slot may have been released before the job was parked
+    wake_waiting_jobs([(name, limit)])
+    return None
+
+
+def release_semaphores(semaphores, token):
+    """
+    Releases token's slots of the semaphores, a list of (name, limit) pairs, and enqueues the jobs waiting for them.
+    """
+    for name, limit in semaphores:
+        release_semaphore(name, token)
+    wake_waiting_jobs(semaphores)
+
+
+def wake_waiting_jobs(semaphores=None):
+    """
+    Enqueues the jobs parked by :func:`run_with_concurrency_limits` that the semaphores, a list of (name, limit)
+    pairs, have free slots for, by default of all semaphores.  Returns the number of enqueued jobs.
+    """
+    if semaphores is None:
+        semaphores = [
+            (force_text(name), int(limit)) for name, limit in
+            get_redis_connection().hgetall(SEMAPHORE_LIMITS_KEY).items()
+        ]
+    woken = 0
+    for name, limit in semaphores:
+        for waiter in pop_semaphore_waiters(name, limit):
+            job_id, queue_name = waiter.split(':', 1)
+            queue = django_rq.get_queue(queue_name)
+            try:
+                queue.enqueue_job(queue.job_class.fetch(job_id, connection=queue.connection))
+            except NoSuchJobError:
+                continue  # Deleted in the meantime
+            woken += 1
+    return woken
+
+
+def enqueue_many(queue, job_callable, args_list, job_ids=None):
+    """
+    Enqueues job_callable(*args) for every args in args_list on queue in a single redis pipeline.
+    job_ids optionally are the ids of the rq jobs.  The options of the callable's ``@job`` decorator apply, see
+    :func:`create_job`.  Returns the rq jobs.
+    """
+    job_ids = job_ids or [None] * len(args_list)
+    pipe = queue.connection.pipeline()
+    jobs = []
+    for args, job_id in zip(args_list, job_ids):
+        job = create_job(queue, job_callable, args, job_id=job_id)
+        jobs.append(queue.enqueue_job(job, pipeline=pipe))
+    pipe.execute()
+    return jobs
@@ -0,0 +1,159 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+import time
+
+from django.utils.encoding import force_text
+from redis import WatchError
+
+from django_admin_rq import conf
+from django_admin_rq.backends import get_redis_connection, zadd
+
+_IDEMPOTENCY_KEY_PREFIX = 'django_admin_rq:idempotency:'
+_LOCK_KEY_PREFIX = 'django_admin_rq:lock:'
+_SEMAPHORE_KEY_PREFIX = 'django_admin_rq:semaphore:'
+_SEMAPHORE_WAITERS_KEY_PREFIX = 'django_admin_rq:semaphore-waiters:'
+# Hash of the limits of the semaphores that had waiters, by semaphore name
+SEMAPHORE_LIMITS_KEY = 'django_admin_rq:semaphore-limits'
+
+
+def claim_idempotency_key(key, job_uuid, is_stale, ttl=None):
+    """
+    Claims the idempotency key for job_uuid unless another job holds it.
+    is_stale(holder) is called with the job_uuid currently holding the key and returns True if that job no longer
+    counts, e.g. because it finished, in which case the key is taken over.
+    Returns the job_uuid holding the key after the call, which is job_uuid if the key was claimed, or None if
+    concurrent claims kept changing the key and it could not be claimed.
+    """
+    connection = get_redis_connection()
+    redis_key = '{}{}'.format(_IDEMPOTENCY_KEY_PREFIX, key)
+    ttl = ttl or conf.IDEMPOTENCY_TTL
+    for attempt in range(3):
+        if connection.set(redis_key, job_uuid, ex=ttl, nx=True):
+            return job_uuid
+        with connection.pipeline() as pipe:
+            try:
+                pipe.watch(redis_key)
+                holder = pipe.get(redis_key)
+                if holder is None:
+                    continue  # Expired in the meantime
+                holder = force_text(holder)
+                if not is_stale(holder):
+                    return holder
+                pipe.multi()
+                pipe.set(redis_key, job_uuid, ex=ttl)
+                pipe.execute()
+                return job_uuid
+            except WatchError:
+                continue  # Another request claimed the key concurrently
+    return None
+
+
+def acquire_semaphore(name, limit, token, timeout=None):
+    """
+    Takes one of limit slots of the semaphore name for token.
+    Slots are kept in a sorted set scored by their expiry, slots that are not released expire after timeout seconds.
+    Returns True if token holds a slot.
+    """
+    connection = get_redis_connection()
+    redis_key = '{}{}'.format(_SEMAPHORE_KEY_PREFIX, name)
+    timeout = timeout or conf.CONCURRENCY_TIMEOUT
+    with connection.pipeline() as pipe:
+        for attempt in range(3):
+            try:
+                pipe.watch(redis_key)
+                now = time.time()
+                if pipe.zscore(redis_key, token) is None and pipe.zcount(redis_key, now, '+inf') >= limit:
+                    return False
+                pipe.multi()
+                pipe.zremrangebyscore(redis_key, '-inf', now)
+                zadd(pipe, redis_key, {token: now + timeout})
+                pipe.expire(redis_key, int(timeout))
+                pipe.execute()
+                return True
+            except WatchError:
+                continue  # Another job took or released a slot concurrently
+    return False
+
+
+def refresh_semaphore(name, token, timeout=None):
+    """
+    Extends the expiry of token's slot of the semaphore name to timeout seconds from now.
+    Returns False if token doesn't hold a slot (anymore).
+    """
+    connection = get_redis_connection()
+    redis_key = '{}{}'.format(_SEMAPHORE_KEY_PREFIX, name)
+    timeout = timeout or conf.CONCURRENCY_TIMEOUT
+    with connection.pipeline() as pipe:
+        try:
+            pipe.watch(redis_key)
+            if pipe.zscore(redis_key, token) is None:
+                return False
+            pipe.multi()
+            zadd(pipe, redis_key, {token: time.time() + timeout})
+            pipe.expire(redis_key, int(timeout))
+            pipe.execute()
+            return True
+        except WatchError:
+            return False  # Released concurrently
+
+
+def release_semaphore(name, token):
+    get_redis_connection().zrem('{}{}'.format(_SEMAPHORE_KEY_PREFIX, name), token)
+
+
+def add_semaphore_waiter(name, limit, waiter):
+    """
+    Appends waiter, a string, to the waiters for a slot of the semaphore name, see :func:`pop_semaphore_waiters`.
+    """
+    pipe = get_redis_connection().pipeline()
+    pipe.rpush('{}{}'.format(_SEMAPHORE_WAITERS_KEY_PREFIX, name), waiter)
+    pipe.hset(SEMAPHORE_LIMITS_KEY, name, limit)
+    pipe.execute()
+
+
+def pop_semaphore_waiters(name, limit):
+    """
+    Removes and returns the longest waiting waiters of the semaphore name, at most as many as it has free slots.
+    """
+    connection = get_redis_connection()
+    free = limit - connection.zcount('{}{}'.format(_SEMAPHORE_KEY_PREFIX, name), time.time(), '+inf')
+    waiters = []
+    while len(waiters) < free:
+        waiter = connection.lpop('{}{}'.format(_SEMAPHORE_WAITERS_KEY_PREFIX, name))
+        if waiter is None:
+            break
+        waiters.append(force_text(waiter))
+    return waiters
+
+
+def acquire_lock(name, token, timeout=10, wait=0):
+    """
+    Takes the lock name for token, waiting up to wait seconds while another token holds it.
+    A lock that is not released expires after timeout seconds.  Returns True if token holds the lock.
+    """
+    connection = get_redis_connection()
+    redis_key = '{}{}'.format(_LOCK_KEY_PREFIX, name)
+    deadline = time.time() + wait
+    while not connection.set(redis_key, token, ex=timeout, nx=True):
+        if time.time() >= deadline:
+            return False
+        time.sleep(0.01)
+    return True
+
+
+def release_lock(name, token):
+    """
+    Releases the lock name if token still holds it.
+    """
+    connection = get_redis_connection()
+    redis_key = '{}{}'.format(_LOCK_KEY_PREFIX, name)
+    with connection.pipeline() as pipe:
+        try:
+            pipe.watch(redis_key)
+            if force_text(pipe.get(redis_key) or '') == token:
+                pipe.multi()
+                pipe.delete(redis_key)
+                pipe.execute()
+        except WatchError:
+            pass  # The lock expired and was taken by another token
@@ -0,0 +1,56 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.utils.encoding import force_text
+from redis import WatchError
+
+from django_admin_rq import conf
+from django_admin_rq.backends import get_redis_connection
+
+_LOG_KEY_PREFIX = 'django_admin_rq:log:'
+_LOG_COUNT_KEY_PREFIX = 'django_admin_rq:log-count:'
+
+
+def append_log(job_uuid, lines, max_length=None):
+    """
+    Appends lines to the log of the job with one redis round trip.
+    The log is a list capped to the last max_length lines next to a counter of all lines ever appended, so every line
+    keeps its offset when older lines are dropped.  Returns the number of lines appended so far.
+    """
+    if not lines:
+        return None
+    key = '{}{}'.format(_LOG_KEY_PREFIX, job_uuid)
+    count_key = '{}{}'.format(_LOG_COUNT_KEY_PREFIX, job_uuid)
+    pipe = get_redis_connection().pipeline()
+    pipe.rpush(key, *lines)
+    pipe.ltrim(key, -(max_length or conf.LOG_MAX_LENGTH), -1)
+    pipe.incrby(count_key, len(lines))
+    pipe.expire(key, conf.LOG_TTL)
+    pipe.expire(count_key, conf.LOG_TTL)
+    return pipe.execute()[2]
+
+
+def read_log(job_uuid, offset=0):
+    """
+    Returns a tuple of the offset of the first returned line, the lines logged from offset on and the number of lines
+    appended so far.  The first offset is larger than offset if the lines in between were dropped from the log.
+    """
+    key = '{}{}'.format(_LOG_KEY_PREFIX, job_uuid)
+    count_key = '{}{}'.format(_LOG_COUNT_KEY_PREFIX, job_uuid)
+    with get_redis_connection().pipeline() as pipe:
+        for attempt in range(3):
+            try:
+                # Every append changes the counter, so the list does not shift between reading its length and range
+                pipe.watch(count_key)
+                total = int(pipe.get(count_key) or 0)
+                dropped = total - pipe.llen(key)
+                first = max(offset, dropped)
+                if first >= total:
+                    return total, [], total
+                pipe.multi()
+                pipe.lrange(key, first - dropped, -1)
+                lines = pipe.execute()[0]
+                return first, [force_text(line) for line in lines], total
+            except WatchError:
+                continue  # Lines were appended concurrently
+    return offset, [], offset
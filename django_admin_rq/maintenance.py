@@ -0,0 +1,71 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from datetime import timedelta
+
+from django.utils import timezone
+
+from django_admin_rq import conf
+from django_admin_rq.models import JobRun, JobStatus, STATUS_CANCELLED, STATUS_FAILED, STATUS_FINISHED
+from django_admin_rq.storage import (
+    delete_unreferenced_files, delete_unused_files, get_file_age, iter_job_files, release_files
+)
+from django_admin_rq.uploads import ChunkedUpload
+
+
+def prune_job_statuses(max_age=None, batch_size=None, statuses=(STATUS_FINISHED, STATUS_FAILED, STATUS_CANCELLED)):
+    """
+    Deletes job statuses with the given statuses that are older than max_age seconds in batches of batch_size
+    rows and releases the uploaded files they referenced.  Uploaded files that no job status referenced for max_age,
+    untracked files older than max_age in the package's directories of the storage, abandoned chunked uploads and
+    job runs not used for max_age are deleted as well.
+    Can be enqueued as an rq job, see :func:`schedule_pruning`.
+    Returns a tuple of the number of deleted job statuses and the number of deleted files.
+    """
+    max_age = conf.PRUNE_MAX_AGE if max_age is None else max_age
+    batch_size = batch_size or conf.PRUNE_BATCH_SIZE
+    cutoff = timezone.now() - timedelta(seconds=max_age)
+    queryset = JobStatus.objects.filter(status__in=statuses, created_on__lt=cutoff).order_by()
+
+    deleted_statuses = deleted_files = 0
+    while True:
+        batch = list(queryset.values_list('pk', 'input_files')[:batch_size])
+        if not batch:
+            break
+        file_names = []
+        for pk, input_files in batch:
+            file_names.extend(JobStatus(input_files=input_files).get_input_files())
+        JobStatus.objects.filter(pk__in=[pk for pk, input_files in batch]).delete()
+        deleted_statuses += len(batch)
+        release_files(file_names)
+
+    deleted_files += len(delete_unused_files(max_age))
+    for names in _get_files_older_than(max_age, batch_size):
+        deleted_files += len(delete_unreferenced_files(names))
+    ChunkedUpload.delete_stale(max_age)
+    JobRun.objects.filter(updated_on__lt=cutoff).delete()
+    return deleted_statuses, deleted_files
+
+
+def _get_files_older_than(max_age, batch_size):
+    """
+    Yields the job files older than max_age in lists of batch_size names.
+    """
+    batch = []
+    for name in iter_job_files():
+        if get_file_age(name) > max_age:
+            batch.append(name)
+            if len(batch) >= batch_size:
+                yield batch
+                batch = []
+    if batch:
+        yield batch
+
+
+def schedule_pruning(cron_string='0 3 * * *', queue_name='default'):
+    """
+    Schedules :func:`prune_job_statuses` as a periodic rq job.  Requires rq-scheduler.
+    """
+    import django_rq
+    scheduler = django_rq.get_scheduler(queue_name)
+    return scheduler.cron(cron_string, func=prune_job_statuses, queue_name=queue_name)
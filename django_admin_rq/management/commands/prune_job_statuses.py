@@ -0,0 +1,28 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.core.management.base import BaseCommand
+
+from django_admin_rq import conf
+from django_admin_rq.maintenance import prune_job_statuses
+
+
+class Command(BaseCommand):
+    help = 'Deletes finished, failed and cancelled job statuses and their uploaded files.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--days', type=float, default=conf.PRUNE_MAX_AGE / 86400.0,
+            help='Delete job statuses older than this many days.'
+        )
+        parser.add_argument(
+            '--batch-size', type=int, default=conf.PRUNE_BATCH_SIZE,
+            help='Number of job statuses deleted per query.'
+        )
+
+    def handle(self, *args, **options):
+        deleted_statuses, deleted_files = prune_job_statuses(
+            max_age=options['days'] * 86400,
+            batch_size=options['batch_size'],
+        )
+        self.stdout.write('Deleted {} job statuses and {} files.'.format(deleted_statuses, deleted_files))
@@ -0,0 +1,40 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+import time
+
+from django.core.management.base import BaseCommand
+
+from django_admin_rq import conf
+from django_admin_rq.jobs import wake_waiting_jobs
+from django_admin_rq.scheduler import enqueue_due_jobs, record_scheduler_heartbeat
+
+
+class Command(BaseCommand):
+    help = (
+        'Enqueues scheduled jobs and retries once they are due, and jobs waiting for concurrency limit slots that '
+        'expired.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--interval', type=float, default=conf.SCHEDULER_INTERVAL,
+            help='Seconds to sleep between looking for due jobs.'
+        )
+        parser.add_argument(
+            '--burst', action='store_true', default=False,
+            help='Enqueue the jobs that are due and quit.'
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            record_scheduler_heartbeat(options['interval'])
+            enqueued = enqueue_due_jobs()
+            if enqueued:
+                self.stdout.write('Enqueued {} scheduled jobs.'.format(enqueued))
+            woken = wake_waiting_jobs()
+            if woken:
+                self.stdout.write('Enqueued {} waiting jobs.'.format(woken))
+            if options['burst']:
+                break
+            time.sleep(options['interval'])
@@ -0,0 +1,72 @@
+# -*- coding: utf-8 -*-
+from __future__ import division, unicode_literals
+
+from collections import OrderedDict
+from datetime import timedelta
+
+from django.utils import timezone
+
+from django_admin_rq import conf
+from django_admin_rq.models import JobStatus, STATUS_FAILED, STATUS_FINISHED
+
+
+def percentile(values, fraction):
+    """
+    Returns the given percentile, e.g. 0.95, of the sorted list values or None if values is empty.
+    """
+    if not values:
+        return None
+    return values[min(len(values) - 1, int(len(values) * fraction))]
+
+
+def get_job_metrics(max_age=None, job_names=None):
+    """
+    Returns per job name the p50 and p95 of queue wait and run duration in seconds and the median rate in items per
+    second of the jobs that finished or failed in the last max_age seconds.
+    Chunk jobs created by :meth:`~django_admin_rq.models.JobStatus.fan_out` are counted separately from their
+    parents under the job name ``<job_name>:chunk``.
+    """
+    max_age = conf.METRICS_MAX_AGE if max_age is None else max_age
+    queryset = JobStatus.objects.filter(
+        finished_on__gte=timezone.now() - timedelta(seconds=max_age),
+        status__in=(STATUS_FINISHED, STATUS_FAILED),
+    ).order_by()
+    if job_names:
+        queryset = queryset.filter(job_name__in=job_names)
+
+    samples = OrderedDict()
+    rows = queryset.values_list(
+        'job_name', 'parent_id', 'status', 'created_on', 'scheduled_for', 'started_on', 'finished_on', 'items_processed'
+    )
+    for (job_name, parent_id, status, created_on, scheduled_for, started_on, finished_on,
+         items_processed) in rows.iterator():
+        if parent_id is not None:
+            job_name = '{}:chunk'.format(job_name)
+        sample = samples.setdefault(job_name, {'count': 0, 'failed': 0, 'queue_wait': [], 'run_duration': [],
+                                               'items_per_second': []})
+        sample['count'] += 1
+        if status == STATUS_FAILED:
+            sample['failed'] += 1
+        if started_on is None:
+            continue
+        duration = (finished_on - started_on).total_seconds()
+        sample['queue_wait'].append((started_on - (scheduled_for or created_on)).total_seconds())
+        sample['run_duration'].append(duration)
+        if items_processed and duration > 0:
+            sample['items_per_second'].append(items_processed / duration)
+
+    metrics = []
+    for job_name, sample in sorted(samples.items()):
+        for key in ('queue_wait', 'run_duration', 'items_per_second'):
+            sample[key].sort()
+        metrics.append(OrderedDict([
+            ('job_name', job_name),
+            ('count', sample['count']),
+            ('failed', sample['failed']),
+            ('queue_wait_p50', percentile(sample['queue_wait'], 0.5)),
+            ('queue_wait_p95', percentile(sample['queue_wait'], 0.95)),
+            ('run_duration_p50', percentile(sample['run_duration'], 0.5)),
+            ('run_duration_p95', percentile(sample['run_duration'], 0.95)),
+            ('items_per_second_p50', percentile(sample['items_per_second'], 0.5)),
+        ]))
+    return metrics
@@ -0,0 +1,29 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+import django_admin_rq.models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('django_admin_rq', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='jobstatus',
+            name='job_id',
+            field=models.CharField(db_index=True, default='', max_length=255),
+        ),
+        migrations.AlterField(
+            model_name='jobstatus',
+            name='job_uuid',
+            field=models.CharField(default=django_admin_rq.models._get_uuid, max_length=255, unique=True),
+        ),
+        migrations.AlterIndexTogether(
+            name='jobstatus',
+            index_together=set([('status', 'created_on')]),
+        ),
+    ]
@@ -0,0 +1,19 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('django_admin_rq', '0002_job_status_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='jobstatus',
+            name='input_files',
+            field=models.TextField(blank=True, default=''),
+        ),
+    ]
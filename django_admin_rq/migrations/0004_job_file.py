@@ -0,0 +1,34 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('django_admin_rq', '0003_job_status_input_files'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='JobFile',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('digest', models.CharField(max_length=64, unique=True)),
+                ('name', models.CharField(db_index=True, max_length=255)),
+                ('size', models.BigIntegerField(default=0)),
+                ('ref_count', models.PositiveIntegerField(default=0)),
+                ('created_on', models.DateTimeField(auto_now_add=True)),
+                ('last_used_on', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'Job file',
+                'verbose_name_plural': 'Job files',
+            },
+        ),
+        migrations.AlterIndexTogether(
+            name='jobfile',
+            index_together=set([('ref_count', 'last_used_on')]),
+        ),
+    ]
@@ -0,0 +1,19 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('django_admin_rq', '0005_job_status_parent'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='jobstatus',
+            name='status',
+            field=models.CharField(choices=[('QUEUED', 'Queued'), ('WAITING', 'Waiting'), ('STARTED', 'Started'), ('FINISHED', 'Finished'), ('FAILED', 'Failed')], default='QUEUED', max_length=128),
+        ),
+    ]
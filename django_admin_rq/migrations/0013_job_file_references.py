@@ -0,0 +1,38 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from collections import Counter
+
+from django.db import migrations, models
+
+
+def add_job_files(apps, schema_editor):
+    """
+    Creates the JobFile rows of the files job statuses read that were saved without deduplication.
+    """
+    JobFile = apps.get_model('django_admin_rq', 'JobFile')
+    JobStatus = apps.get_model('django_admin_rq', 'JobStatus')
+    ref_counts = Counter()
+    for input_files in JobStatus.objects.exclude(input_files='').values_list('input_files', flat=True).iterator():
+        ref_counts.update(name for name in input_files.split('\n') if name)
+    tracked = set(JobFile.objects.values_list('name', flat=True))
+    JobFile.objects.bulk_create(
+        [JobFile(name=name, ref_count=count) for name, count in ref_counts.items() if name not in tracked],
+        batch_size=1000
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('django_admin_rq', '0012_job_status_scheduled'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='jobfile',
+            name='digest',
+            field=models.CharField(blank=True, max_length=64, null=True, unique=True),
+        ),
+        migrations.RunPython(add_job_files, migrations.RunPython.noop),
+    ]
@@ -1,27 +1,67 @@
 # -*- coding: utf-8 -*-
 from __future__ import unicode_literals
 
+import json
 import uuid
+from contextlib import contextmanager
+from datetime import timedelta
 
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
 from django.core.urlresolvers import reverse
 from django.db import models
-from django.utils import six
+from django.utils import six, timezone
+from django.utils.encoding import force_text
 from django.utils.six import python_2_unicode_compatible
 from django.utils.translation import ugettext_lazy as _
 
+from django_admin_rq import conf
+from django_admin_rq.backends import get_redis_connection, get_status_backend
+from django_admin_rq.locks import acquire_lock, release_lock
+from django_admin_rq.logs import append_log, read_log
 
+STATUS_SCHEDULED = 'SCHEDULED'
 STATUS_QUEUED = 'QUEUED'
+STATUS_WAITING = 'WAITING'
 STATUS_STARTED = 'STARTED'
 STATUS_FINISHED = 'FINISHED'
 STATUS_FAILED = 'FAILED'
+STATUS_CANCELLED = 'CANCELLED'
 
 STATUS_CHOICES = (
+    (STATUS_SCHEDULED, _('Scheduled')),
     (STATUS_QUEUED, _('Queued')),
+    (STATUS_WAITING, _('Waiting')),
     (STATUS_STARTED, _('Started')),
     (STATUS_FINISHED, _('Finished')),
     (STATUS_FAILED, _('Failed')),
+    (STATUS_CANCELLED, _('Cancelled')),
 )
 
+# Statuses of jobs that did not finish or fail yet
+ACTIVE_STATUSES = (STATUS_SCHEDULED, STATUS_QUEUED, STATUS_WAITING, STATUS_STARTED)
+
+# Unbounded columns that are deferred wherever only the status of a job is needed
+LARGE_FIELDS = ('result', 'failure_reason')
+
+# Seconds the transition of a chunk job waits for a concurrent reduction of its parent, see JobStatus.fan_out()
+_REDUCTION_LOCK_WAIT = 15
+
+# Seconds a new job status counts as alive before its rq job is enqueued, see JobStatus.is_alive()
+_ENQUEUE_GRACE_PERIOD = 60
+
+
+def _get_rq_pipeline(connection):
+    """
+    Returns a pipeline of connection that takes the StrictRedis argument order rq uses, like rq's own pipelines.
+    """
+    try:
+        from rq.compat.connections import patch_connection
+    except ImportError:
+        # rq 0.13 and later require redis-py 3, which only has the StrictRedis argument order
+        return connection.pipeline()
+    return patch_connection(connection)._pipeline()
+
 
 def _get_uuid():
     return uuid.uuid4().hex
@@ -34,11 +74,27 @@ class JobStatus(models.Model):
     """
     created_on = models.DateTimeField(auto_now_add=True)
     progress = models.PositiveIntegerField(default=0)
-    job_id = models.CharField(max_length=255, default='')
-    job_uuid = models.CharField(max_length=255, default=_get_uuid)
+    job_id = models.CharField(max_length=255, default='', db_index=True)
+    job_uuid = models.CharField(max_length=255, default=_get_uuid, unique=True)
     status = models.CharField(max_length=128, choices=STATUS_CHOICES, default=STATUS_QUEUED)
     result = models.TextField(default='')
     failure_reason = models.TextField(default='')
+    input_files = models.TextField(default='', blank=True)
+    # The job status this chunk job was fanned out from, see fan_out()
+    parent = models.ForeignKey('self', null=True, blank=True, related_name='children', on_delete=models.CASCADE)
+    # Runs with the same namespace share their artifacts, see JobAdminMixin.get_job_artifact_namespace()
+    artifact_namespace = models.CharField(max_length=255, default='', blank=True)
+    job_name = models.CharField(max_length=128, default='', blank=True)
+    started_on = models.DateTimeField(null=True, blank=True)
+    finished_on = models.DateTimeField(null=True, blank=True, db_index=True)
+    items_processed = models.PositiveIntegerField(default=0)
+    # Number of times the job was enqueued, see django_admin_rq.retry
+    attempts = models.PositiveIntegerField(default=1)
+    # When a scheduled job is due to be enqueued, see django_admin_rq.scheduler
+    scheduled_for = models.DateTimeField(null=True, blank=True)
+
+    # The columns status backends save on state transitions
+    transition_fields = ('status', 'progress', 'started_on', 'finished_on', 'items_processed')
 
     def __str__(self):
         return self.job_uuid
@@ -46,42 +102,477 @@ class JobStatus(models.Model):
     def url(self):
         return reverse('admin-rq-job-status', kwargs={'job_uuid': self.job_uuid})
 
+    def result_url(self):
+        return reverse('admin-rq-job-result', kwargs={'job_uuid': self.job_uuid})
+
+    def wait_url(self):
+        return reverse('admin-rq-job-status-wait', kwargs={'job_uuid': self.job_uuid})
+
+    def cancel_url(self):
+        return reverse('admin-rq-job-status-cancel', kwargs={'job_uuid': self.job_uuid})
+
+    def log_url(self):
+        return reverse('admin-rq-job-status-log', kwargs={'job_uuid': self.job_uuid})
+
+    def _save_fields(self, *fields):
+        """
+        Saves only the given fields if the row already exists.
+        """
+        if self.pk:
+            self.save(update_fields=fields)
+        else:
+            self.save()
+
+    def schedule(self, run_at, save=True):
+        """
+        Marks the job as scheduled to be enqueued at the datetime run_at.
+        """
+        self.status = STATUS_SCHEDULED
+        self.scheduled_for = run_at
+        if save:
+            self._save_fields('scheduled_for')
+            get_status_backend().set_status(self)
+
+    def mark_queued(self, save=True):
+        """
+        Marks a scheduled job as queued once the scheduler enqueued it.
+        """
+        self.status = STATUS_QUEUED
+        if save:
+            get_status_backend().set_status(self)
+
+    def wait(self, save=True):
+        """
+        Marks the job as waiting in the queue for a free slot under its concurrency limits.
+        """
+        self.status = STATUS_WAITING
+        if save:
+            get_status_backend().set_status(self)
+
     def start(self, save=True):
         self.status = STATUS_STARTED
+        self.started_on = timezone.now()
         if save:
-            self.save()
+            # The job may have been cancelled after rq dequeued it
+            self.check_cancelled()
+            get_status_backend().set_status(self)
+            self._update_parent()
 
     def finish(self, save=True):
         self.status = STATUS_FINISHED
+        self.finished_on = timezone.now()
         if save:
-            self.save()
+            # A job that doesn't report progress must not overwrite its cancellation
+            self.check_cancelled()
+            get_status_backend().set_status(self)
+            self._update_parent(transition=True)
 
     def fail(self, save=True):
         self.status = STATUS_FAILED
+        self.finished_on = timezone.now()
         if save:
-            self.save()
+            if self.is_cancel_requested():
+                # The job failed after it was cancelled, it stays CANCELLED
+                self.status = STATUS_CANCELLED
+                return
+            get_status_backend().set_status(self)
+            self._update_parent(transition=True)
+
+    def cancel(self, save=True):
+        """
+        Cancels the job.  A queued job is removed from its rq queue, a running job raises
+        :class:`~django_admin_rq.exceptions.JobCancelled` on its next progress update, see :func:`check_cancelled`.
+        Chunk jobs fanned out from this job are cancelled as well.
+        """
+        self.status = STATUS_CANCELLED
+        self.finished_on = timezone.now()
+        if save:
+            connection = get_redis_connection()
+            connection.setex(self.get_cancel_key(), conf.STATUS_TTL, 1)
+            if self.job_id:
+                from rq import cancel_job
+                from rq.exceptions import NoSuchJobError
+                try:
+                    cancel_job(self.job_id, connection=connection)
+                except NoSuchJobError:
+                    pass
+            get_status_backend().set_status(self)
+            self._cancel_children(connection)
+            self._update_parent(transition=True)
+
+    def _cancel_children(self, connection):
+        """
+        Cancels the active chunk jobs fanned out from this job status, and theirs, with one query, one status
+        update and two redis pipelines per level instead of a full :meth:`cancel` per child.
+        """
+        from rq.job import Job
+        from rq.queue import Queue
+
+        parent_pks = [self.pk]
+        while parent_pks:
+            children = list(
+                JobStatus.objects.filter(parent__in=parent_pks, status__in=ACTIVE_STATUSES).defer(*LARGE_FIELDS)
+            )
+            if not children:
+                return
+            finished_on = timezone.now()
+            queued = [child for child in children if child.job_id]
+            pipe = _get_rq_pipeline(connection)
+            for child in children:
+                child.status = STATUS_CANCELLED
+                child.finished_on = finished_on
+                pipe.setex(child.get_cancel_key(), conf.STATUS_TTL, 1)
+            for child in queued:
+                pipe.hget(Job.key_for(child.job_id), 'origin')
+            origins = pipe.execute()[len(children):]
+            # Removes the rq jobs from their queues like rq.cancel_job()
+            pipe = _get_rq_pipeline(connection)
+            for child, origin in zip(queued, origins):
+                if origin:
+                    Queue(name=force_text(origin), connection=connection).remove(child.job_id, pipeline=pipe)
+            pipe.execute()
+            get_status_backend().set_status_many(children)
+            parent_pks = [child.pk for child in children]
+
+    def retry(self, job_id, run_at=None, save=True):
+        """
+        Marks the job as queued again, or scheduled for run_at, for its next attempt under the new rq job id.
+        """
+        self.status = STATUS_QUEUED if run_at is None else STATUS_SCHEDULED
+        self.scheduled_for = run_at
+        self.progress = 0
+        self.attempts += 1
+        self.job_id = job_id
+        if save:
+            self._save_fields('attempts', 'job_id', 'scheduled_for')
+            get_status_backend().set_status(self)
+
+    def is_alive(self):
+        """
+        Returns True if the job is active and its rq job can still run: the rq job exists and did not end, and a
+        started rq job is within its timeout in rq's StartedJobRegistry, so the job of a killed worker stops counting.
+        A new job status counts until its rq job is enqueued, a fanned out job while one of its chunk jobs is active.
+        """
+        if self.status not in ACTIVE_STATUSES:
+            return False
+        if self.created_on and timezone.now() - self.created_on < timedelta(seconds=_ENQUEUE_GRACE_PERIOD):
+            return True
+        if self.children.filter(status__in=ACTIVE_STATUSES).exists():
+            return True
+        if not self.job_id:
+            return False
+        from rq.exceptions import NoSuchJobError
+        from rq.job import Job, JobStatus as RQJobStatus
+        from rq.registry import StartedJobRegistry
+        from rq.utils import current_timestamp
+        connection = get_redis_connection()
+        try:
+            job = Job.fetch(self.job_id, connection=connection)
+        except NoSuchJobError:
+            return False
+        status = job.get_status()
+        if status in (RQJobStatus.FINISHED, RQJobStatus.FAILED):
+            return False
+        if status == RQJobStatus.STARTED:
+            expires_at = connection.zscore(StartedJobRegistry(job.origin, connection=connection).key, self.job_id)
+            return expires_at is not None and expires_at > current_timestamp()
+        return True
+
+    def get_cancel_key(self):
+        return 'django_admin_rq:cancel:{}'.format(self.job_uuid)
+
+    def is_cancel_requested(self):
+        """
+        Returns True if the job was cancelled.  Reads one redis key, so it is cheap enough for every progress update.
+        """
+        return bool(get_redis_connection().exists(self.get_cancel_key()))
+
+    def check_cancelled(self):
+        """
+        Raises :class:`~django_admin_rq.exceptions.JobCancelled` if the job was cancelled.
+        Progress updates call this, jobs that don't report progress can call it between steps.
+        """
+        if self.is_cancel_requested():
+            from django_admin_rq.exceptions import JobCancelled
+            raise JobCancelled(self.job_uuid)
 
     def set_job_id(self, job_id, save=True):
         self.job_id = job_id
         if save:
-            self.save()
+            self._save_fields('job_id')
 
     def set_result(self, result, save=True):
         if isinstance(result, six.string_types):
             self.result = result
             if save:
-                self.save()
+                self._save_fields('result')
         else:
             raise ValueError('Result must be a string type.')
 
-    def set_progress(self, progress, save=True):
+    def set_failure_reason(self, failure_reason, save=True):
+        self.failure_reason = failure_reason
+        if save:
+            self._save_fields('failure_reason')
+
+    def log(self, *lines):
+        """
+        Appends lines to the job's log, which the run page tails while the job runs.
+        Costs one redis round trip per call, pass several lines at once in tight loops.
+        """
+        append_log(self.job_uuid, [force_text(line) for line in lines])
+
+    def get_log(self, offset=0):
+        """
+        Returns the offset of the first line, the lines logged from offset on and the number of lines logged so far.
+        Only the last ``DJANGO_ADMIN_RQ_LOG_MAX_LENGTH`` lines are kept, see :func:`django_admin_rq.logs.read_log`.
+        """
+        return read_log(self.job_uuid, offset)
+
+    def set_items_processed(self, items_processed, save=True):
+        """
+        Sets the number of items the job processed so far, see :attr:`items_per_second`.
+        :meth:`ProgressReporter.advance() <django_admin_rq.progress.ProgressReporter.advance>` counts items as well.
+        """
+        self.items_processed = items_processed
+        if save:
+            self._save_fields('items_processed')
+
+    @property
+    def queue_wait(self):
+        """
+        The timedelta the job waited in the queue before it started, since it was due if it was scheduled.
+        None if it did not start.
+        """
+        if self.started_on is None:
+            return None
+        return self.started_on - (self.scheduled_for or self.created_on)
+
+    @property
+    def run_duration(self):
+        """
+        The timedelta the job ran, until now if it is still running.  None if it did not start.
+        """
+        if self.started_on is None:
+            return None
+        return (self.finished_on or timezone.now()) - self.started_on
+
+    @property
+    def items_per_second(self):
+        """
+        The rate the job processed items at, None if it did not start or count items.
+        """
+        duration = self.run_duration
+        if not self.items_processed or duration is None or not duration.total_seconds():
+            return None
+        return self.items_processed / duration.total_seconds()
+
+    def set_progress(self, progress, save=True, coalesce=False):
+        """
+        Sets the progress in percent.
+        With coalesce=True the update is throttled by a :class:`~django_admin_rq.progress.ProgressReporter`
+        and only written once it moved enough, pending progress is written by the next state transition.
+        """
+        if coalesce and save:
+            if getattr(self, '_progress_reporter', None) is None:
+                self._progress_reporter = self.progress_reporter()
+            self.progress = int(progress)
+            self._progress_reporter.update(progress)
+            return
         self.progress = int(progress)
         if save:
-            self.save()
+            self.check_cancelled()
+            get_status_backend().set_progress(self)
+            self._update_parent()
+
+    def progress_reporter(self, total=None, min_delta=None, min_interval=None):
+        """
+        Returns a :class:`~django_admin_rq.progress.ProgressReporter` for this job status.
+        """
+        from django_admin_rq.progress import ProgressReporter
+        return ProgressReporter(self, total=total, min_delta=min_delta, min_interval=min_interval)
+
+    def fan_out(self, job_callable, chunks, extra_context=None, queues=None):
+        """
+        Splits this job into one child job per chunk so the chunks are processed by several workers.
+        Each child is enqueued as ``job_callable(child_job_status, chunk, extra_context)``, round robin on the given
+        queue names or on the queue the callable was decorated with.  Chunks must be pickleable.
+        The children are created with their rq job ids and enqueued in one redis pipeline per queue.
+        This job status is started and from then on reduced from its children: its progress is their average progress,
+        it fails once a child failed and finishes once all children finished, right away without chunks.
+        The progress is reduced at most once every ``DJANGO_ADMIN_RQ_FAN_OUT_REDUCE_INTERVAL`` seconds.
+        Returns the child job statuses.
+        """
+        import django_rq
+        from django_admin_rq.jobs import enqueue_many, get_job_callable_queue
+        from django_admin_rq.payloads import LazyJobStatus
+
+        chunks = list(chunks)
+        job_uuids = [_get_uuid() for _ in chunks]
+        # Children are created with their rq job ids, so the exception handler and cancel() find every enqueued child
+        job_ids = [six.text_type(uuid.uuid4()) for _ in chunks]
+        JobStatus.objects.bulk_create([
+            JobStatus(
+                parent=self, job_uuid=job_uuid, job_id=job_id, job_name=self.job_name,
+                artifact_namespace=self.artifact_namespace
+            )
+            for job_uuid, job_id in zip(job_uuids, job_ids)
+        ])
+        children = list(JobStatus.objects.filter(job_uuid__in=job_uuids))
+        positions = dict((job_uuid, position) for position, job_uuid in enumerate(job_uuids))
+        children.sort(key=lambda child: positions[child.job_uuid])
+        self.start()
+        if not children:
+            # Nothing to wait for
+            self.progress = 100
+            self.finish()
+            return children
+        payloads = [LazyJobStatus(child.job_uuid) if conf.LAZY_PAYLOADS else child for child in children]
+        if queues:
+            queues = [django_rq.get_queue(queue_name) for queue_name in queues]
+        else:
+            queues = [get_job_callable_queue(job_callable)]
+        for offset, queue in enumerate(queues):
+            enqueue_many(
+                queue,
+                job_callable,
+                [(payload, chunk, extra_context) for payload, chunk in
+                 zip(payloads[offset::len(queues)], chunks[offset::len(queues)])],
+                job_ids[offset::len(queues)],
+            )
+        return children
+
+    @contextmanager
+    def _reduction_lock(self, wait=0):
+        """
+        Serializes the reductions of this job status from its children.  Yields whether the lock was taken.
+        """
+        name, token = 'fan-out:{}'.format(self.pk), _get_uuid()
+        locked = acquire_lock(name, token, wait=wait)
+        try:
+            yield locked
+        finally:
+            if locked:
+                release_lock(name, token)
+
+    def update_from_children(self, wait=_REDUCTION_LOCK_WAIT):
+        """
+        Reduces the status and progress of the children created by :func:`fan_out` to this job status.
+        Reads every child, so progress updates of the children call it at most once every
+        ``DJANGO_ADMIN_RQ_FAN_OUT_REDUCE_INTERVAL`` seconds.  Skipped if a concurrent reduction holds the lock
+        for longer than wait seconds.
+        """
+        with self._reduction_lock(wait) as locked:
+            if not locked:
+                return
+            # Another reduction may have finished or failed this job status in the meantime
+            self.refresh_from_db()
+            if self.status not in ACTIVE_STATUSES or self.is_cancel_requested():
+                return
+            children = list(self.children.order_by().values_list('job_uuid', 'status', 'progress'))
+            if not children:
+                return
+            states = get_status_backend().get_many([job_uuid for job_uuid, status, progress in children])
+            statuses, total_progress = [], 0
+            for job_uuid, status, progress in children:
+                state = states.get(job_uuid, {'status': status, 'progress': progress})
+                statuses.append(state['status'])
+                total_progress += 100 if state['status'] == STATUS_FINISHED else state['progress']
+
+            if STATUS_FAILED in statuses:
+                failed = children[statuses.index(STATUS_FAILED)][0]
+                self.set_failure_reason('Chunk job {} failed.'.format(failed))
+                self.fail()
+            elif STATUS_CANCELLED in statuses:
+                self.cancel()
+            elif all(status == STATUS_FINISHED for status in statuses):
+                self.progress = 100
+                self.finish()
+            elif total_progress // len(children) != self.progress:
+                self._save_reduced_progress(total_progress // len(children))
+
+    def reduce_child_transition(self, child):
+        """
+        Applies the finish, failure or cancellation of the child to this job status without reading the other
+        children's progress: a failed or cancelled child fails or cancels it, the last finished child finishes it.
+        Returns False if this job status is still active afterwards.
+        """
+        if not JobStatus.objects.filter(pk=self.pk, status__in=ACTIVE_STATUSES).exists():
+            return True  # E.g. cancelling this job status cancels its children
+        with self._reduction_lock(_REDUCTION_LOCK_WAIT):
+            # Applied without the lock if it is held for too long, transitions must not be lost
+            self.refresh_from_db()
+            if self.status not in ACTIVE_STATUSES or self.is_cancel_requested():
+                # A cancellation in progress cancels the children itself
+                return True
+            if child.status == STATUS_FAILED:
+                self.set_failure_reason('Chunk job {} failed.'.format(child.job_uuid))
+                self.fail()
+            elif child.status == STATUS_CANCELLED:
+                self.cancel()
+            elif not self.children.exclude(status=STATUS_FINISHED).exists():
+                self.progress = 100
+                self.finish()
+            else:
+                return False
+        return True
+
+    def _save_reduced_progress(self, progress):
+        # Unlike set_progress() this doesn't raise JobCancelled in the child that triggered the reduction
+        self.progress = progress
+        get_status_backend().set_progress(self)
+        self._update_parent()
+
+    def _is_progress_reduction_due(self):
+        interval = int(conf.FAN_OUT_REDUCE_INTERVAL * 1000)
+        if not interval:
+            return True
+        return bool(get_redis_connection().set('django_admin_rq:fan-out:{}'.format(self.pk), 1, px=interval, nx=True))
+
+    def _update_parent(self, transition=False):
+        """
+        Reduces the parent after this chunk job's finish, failure or cancellation (transition) or progress update.
+        """
+        if not self.parent_id:
+            return
+        parent = JobStatus(pk=self.parent_id)
+        if transition and parent.reduce_child_transition(self):
+            return
+        if parent._is_progress_reduction_due():
+            parent.update_from_children(wait=0)
+
+    @staticmethod
+    def encode_input_file(name):
+        return '\n{}\n'.format(name)
+
+    def get_input_files(self):
+        """
+        Returns the names of the uploaded files in :data:`~django_admin_rq.storage.job_file_storage` this job reads.
+        """
+        return [name for name in self.input_files.split('\n') if name]
+
+    def set_input_files(self, names, save=True):
+        # Every name is wrapped in newlines so names never run into each other
+        self.input_files = ''.join(self.encode_input_file(name) for name in names)
+        if save:
+            self._save_fields('input_files')
+
+    @property
+    def artifacts(self):
+        """
+        The :class:`~django_admin_rq.artifacts.Artifacts` this job shares with other runs on the same form data.
+        """
+        from django_admin_rq.artifacts import Artifacts
+        return Artifacts(self.artifact_namespace)
+
+    def is_scheduled(self):
+        return self.status == STATUS_SCHEDULED
 
     def is_queued(self):
         return self.status == STATUS_QUEUED
 
+    def is_waiting(self):
+        return self.status == STATUS_WAITING
+
     def is_started(self):
         return self.status == STATUS_STARTED
 
@@ -91,7 +582,97 @@ class JobStatus(models.Model):
     def is_failed(self):
         return self.status == STATUS_FAILED
 
+    def is_cancelled(self):
+        return self.status == STATUS_CANCELLED
+
     class Meta:
         ordering = ('-created_on', )
+        index_together = (
+            ('status', 'created_on'),
+        )
         verbose_name = _('Job status')
         verbose_name_plural = _('Job statuses')
+
+
+@python_2_unicode_compatible
+class JobFile(models.Model):
+    """
+    An uploaded job file.  ref_count is the number of job statuses that read the file, unused files are deleted
+    when pruning.  With ``DJANGO_ADMIN_RQ_DEDUPLICATE_FILES`` every content hash is stored once.
+    """
+    # None for files saved without deduplication
+    digest = models.CharField(max_length=64, unique=True, null=True, blank=True)
+    name = models.CharField(max_length=255, db_index=True)
+    size = models.BigIntegerField(default=0)
+    ref_count = models.PositiveIntegerField(default=0)
+    created_on = models.DateTimeField(auto_now_add=True)
+    last_used_on = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return self.name
+
+    class Meta:
+        verbose_name = _('Job file')
+        verbose_name_plural = _('Job files')
+        index_together = (
+            ('ref_count', 'last_used_on'),
+        )
+
+
+@python_2_unicode_compatible
+class JobRun(models.Model):
+    """
+    One pass of a user through a job's workflow, identified by the job-id in the workflow urls.
+    Holds the serialized form data and the job statuses of the preview and main run.
+    """
+    run_id = models.CharField(max_length=32, unique=True)
+    job_name = models.CharField(max_length=128)
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, null=True, blank=True, on_delete=models.CASCADE)
+    object_id = models.CharField(max_length=255, default='', blank=True)
+    form_data = models.TextField(default='[]')
+    # When the main run is scheduled to be enqueued, None to enqueue it right away
+    run_at = models.DateTimeField(null=True, blank=True)
+    preview_run_job_status = models.ForeignKey(
+        JobStatus, null=True, blank=True, related_name='+', on_delete=models.SET_NULL
+    )
+    main_run_job_status = models.ForeignKey(
+        JobStatus, null=True, blank=True, related_name='+', on_delete=models.SET_NULL
+    )
+    created_on = models.DateTimeField(auto_now_add=True)
+    updated_on = models.DateTimeField(auto_now=True, db_index=True)
+
+    def __str__(self):
+        return self.run_id
+
+    class Meta:
+        verbose_name = _('Job run')
+        verbose_name_plural = _('Job runs')
+
+    def get_form_data(self):
+        """
+        Returns the form data serialized by :func:`~django_admin_rq.admin.JobAdminMixin.serialize_form`.
+        """
+        if getattr(self, '_form_data', None) is None:
+            self._form_data = json.loads(self.form_data)
+        return self._form_data
+
+    def set_form_data(self, form_data, save=True):
+        self.form_data = json.dumps(form_data, cls=DjangoJSONEncoder)
+        self._form_data = None
+        if save:
+            self.save(update_fields=('form_data', 'updated_on'))
+
+    def get_job_status(self, view_name):
+        """
+        Returns the :class:`JobStatus` of the given run view or None if that job was not started yet.
+        """
+        job_status_id = getattr(self, '{}_job_status_id'.format(view_name))
+        if job_status_id is None:
+            return None
+        # The large text columns are loaded on first access
+        return JobStatus.objects.defer(*LARGE_FIELDS).filter(pk=job_status_id).first()
+
+    def set_job_status(self, view_name, job_status, save=True):
+        setattr(self, '{}_job_status_id'.format(view_name), job_status.pk)
+        if save:
+            self.save(update_fields=('{}_job_status'.format(view_name), 'updated_on'))
@@ -0,0 +1,85 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+try:
+    from collections.abc import Mapping
+except ImportError:  # Python 2
+    from collections import Mapping
+
+from django.utils import six
+
+from django_admin_rq.serialization import deserialize_form_data, form_data_as_dict
+
+
+class LazyJobStatus(object):
+    """
+    Stands in for a :class:`~django_admin_rq.models.JobStatus` in a job payload.
+    Only the job_uuid is pickled, the job status is loaded on first attribute access in the worker.
+    Like Django's SimpleLazyObject it reports JobStatus as its ``__class__``, so ``isinstance(x, JobStatus)`` holds
+    without loading it.
+    """
+
+    def __init__(self, job_uuid):
+        self.__dict__.update(job_uuid=job_uuid, _job_status=None)
+
+    def __reduce__(self):
+        return LazyJobStatus, (self.job_uuid,)
+
+    @property
+    def __class__(self):
+        from django_admin_rq.models import JobStatus
+        return JobStatus
+
+    def _get_job_status(self):
+        if self._job_status is None:
+            from django_admin_rq.models import JobStatus, LARGE_FIELDS
+            self.__dict__['_job_status'] = JobStatus.objects.defer(*LARGE_FIELDS).get(job_uuid=self.job_uuid)
+        return self._job_status
+
+    def __getattr__(self, name):
+        return getattr(self._get_job_status(), name)
+
+    def __setattr__(self, name, value):
+        setattr(self._get_job_status(), name, value)
+
+    def __str__(self):
+        return self.job_uuid
+
+    def __repr__(self):
+        return '<LazyJobStatus: {}>'.format(self.job_uuid)
+
+
+class LazyFormData(Mapping):
+    """
+    Stands in for the form data dict in a job payload.
+    Only the serialized form data (model references, primary key lists and file paths) is pickled,
+    it is deserialized on first access in the worker.
+    """
+
+    def __init__(self, serialized_data):
+        self.serialized_data = serialized_data
+        self._data = None
+
+    def __getstate__(self):
+        return {'serialized_data': self.serialized_data}
+
+    def __setstate__(self, state):
+        self.__init__(state['serialized_data'])
+
+    @property
+    def data(self):
+        if self._data is None:
+            self._data = form_data_as_dict(deserialize_form_data(self.serialized_data))
+        return self._data
+
+    def __getitem__(self, key):
+        return self.data[key]
+
+    def __iter__(self):
+        return iter(self.data)
+
+    def __len__(self):
+        return len(self.serialized_data)
+
+    def __repr__(self):
+        return '<LazyFormData: {}>'.format(', '.join(six.text_type(field['name']) for field in self.serialized_data))
@@ -0,0 +1,72 @@
+# -*- coding: utf-8 -*-
+from __future__ import division, unicode_literals
+
+import time
+
+from django_admin_rq import conf
+from django_admin_rq.exceptions import JobCancelled
+
+
+class ProgressReporter(object):
+    """
+    Coalesces progress updates of a :class:`~django_admin_rq.models.JobStatus` so it can be called in tight loops.
+    The progress is only written when it moved by ``min_delta`` percent or ``min_interval`` seconds passed since the
+    last write.  Pending progress is written when the reporter is used as a context manager and exits.
+    Every write checks whether the job was cancelled and raises :class:`~django_admin_rq.exceptions.JobCancelled`.
+
+    with job_status.progress_reporter(total=len(rows)) as progress:
+        for row in rows:
+            ...
+            progress.advance()
+    """
+
+    def __init__(self, job_status, total=None, min_delta=None, min_interval=None):
+        self.job_status = job_status
+        self.total = total
+        self.done = 0
+        self.min_delta = conf.PROGRESS_MIN_DELTA if min_delta is None else min_delta
+        self.min_interval = conf.PROGRESS_MIN_INTERVAL if min_interval is None else min_interval
+        self.progress = job_status.progress
+        self._written_progress = job_status.progress
+        self._written_at = time.time()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, tb):
+        if exc_type is None or not issubclass(exc_type, JobCancelled):
+            self.flush()
+
+    @property
+    def has_pending(self):
+        return self.progress != self._written_progress
+
+    def update(self, progress):
+        """
+        Sets the progress in percent.
+        """
+        self.progress = int(progress)
+        if not self.has_pending:
+            return
+        if abs(self.progress - self._written_progress) >= self.min_delta or \
+                time.time() - self._written_at >= self.min_interval:
+            self.flush()
+
+    def advance(self, count=1):
+        """
+        Marks count more items as done and counts them in the job status's items_processed. Requires total.
+        """
+        if not self.total:
+            raise ValueError('advance() requires the total number of items.')
+        self.done += count
+        self.job_status.items_processed += count
+        self.update(min(100, self.done * 100 // self.total))
+
+    def flush(self):
+        """
+        Writes pending progress.
+        """
+        if self.has_pending:
+            self.job_status.set_progress(self.progress)
+            self._written_progress = self.progress
+            self._written_at = time.time()
@@ -0,0 +1,86 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+import logging
+from datetime import timedelta
+
+import django_rq
+from django.utils import six, timezone
+from django.utils.module_loading import import_string
+
+from django_admin_rq import conf
+from django_admin_rq.jobs import create_job
+from django_admin_rq.scheduler import add_scheduled_job, is_scheduler_running
+
+logger = logging.getLogger(__name__)
+
+_policies = {}
+
+
+class RetryPolicy(object):
+    """
+    Decides whether a failed job is enqueued again and after how many seconds.
+    The n-th retry waits ``backoff * backoff_factor ** (n - 1)`` seconds, at most ``max_backoff``.
+    Only exceptions of the given classes or dotted paths are retried, by default database errors like deadlocks,
+    lock timeouts and lost connections.
+    """
+
+    def __init__(self, max_attempts=3, backoff=10, backoff_factor=2, max_backoff=60 * 60,
+                 exceptions=('django.db.utils.OperationalError', 'django.db.utils.InterfaceError')):
+        self.max_attempts = max_attempts
+        self.backoff = backoff
+        self.backoff_factor = backoff_factor
+        self.max_backoff = max_backoff
+        self.exceptions = tuple(
+            import_string(exception) if isinstance(exception, six.string_types) else exception
+            for exception in exceptions
+        )
+
+    def should_retry(self, exception, attempts):
+        """
+        Returns True if a job that raised exception in its attempts-th attempt is retried.
+        """
+        return attempts < self.max_attempts and isinstance(exception, self.exceptions)
+
+    def get_delay(self, attempts):
+        """
+        Returns the seconds to wait before the attempt after the attempts-th.
+        """
+        return min(self.max_backoff, self.backoff * self.backoff_factor ** (attempts - 1))
+
+
+def get_retry_policy(job_name):
+    """
+    Returns the RetryPolicy configured for job_name in ``DJANGO_ADMIN_RQ_RETRY_POLICIES`` or None.
+    """
+    if job_name not in conf.RETRY_POLICIES:
+        return None
+    if job_name not in _policies:
+        _policies[job_name] = RetryPolicy(**conf.RETRY_POLICIES[job_name])
+    return _policies[job_name]
+
+
+def retry_job(job, job_status, delay):
+    """
+    Enqueues the failed rq job again on its queue, after delay seconds through the run_job_scheduler command,
+    and marks its job status as queued or scheduled.  Without a running scheduler the job is enqueued right away,
+    a scheduled retry would never run.
+    """
+    queue = django_rq.get_queue(job.origin)
+    if delay and not is_scheduler_running():
+        logger.warning('No run_job_scheduler command is running, job %s is retried without its backoff of %s seconds',
+                       job.get_id(), delay)
+        delay = 0
+    # The new job keeps the options of the failed one
+    new_job = create_job(queue, job.func, job.args, kwargs=job.kwargs, options={
+        'timeout': job.timeout, 'result_ttl': job.result_ttl, 'ttl': job.ttl, 'description': job.description,
+        'meta': job.meta,
+    })
+    run_at = timezone.now() + timedelta(seconds=delay) if delay else None
+    # Before the job is enqueued, otherwise this could overwrite the status of the attempt once it started
+    job_status.retry(new_job.get_id(), run_at=run_at)
+    if run_at is not None:
+        add_scheduled_job(new_job, run_at)
+    else:
+        queue.enqueue_job(new_job)
+    return new_job
@@ -0,0 +1,135 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+import datetime
+import logging
+import math
+
+import django_rq
+from django.utils import timezone
+from django.utils.encoding import force_text
+from rq.exceptions import NoSuchJobError
+
+from django_admin_rq import conf
+from django_admin_rq.backends import get_redis_connection, zadd
+
+logger = logging.getLogger(__name__)
+
+# Sorted set of '<job id>:<queue name>' members scored by the timestamp the job is due at
+SCHEDULED_JOBS_KEY = 'django_admin_rq:scheduled'
+
+# Key every loop of the run_job_scheduler command refreshes, see is_scheduler_running()
+SCHEDULER_HEARTBEAT_KEY = 'django_admin_rq:scheduler-heartbeat'
+
+
+def get_timestamp(value):
+    """
+    Returns the unix timestamp of the naive (in the default time zone) or aware datetime value.
+    """
+    if timezone.is_naive(value):
+        value = timezone.make_aware(value, timezone.get_default_timezone())
+    return (value - datetime.datetime(1970, 1, 1, tzinfo=timezone.utc)).total_seconds()
+
+
+def parse_time(value):
+    """
+    Returns value, a :class:`datetime.time` or a 'HH:MM' string, as time.
+    """
+    if isinstance(value, datetime.time):
+        return value
+    return datetime.datetime.strptime(value, '%H:%M').time()
+
+
+def get_next_window_start(window, now=None):
+    """
+    Returns now if now is in the daily window, a pair of start and end times in the current time zone, or the next
+    start of the window.  Windows with an end before their start span midnight.
+    """
+    now = now or timezone.now()
+    start, end = parse_time(window[0]), parse_time(window[1])
+    local_now = timezone.localtime(now) if timezone.is_aware(now) else now
+    time = local_now.time()
+    if (start <= time < end) if start < end else (time >= start or time < end):
+        return now
+    start_on = local_now.date() if time < start else local_now.date() + datetime.timedelta(days=1)
+    next_start = datetime.datetime.combine(start_on, start)
+    return timezone.make_aware(next_start, timezone.get_current_timezone()) if timezone.is_aware(now) else next_start
+
+
+def schedule_job(queue, job_callable, run_at, args=None, kwargs=None, timeout=None, job_id=None):
+    """
+    Creates the rq job job_callable(*args, **kwargs) for queue and registers it to be enqueued at the datetime
+    run_at by the run_job_scheduler command.  Returns the rq job.
+    """
+    job = queue.job_class.create(
+        job_callable, args=args, kwargs=kwargs, connection=queue.connection,
+        timeout=timeout or queue._default_timeout, id=job_id, origin=queue.name
+    )
+    return add_scheduled_job(job, run_at)
+
+
+def record_scheduler_heartbeat(interval):
+    """
+    Marks a scheduler that looks for due jobs every interval seconds as running.
+    """
+    timeout = max(int(math.ceil(interval * 3)), conf.SCHEDULER_HEARTBEAT_TIMEOUT)
+    get_redis_connection().setex(SCHEDULER_HEARTBEAT_KEY, timeout, 1)
+
+
+def is_scheduler_running():
+    """
+    Returns True if a run_job_scheduler command ran within ``DJANGO_ADMIN_RQ_SCHEDULER_HEARTBEAT_TIMEOUT`` seconds.
+    """
+    return bool(get_redis_connection().exists(SCHEDULER_HEARTBEAT_KEY))
+
+
+def add_scheduled_job(job, run_at):
+    """
+    Saves the rq job and registers it to be enqueued on its origin queue at the datetime run_at.  Returns the job.
+    """
+    if not is_scheduler_running():
+        logger.warning('Job %s was scheduled but no run_job_scheduler command is running, it stays scheduled until '
+                       'one runs', job.get_id())
+    job.save()
+    member = '{}:{}'.format(job.get_id(), job.origin)
+    zadd(get_redis_connection(), SCHEDULED_JOBS_KEY, {member: get_timestamp(run_at)})
+    return job
+
+
+def enqueue_due_jobs(now=None):
+    """
+    Enqueues the scheduled jobs that are due and marks their job statuses as queued.
+    Several schedulers can run side by side, every job is enqueued by the one that removed it from the registry.
+    Returns the number of enqueued jobs.
+    """
+    from django_admin_rq.models import JobStatus, LARGE_FIELDS, STATUS_SCHEDULED
+
+    connection = get_redis_connection()
+    due = []
+    for member in connection.zrangebyscore(SCHEDULED_JOBS_KEY, '-inf', get_timestamp(now or timezone.now())):
+        if not connection.zrem(SCHEDULED_JOBS_KEY, member):
+            continue
+        job_id, queue_name = force_text(member).split(':', 1)
+        queue = django_rq.get_queue(queue_name)
+        try:
+            due.append((queue, queue.job_class.fetch(job_id, connection=queue.connection)))
+        except NoSuchJobError:
+            pass
+    if not due:
+        return 0
+    job_statuses = dict(
+        (job_status.job_id, job_status) for job_status in
+        JobStatus.objects.defer(*LARGE_FIELDS).filter(job_id__in=[job.get_id() for queue, job in due])
+    )
+    enqueued = 0
+    for queue, job in due:
+        job_status = job_statuses.get(job.get_id())
+        if job_status is not None:
+            if job_status.status != STATUS_SCHEDULED:
+                job.delete()  # Cancelled while it was scheduled
+                continue
+            # Before the job is enqueued, otherwise this could overwrite the status of a job that already started
+            job_status.mark_queued()
+        queue.enqueue_job(job)
+        enqueued += 1
+    return enqueued
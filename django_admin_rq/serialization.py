@@ -0,0 +1,202 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+import copy
+import hashlib
+import json
+import re
+from collections import OrderedDict
+
+from django.contrib.contenttypes.models import ContentType
+from django.db import models
+from django.db.models import Q
+from django.db.models.query import QuerySet
+from django.utils import six
+from django.utils.encoding import force_text
+from django.utils.six.moves.urllib.parse import quote, unquote
+
+CONTENT_TYPE_PREFIX = 'contenttype://'
+CONTENT_TYPE_RE_PATTERN = 'contenttype://([a-zA-Z-_]+)\.([a-zA-Z]+):(\d{1,10})'
+
+QUERYSET_PREFIX = 'queryset://'
+QUERYSET_RE_PATTERN = 'queryset://([a-zA-Z-_]+)\.([a-zA-Z]+):([rl]):(.*)'
+
+
+def serialize_instance(instance):
+    """
+    Returns a 'contenttype://app_label.model:pk' reference to the given model instance.
+    """
+    ctype = ContentType.objects.get_for_model(instance)
+    return '{0}{1}.{2}:{3}'.format(CONTENT_TYPE_PREFIX, ctype.app_label, ctype.model, instance.pk)
+
+
+def parse_instance_reference(value):
+    """
+    Returns a tuple of app_label, model and pk for a reference made by :func:`serialize_instance`, None otherwise.
+    """
+    if isinstance(value, six.string_types) and value.startswith(CONTENT_TYPE_PREFIX):
+        match = re.search(CONTENT_TYPE_RE_PATTERN, value)
+        if match:
+            return match.group(1), match.group(2), match.group(3)
+    return None
+
+
+def is_instance_list(value):
+    """
+    Returns True for a non-empty list or tuple of instances of a single model.
+    """
+    return isinstance(value, (list, tuple)) and len(value) > 0 and \
+        all(isinstance(item, models.Model) and type(item) is type(value[0]) for item in value)
+
+
+def encode_ranges(numbers):
+    """
+    Encodes integers as a compact string of ranges: [1, 2, 3, 7, 9, 10] -> '1-3,7,9-10'
+    """
+    parts = []
+    numbers = sorted(set(numbers))
+    start = previous = None
+    for number in numbers + [None]:
+        if start is not None and (number is None or number != previous + 1):
+            parts.append(str(start) if start == previous else '{}-{}'.format(start, previous))
+            start = None
+        if start is None:
+            start = number
+        previous = number
+    return ','.join(parts)
+
+
+def decode_ranges(value):
+    """
+    Returns a tuple of (start, end) ranges and single integers encoded by :func:`encode_ranges`.
+    """
+    ranges, singles = [], []
+    for part in value.split(','):
+        if '-' in part:
+            start, end = part.split('-')
+            ranges.append((int(start), int(end)))
+        elif part:
+            singles.append(int(part))
+    return ranges, singles
+
+
+def serialize_queryset(value):
+    """
+    Returns a 'queryset://app_label.model:...' reference to a QuerySet or a list of instances of one model.
+    Non-negative integer primary keys are range encoded, others are listed.
+    Returns a tuple of the reference, the number of referenced instances and the model.
+    """
+    if isinstance(value, QuerySet):
+        model = value.model
+        pks = list(value.order_by().values_list('pk', flat=True))
+    else:
+        model = type(value[0])
+        pks = [instance.pk for instance in value]
+    ctype = ContentType.objects.get_for_model(model)
+    if all(isinstance(pk, six.integer_types) and pk >= 0 for pk in pks):
+        encoded = 'r:' + encode_ranges(pks)
+    else:
+        encoded = 'l:' + ','.join(quote(force_text(pk), safe='') for pk in pks)
+    return '{0}{1}.{2}:{3}'.format(QUERYSET_PREFIX, ctype.app_label, ctype.model, encoded), len(set(pks)), model
+
+
+def parse_queryset_reference(value):
+    """
+    Returns a tuple of app_label, model, kind and encoded pks for a reference made by :func:`serialize_queryset`,
+    None otherwise.
+    """
+    if isinstance(value, six.string_types) and value.startswith(QUERYSET_PREFIX):
+        match = re.search(QUERYSET_RE_PATTERN, value)
+        if match:
+            return match.groups()
+    return None
+
+
+class ReferencedQuerySet(QuerySet):
+    """
+    A QuerySet deserialized from a reference made by :func:`serialize_queryset`.
+    It is pickled as its reference, so a job payload doesn't contain its rows.  QuerySets derived from it, for
+    example by ``filter()``, are pickled as usual.
+    """
+    reference = None
+
+    def __reduce_ex__(self, protocol):
+        if self.reference is None:
+            return super(ReferencedQuerySet, self).__reduce_ex__(protocol)
+        return deserialize_queryset, self.reference
+
+
+def deserialize_queryset(app_label, model, kind, encoded):
+    """
+    Returns a lazy :class:`ReferencedQuerySet` for a reference made by :func:`serialize_queryset`.
+    No query is made until the QuerySet is evaluated, workers can iterate large ones with ``iterator()``.
+    """
+    model_class = get_model_class(app_label, model)
+    queryset = ReferencedQuerySet(model_class, using=model_class._base_manager.db)
+    if kind == 'r':
+        ranges, singles = decode_ranges(encoded)
+        query = Q(pk__in=singles) if singles else Q()
+        for start, end in ranges:
+            query |= Q(pk__range=(start, end))
+    else:
+        pks = [unquote(pk) for pk in encoded.split(',') if pk]
+        query = Q(pk__in=pks) if pks else Q()
+    queryset = queryset.filter(query) if query else queryset.none()
+    queryset.reference = (app_label, model, kind, encoded)
+    return queryset
+
+
+def get_model_class(app_label, model):
+    # get_by_natural_key is served from the ContentType cache
+    return ContentType.objects.get_by_natural_key(app_label, model).model_class()
+
+
+def deserialize_form_data(serialized_data):
+    """
+    Returns a copy of serialized form data with all model references replaced by the model instances.
+    References of the same content type are loaded with a single query, QuerySet references become lazy QuerySets.
+    """
+    form_data = copy.deepcopy(serialized_data)  # Don't modify the serialized data
+
+    references = OrderedDict()
+    for field_data in form_data:
+        queryset_reference = parse_queryset_reference(field_data['value'])
+        if queryset_reference is not None:
+            field_data['value'] = deserialize_queryset(*queryset_reference)
+            continue
+        reference = parse_instance_reference(field_data['value'])
+        if reference is not None:
+            app_label, model, pk = reference
+            references.setdefault((app_label, model), []).append((field_data, pk))
+
+    for (app_label, model), fields in references.items():
+        model_class = get_model_class(app_label, model)
+        pks = [model_class._meta.pk.to_python(pk) for field_data, pk in fields]
+        instances = model_class._base_manager.in_bulk(pks)
+        for (field_data, pk), python_pk in zip(fields, pks):
+            if python_pk not in instances:
+                raise model_class.DoesNotExist(
+                    '{} matching pk {} does not exist.'.format(model_class._meta.object_name, pk)
+                )
+            field_data['value'] = instances[python_pk]
+
+    return form_data
+
+
+def form_data_as_dict(form_data):
+    """
+    Returns deserialized form data as an ordered dict like form.cleaned_data
+    """
+    data_dict = OrderedDict()
+    for value_dict in form_data:
+        data_dict[value_dict['name']] = value_dict['value']
+    return data_dict
+
+
+def get_form_data_hash(serialized_data):
+    """
+    Returns a hash of serialized form data, or any other JSON serializable value, that is equal for equal data.
+    """
+    return hashlib.sha1(
+        json.dumps(serialized_data, sort_keys=True, default=force_text).encode('utf-8')
+    ).hexdigest()
@@ -1,7 +1,7 @@
 # -*- coding: utf-8 -*-
 from rest_framework import serializers
 
-from django_admin_rq.models import JobStatus
+from django_admin_rq.models import JobStatus, LARGE_FIELDS
 
 
 class JobStatusSerializer(serializers.ModelSerializer):
@@ -9,3 +9,24 @@ class JobStatusSerializer(serializers.ModelSerializer):
     class Meta:
         model = JobStatus
         fields = '__all__'
+
+
+class JobStatusSummarySerializer(serializers.ModelSerializer):
+    """
+    Serializes everything but the large text columns, the result can be fetched from result_url.
+    """
+    result_url = serializers.CharField(read_only=True)
+
+    class Meta:
+        model = JobStatus
+        exclude = LARGE_FIELDS
+
+
+class JobStatusLightSerializer(serializers.ModelSerializer):
+    """
+    Serializes only the fields needed to track a job's progress.
+    """
+
+    class Meta:
+        model = JobStatus
+        fields = ('job_uuid', 'status', 'progress')
@@ -0,0 +1,5 @@
+# -*- coding: utf-8 -*-
+from django.dispatch import Signal
+
+# Sent after a job was enqueued.  Arguments: job_name, job_status, job, payload_size (bytes)
+job_enqueued = Signal(providing_args=['job_name', 'job_status', 'job', 'payload_size'])
@@ -1,35 +1,188 @@
 (function($) {
+    var getCookie = function(name) {
+        var match = document.cookie.match(new RegExp('(^|;)\\s*' + name + '=([^;]*)'));
+        return match ? decodeURIComponent(match[2]) : null;
+    };
+
     $(document).ready(function() {
+        var jobResult = $("#job-result");
+
+        if (jobResult.length > 0) {
+            jobResult.load(jobResult.data('job-result-url'));
+        }
+
         var jobStatus = $("#job-status");
 
         if (jobStatus.length > 0) {
             var statusUrl = jobStatus.data('job-status-url'),
-                progressBar = $("#progress-bar");
-            if (statusUrl) {
-                var timerId = setInterval(function() {
+                waitUrl = jobStatus.data('job-status-wait-url'),
+                progressBar = $("#progress-bar"),
+                waitingLabel = $("#job-waiting"),
+                scheduledLabel = $("#job-scheduled"),
+                minPollDelay = 500,
+                maxPollDelay = 10000,
+                pollDelay = minPollDelay,
+                lastStatus = null,
+                lastProgress = null,
+                paused = [];
+
+            // Updates the progress bar and returns true once the job is done
+            var handleStatus = function(data) {
+                if (data.hasOwnProperty('progress')) {
+                    lastProgress = data.progress;
+                    if (data.progress > 0) {
+                        progressBar.val(data.progress);
+                    }
+                }
+                if (data.hasOwnProperty('status')) {
+                    lastStatus = data.status;
+                    waitingLabel.prop('hidden', data.status !== 'WAITING');
+                    scheduledLabel.prop('hidden', data.status !== 'SCHEDULED');
+                    if (data.status === 'FINISHED' || data.status === 'FAILED' || data.status === 'CANCELLED') {
+                        location.reload();
+                        return true;
+                    }
+                }
+                return false;
+            };
+
+            // Runs request after delay unless the tab is hidden, in which case it runs once the tab is visible again.
+            // The status and the log loop each pause their next request, so paused keeps all of them
+            var schedule = function(request, delay) {
+                setTimeout(function() {
+                    if (document.hidden) {
+                        paused.push(request);
+                    } else {
+                        request();
+                    }
+                }, delay);
+            };
+
+            $(document).on('visibilitychange', function() {
+                if (!document.hidden && paused.length > 0) {
+                    var requests = paused;
+                    paused = [];
+                    $.each(requests, function(index, request) {
+                        request();
+                    });
+                }
+            });
+
+            // Polling backs off exponentially while nothing changes and resets once status or progress move
+            var poll = function() {
+                $.ajax({
+                    type: "GET",
+                    url: statusUrl,
+                    dataType: 'json',
+                    ifModified: true,
+                    success: function(data, textStatus, jqXHR) {
+                        if (textStatus === 'notmodified' || !data ||
+                                (data.status === lastStatus && data.progress === lastProgress)) {
+                            pollDelay = Math.min(pollDelay * 2, maxPollDelay);
+                        } else {
+                            pollDelay = minPollDelay;
+                            if (handleStatus(data)) {
+                                return;
+                            }
+                        }
+                        schedule(poll, pollDelay);
+                    },
+                    error: function(jqXHR, textStatus, errorThrown) {
+                        location.reload();
+                    }
+                });
+            };
+
+            // Long polling: the server answers as soon as status or progress change
+            var wait = function() {
+                var params = {};
+                if (lastStatus !== null) {
+                    params.status = lastStatus;
+                    params.progress = lastProgress;
+                }
+                $.ajax({
+                    type: "GET",
+                    url: waitUrl,
+                    data: params,
+                    dataType: 'json',
+                    timeout: 60000,
+                    success: function(data, textStatus, jqXHR) {
+                        if (!handleStatus(data)) {
+                            schedule(wait, 0);
+                        }
+                    },
+                    error: function(jqXHR, textStatus, errorThrown) {
+                        // Fall back to polling if long polling isn't available
+                        schedule(poll, pollDelay);
+                    }
+                });
+            };
+
+            $("#job-cancel").on('click', function() {
+                var button = $(this);
+                if (!window.confirm(button.data('confirm'))) {
+                    return;
+                }
+                button.prop('disabled', true);
+                $.ajax({
+                    type: "POST",
+                    url: button.data('job-cancel-url'),
+                    headers: {'X-CSRFToken': getCookie('csrftoken')},
+                    dataType: 'json',
+                    complete: function() {
+                        // The page shows the cancelled job, or the result if the job finished in the meantime
+                        location.reload();
+                    }
+                });
+            });
+
+            // Tails the job's log by offset, only lines the page has not shown yet are requested
+            var jobLog = $("#job-log");
+
+            if (jobLog.length > 0) {
+                var logUrl = jobLog.data('job-log-url'),
+                    maxLogDelay = jobLog.data('job-log-poll-interval') * 1000,
+                    logDelay = minPollDelay,
+                    logOffset = 0;
+
+                var tail = function() {
                     $.ajax({
                         type: "GET",
-                        url: statusUrl,
+                        url: logUrl,
+                        data: {offset: logOffset},
                         dataType: 'json',
-                        success: function(data, textStatus, jqXHR) {
-                            if (data.hasOwnProperty('progress')) {
-                                if (data.progress > 0) {
-                                    progressBar.val(data.progress);
-                                }
+                        success: function(data) {
+                            var log = jobLog.get(0),
+                                atBottom = log.scrollHeight - log.scrollTop - log.clientHeight < 5,
+                                text = '';
+                            if (data.offset > logOffset) {
+                                text += interpolate(jobLog.data('job-log-dropped'), [data.offset - logOffset]) + '\n';
+                            }
+                            if (data.lines.length > 0) {
+                                text += data.lines.join('\n') + '\n';
                             }
-                            if (data.hasOwnProperty('status')) {
-                                if (data.status === 'FINISHED' || data.status === 'FAILED') {
-                                    clearInterval(timerId);
-                                    location.reload();
+                            if (text) {
+                                jobLog.append(document.createTextNode(text)).prop('hidden', false);
+                                if (atBottom) {
+                                    log.scrollTop = log.scrollHeight;
                                 }
                             }
-                        },
-                        error: function(jqXHR, textStatus, errorThrown) {
-                            clearInterval(timerId);
-                            location.reload();
+                            logOffset = data.offset + data.lines.length;
+                            // Running jobs are tailed, quicker while they log
+                            if (statusUrl) {
+                                logDelay = data.lines.length > 0 ? minPollDelay : Math.min(logDelay * 2, maxLogDelay);
+                                schedule(tail, logDelay);
+                            }
                         }
                     });
-                }, 500);
+                };
+                tail();
+            }
+
+            if (waitUrl) {
+                schedule(wait, 0);
+            } else if (statusUrl) {
+                schedule(poll, pollDelay);
             }
         }
     });
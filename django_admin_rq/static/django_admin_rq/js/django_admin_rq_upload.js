@@ -0,0 +1,99 @@
+(function($) {
+    var maxRetries = 5;
+
+    var getCookie = function(name) {
+        var match = document.cookie.match(new RegExp('(^|;)\\s*' + name + '=([^;]*)'));
+        return match ? decodeURIComponent(match[2]) : null;
+    };
+
+    var upload = function(container, file) {
+        var hidden = container.find('input[type=hidden]'),
+            progress = container.find('progress'),
+            submit = container.closest('form').find('input[type=submit]'),
+            chunkSize = parseInt(container.data('chunk-size'), 10),
+            headers = {'X-CSRFToken': getCookie('csrftoken')},
+            retries = 0,
+            uploadId = null;
+
+        var done = function(success) {
+            hidden.val(success ? uploadId : '');
+            submit.prop('disabled', false);
+        };
+
+        // Resumes at the offset the server has after a failed request
+        var resume = function(url) {
+            if (retries++ >= maxRetries) {
+                done(false);
+                return;
+            }
+            setTimeout(function() {
+                $.ajax({
+                    type: 'GET',
+                    url: url,
+                    dataType: 'json',
+                    success: function(data) {
+                        send(url, data.offset);
+                    },
+                    error: function() {
+                        resume(url);
+                    }
+                });
+            }, 1000 * retries);
+        };
+
+        var send = function(url, offset) {
+            if (offset >= file.size) {
+                progress.val(100);
+                done(true);
+                return;
+            }
+            var end = Math.min(offset + chunkSize, file.size);
+            $.ajax({
+                type: 'PUT',
+                url: url,
+                data: file.slice(offset, end),
+                processData: false,
+                contentType: 'application/octet-stream',
+                dataType: 'json',
+                headers: $.extend({'Content-Range': 'bytes ' + offset + '-' + (end - 1) + '/' + file.size}, headers),
+                success: function(data) {
+                    retries = 0;
+                    progress.val(data.offset * 100 / file.size);
+                    send(url, data.offset);
+                },
+                error: function() {
+                    resume(url);
+                }
+            });
+        };
+
+        hidden.val('');
+        progress.val(0);
+        submit.prop('disabled', true);
+        $.ajax({
+            type: 'POST',
+            url: container.data('upload-url'),
+            data: {name: file.name, size: file.size},
+            dataType: 'json',
+            headers: headers,
+            success: function(data) {
+                uploadId = data.upload_id;
+                send(data.url, data.offset);
+            },
+            error: function() {
+                done(false);
+            }
+        });
+    };
+
+    $(document).ready(function() {
+        $('.admin-rq-chunked-upload').each(function() {
+            var container = $(this);
+            container.find('input[type=file]').on('change', function() {
+                if (this.files.length > 0) {
+                    upload(container, this.files[0]);
+                }
+            });
+        });
+    });
+})(django.jQuery);
@@ -0,0 +1,195 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+import hashlib
+import os
+import posixpath
+import time
+from collections import Counter
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.files.storage import FileSystemStorage, get_storage_class
+from django.db.models import F
+from django.utils import six, timezone
+
+from django_admin_rq import conf
+
+# Directories of job_file_storage files are saved in, pruning only deletes untracked files below them
+JOB_FILE_DIRECTORIES = ('uploads', 'cas')
+
+if conf.FILE_STORAGE:
+    job_file_storage = get_storage_class(conf.FILE_STORAGE)()
+else:
+    job_file_storage = FileSystemStorage(os.path.join(settings.MEDIA_ROOT, 'django_admin_rq'))
+    if not os.path.isdir(job_file_storage.location):
+        os.makedirs(job_file_storage.location)
+
+
+def save_job_file(uploaded_file):
+    """
+    Saves an uploaded file to :data:`job_file_storage`, tracks it with a :class:`~django_admin_rq.models.JobFile`
+    and returns its name.
+    With ``DJANGO_ADMIN_RQ_DEDUPLICATE_FILES`` the file is hashed first and only saved if no file with the same
+    content is stored yet.
+    """
+    from django_admin_rq.models import JobFile
+
+    if not conf.DEDUPLICATE_FILES:
+        name = job_file_storage.save(posixpath.join('uploads', uploaded_file.name), uploaded_file)
+        JobFile.objects.create(name=name, size=uploaded_file.size or 0)
+        return name
+
+    # Chunked uploads are hashed when their last chunk arrives
+    digest = getattr(uploaded_file, 'digest', None) or get_file_digest(uploaded_file)
+    job_file = JobFile.objects.filter(digest=digest).first()
+    if job_file is not None and job_file_storage.exists(job_file.name):
+        job_file.save(update_fields=['last_used_on'])
+        return job_file.name
+
+    extension = os.path.splitext(uploaded_file.name)[1].lower()
+    name = job_file_storage.save('cas/{}/{}{}'.format(digest[:2], digest, extension), uploaded_file)
+    job_file, created = JobFile.objects.get_or_create(
+        digest=digest, defaults={'name': name, 'size': uploaded_file.size or 0}
+    )
+    if not created:
+        if job_file_storage.exists(job_file.name):
+            # A concurrent upload of the same content was stored first, keep its file
+            job_file_storage.delete(name)
+            job_file.save(update_fields=['last_used_on'])
+        else:
+            JobFile.objects.filter(pk=job_file.pk).update(name=name, size=uploaded_file.size or 0)
+            job_file.name = name
+    return job_file.name
+
+
+def get_file_digest(uploaded_file):
+    """
+    Returns the sha256 hex digest of the file's content.
+    """
+    sha256 = hashlib.sha256()
+    for chunk in uploaded_file.chunks():
+        sha256.update(chunk)
+    return sha256.hexdigest()
+
+
+def _group_by_count(names):
+    """
+    Returns pairs of a count and the names that occur that many times in names.
+    """
+    groups = {}
+    for name, count in Counter(names).items():
+        groups.setdefault(count, []).append(name)
+    return groups.items()
+
+
+def acquire_files(names):
+    """
+    Increments the reference count of the files among names with one query per number of occurrences.
+    """
+    from django_admin_rq.models import JobFile
+
+    for count, group in _group_by_count(names):
+        JobFile.objects.filter(name__in=group).update(ref_count=F('ref_count') + count, last_used_on=timezone.now())
+
+
+def release_files(names):
+    """
+    Decrements the reference count of the files among names with one query per number of occurrences.
+    """
+    from django_admin_rq.models import JobFile
+
+    for count, group in _group_by_count(names):
+        JobFile.objects.filter(name__in=group, ref_count__gte=count).update(ref_count=F('ref_count') - count)
+
+
+def delete_unused_files(max_age):
+    """
+    Deletes the files no job status references and that weren't used in max_age seconds.
+    Returns the names of the deleted files.
+    """
+    from django_admin_rq.models import JobFile
+
+    cutoff = timezone.now() - timedelta(seconds=max_age)
+    deleted = []
+    unused_files = JobFile.objects.filter(ref_count=0, last_used_on__lt=cutoff).order_by()
+    for pk, name in unused_files.values_list('pk', 'name').iterator():
+        # The row is only deleted if the file wasn't referenced again in the meantime
+        if JobFile.objects.filter(pk=pk, ref_count=0, last_used_on__lt=cutoff).delete()[0]:
+            job_file_storage.delete(name)
+            deleted.append(name)
+    return deleted
+
+
+def get_file_value(name):
+    """
+    Returns the value serialized form data holds for a stored file.
+    That's the file's local path if the storage has one, its name in :data:`job_file_storage` otherwise.
+    """
+    try:
+        return job_file_storage.path(name)
+    except NotImplementedError:
+        return name
+
+
+def get_file_age(name):
+    """
+    Returns the seconds since the stored file was last modified.
+    """
+    try:
+        return time.time() - os.path.getmtime(job_file_storage.path(name))
+    except NotImplementedError:
+        return (timezone.now() - job_file_storage.get_modified_time(name)).total_seconds()
+
+
+def get_form_data_files(form_data):
+    """
+    Returns the names of the files in :data:`job_file_storage` referenced by serialized form data.
+    """
+    names = []
+    for field_data in form_data:
+        value = field_data.get('value')
+        name = field_data.get('file_name') or field_data.get('display_value')
+        if isinstance(value, six.string_types) and name and value == get_file_value(name):
+            names.append(name)
+    return names
+
+
+def delete_unreferenced_files(names):
+    """
+    Deletes the given files unless they are tracked by a :class:`~django_admin_rq.models.JobFile`, which
+    :func:`delete_unused_files` deletes once no job status references them.  Looks all files up with one query.
+    Returns the names of the deleted files.
+    """
+    from django_admin_rq.models import JobFile
+
+    tracked = set(JobFile.objects.filter(name__in=names).values_list('name', flat=True))
+    deleted = [name for name in names if name not in tracked]
+    for name in deleted:
+        job_file_storage.delete(name)
+    return deleted
+
+
+def iter_stored_files(path=''):
+    """
+    Yields the names of all files in :data:`job_file_storage` below path, including subdirectories.
+    """
+    try:
+        directories, files = job_file_storage.listdir(path)
+    except (IOError, OSError):
+        return  # Nothing was saved below path yet
+    for name in files:
+        yield posixpath.join(path, name)
+    for directory in directories:
+        for name in iter_stored_files(posixpath.join(path, directory)):
+            yield name
+
+
+def iter_job_files():
+    """
+    Yields the names of the files in the :data:`JOB_FILE_DIRECTORIES` of :data:`job_file_storage`.
+    Other files in the storage are never touched, even if it is shared.
+    """
+    for directory in JOB_FILE_DIRECTORIES:
+        for name in iter_stored_files(directory):
+            yield name
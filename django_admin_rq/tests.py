@@ -1,3 +1,1225 @@
-from django.test import TestCase
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
 
-# Create your tests here.
+import gzip
+import hashlib
+import io
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+import warnings
+from datetime import datetime, timedelta
+from unittest import skipUnless
+
+try:
+    from unittest import mock
+except ImportError:  # Python 2
+    import mock
+
+try:
+    import fakeredis
+except ImportError:
+    fakeredis = None
+
+import django_rq
+from django.contrib.admin import AdminSite, ModelAdmin
+from django.contrib.auth.models import Group, User
+from django.core.exceptions import ValidationError
+from django.core.files.base import ContentFile
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.urlresolvers import reverse
+from django.db import IntegrityError, OperationalError
+from django.test import RequestFactory, TestCase, override_settings
+from django.utils import six, timezone
+from django.utils.encoding import force_text
+from django.utils.six.moves import cPickle as pickle
+from redis import WatchError
+from rq.job import JobStatus as RQJobStatus
+from rq.registry import StartedJobRegistry
+
+from django_admin_rq import conf
+from django_admin_rq.admin import JobAdminMixin
+from django_admin_rq.artifacts import RedisArtifactCache
+from django_admin_rq.backends import DatabaseStatusBackend, RedisStatusBackend, get_status_channel, zadd
+from django_admin_rq.exceptions import JobCancelled, exception_handler
+from django_admin_rq.jobs import (
+    create_job, get_job_callable_queue, get_job_decorator, release_semaphores, run_with_concurrency_limits,
+    wake_waiting_jobs
+)
+from django_admin_rq.locks import acquire_semaphore, claim_idempotency_key, refresh_semaphore, release_semaphore
+from django_admin_rq.logs import append_log, read_log
+from django_admin_rq.maintenance import prune_job_statuses
+from django_admin_rq.models import (
+    JobFile, JobRun, JobStatus, STATUS_CANCELLED, STATUS_FAILED, STATUS_FINISHED, STATUS_QUEUED, STATUS_SCHEDULED,
+    STATUS_STARTED, STATUS_WAITING
+)
+from django_admin_rq.payloads import LazyJobStatus
+from django_admin_rq.retry import RetryPolicy
+from django_admin_rq.scheduler import (
+    enqueue_due_jobs, get_next_window_start, record_scheduler_heartbeat, schedule_job
+)
+from django_admin_rq.serialization import (
+    decode_ranges, deserialize_form_data, deserialize_queryset, encode_ranges, parse_queryset_reference,
+    serialize_instance, serialize_queryset
+)
+from django_admin_rq.storage import (
+    acquire_files, delete_unused_files, iter_stored_files, job_file_storage, release_files, save_job_file
+)
+from django_admin_rq.uploads import ChunkedUpload, ChunkedUploadError
+
+
+@django_rq.job('low', timeout=123, result_ttl=45)
+def decorated_job(value):
+    return value
+
+
+@skipUnless(fakeredis, 'The tests need fakeredis.')
+class RedisTestCase(TestCase):
+    """
+    Runs every test against an empty in-memory redis shared by django-admin-rq's own keys and all rq queues.
+    The queues the tests use exist whatever RQ_QUEUES the host project configures.
+    """
+    queues = {
+        'default': {'HOST': 'localhost', 'PORT': 6379, 'DB': 0},
+        'low': {'HOST': 'localhost', 'PORT': 6379, 'DB': 0},
+    }
+
+    def setUp(self):
+        self.redis = fakeredis.FakeStrictRedis()
+        self.redis.flushall()
+        settings_override = override_settings(RQ_QUEUES=self.queues)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        # django_rq reads RQ_QUEUES once on import
+        patcher = mock.patch.dict('django_rq.settings.QUEUES', self.queues)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        for target in ('django_rq.get_connection', 'django_rq.queues.get_redis_connection'):
+            patcher = mock.patch(target, return_value=self.redis)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        # The decorator resolved its queue at import time, if the queue was configured then
+        decorator = get_job_decorator(decorated_job)
+        if not isinstance(decorator.queue, six.string_types):
+            patcher = mock.patch.object(decorator.queue, 'connection', self.redis)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def use_status_backend(self, backend):
+        for target in ('django_admin_rq.models.get_status_backend', 'django_admin_rq.views.get_status_backend'):
+            patcher = mock.patch(target, return_value=backend)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        return backend
+
+
+class StatusBackendTest(RedisTestCase):
+
+    def test_database_backend_saves_progress(self):
+        self.use_status_backend(DatabaseStatusBackend())
+        job_status = JobStatus.objects.create()
+        job_status.set_progress(40)
+        self.assertEqual(JobStatus.objects.get(pk=job_status.pk).progress, 40)
+
+    def test_database_backend_saves_only_changed_columns(self):
+        self.use_status_backend(DatabaseStatusBackend())
+        job_status = JobStatus.objects.create()
+        JobStatus.objects.filter(pk=job_status.pk).update(result='written by the job')
+        job_status.set_progress(40)
+        job_status.start()
+        self.assertEqual(JobStatus.objects.get(pk=job_status.pk).result, 'written by the job')
+
+    def test_database_backend_publishes_updates(self):
+        self.use_status_backend(DatabaseStatusBackend())
+        job_status = JobStatus.objects.create()
+        pubsub = self.redis.pubsub(ignore_subscribe_messages=True)
+        pubsub.subscribe(get_status_channel(job_status.job_uuid))
+        pubsub.get_message()  # The subscription
+        job_status.set_progress(40)
+        message = pubsub.get_message()
+        self.assertEqual(json.loads(message['data'].decode('utf-8')), {'status': STATUS_QUEUED, 'progress': 40})
+
+    def test_redis_backend_keeps_progress_out_of_the_database(self):
+        backend = self.use_status_backend(RedisStatusBackend(self.redis))
+        job_status = JobStatus.objects.create()
+        job_status.set_progress(40)
+        self.assertEqual(JobStatus.objects.get(pk=job_status.pk).progress, 0)
+        self.assertEqual(backend.get(job_status.job_uuid), {'status': STATUS_QUEUED, 'progress': 40})
+
+    def test_redis_backend_saves_transitions(self):
+        backend = self.use_status_backend(RedisStatusBackend(self.redis))
+        job_status = JobStatus.objects.create()
+        job_status.start()
+        job_status.set_progress(100)
+        job_status.finish()
+        row = JobStatus.objects.get(pk=job_status.pk)
+        self.assertEqual((row.status, row.progress), (STATUS_FINISHED, 100))
+        self.assertIsNotNone(row.finished_on)
+        self.assertEqual(backend.get(job_status.job_uuid), {'status': STATUS_FINISHED, 'progress': 100})
+
+    def test_redis_backend_get_many(self):
+        backend = self.use_status_backend(RedisStatusBackend(self.redis))
+        started, queued = JobStatus.objects.create(), JobStatus.objects.create()
+        started.start()
+        self.assertEqual(
+            backend.get_many([started.job_uuid, queued.job_uuid, 'unknown']),
+            {started.job_uuid: {'status': STATUS_STARTED, 'progress': 0}}
+        )
+
+
+class ProgressReporterTest(RedisTestCase):
+
+    def setUp(self):
+        super(ProgressReporterTest, self).setUp()
+        self.backend = self.use_status_backend(RedisStatusBackend(self.redis))
+        self.job_status = JobStatus.objects.create()
+
+    def get_written_progress(self):
+        state = self.backend.get(self.job_status.job_uuid)
+        return state['progress'] if state else None
+
+    def test_small_steps_are_coalesced(self):
+        reporter = self.job_status.progress_reporter(min_delta=10, min_interval=60)
+        for progress in range(1, 10):
+            reporter.update(progress)
+        self.assertIsNone(self.get_written_progress())
+        reporter.update(10)
+        self.assertEqual(self.get_written_progress(), 10)
+
+    def test_interval_writes_pending_progress(self):
+        reporter = self.job_status.progress_reporter(min_delta=100, min_interval=0)
+        reporter.update(1)
+        self.assertEqual(self.get_written_progress(), 1)
+
+    def test_exit_flushes_pending_progress(self):
+        with self.job_status.progress_reporter(total=200, min_delta=10, min_interval=60) as progress:
+            for item in range(9):
+                progress.advance()
+        self.assertEqual(self.get_written_progress(), 4)
+        self.assertEqual(self.job_status.items_processed, 9)
+
+    @mock.patch.object(conf, 'PROGRESS_MIN_INTERVAL', 60)
+    @mock.patch.object(conf, 'PROGRESS_MIN_DELTA', 10)
+    def test_set_progress_coalesce(self):
+        self.job_status.set_progress(5, coalesce=True)
+        self.assertIsNone(self.get_written_progress())
+        self.job_status.set_progress(15, coalesce=True)
+        self.assertEqual(self.get_written_progress(), 15)
+
+
+class PruneJobStatusesTest(TestCase):
+
+    def setUp(self):
+        self.location = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.location)
+        patcher = mock.patch.object(job_file_storage, 'location', self.location)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def make_old(self, name):
+        old = time.time() - 3 * 86400
+        os.utime(job_file_storage.path(name), (old, old))
+
+    def test_deletes_released_files(self):
+        name = save_job_file(SimpleUploadedFile('data.csv', b'1,2,3'))
+        job_status = JobStatus.objects.create(status=STATUS_FINISHED)
+        job_status.set_input_files([name])
+        acquire_files([name])
+        JobStatus.objects.filter(pk=job_status.pk).update(created_on=timezone.now() - timedelta(days=3))
+        JobFile.objects.filter(name=name).update(last_used_on=timezone.now() - timedelta(days=3))
+        self.assertEqual(prune_job_statuses(max_age=86400), (1, 1))
+        self.assertFalse(job_file_storage.exists(name))
+        self.assertFalse(JobFile.objects.exists())
+
+    def test_keeps_referenced_files(self):
+        name = save_job_file(SimpleUploadedFile('data.csv', b'1,2,3'))
+        JobStatus.objects.create().set_input_files([name])
+        acquire_files([name])
+        JobFile.objects.filter(name=name).update(last_used_on=timezone.now() - timedelta(days=3))
+        self.make_old(name)
+        self.assertEqual(prune_job_statuses(max_age=86400), (0, 0))
+        self.assertTrue(job_file_storage.exists(name))
+
+    def test_deletes_untracked_files_in_subdirectories(self):
+        old_name = job_file_storage.save('cas/ab/orphan.csv', ContentFile(b'1'))
+        new_name = job_file_storage.save('cas/ab/recent.csv', ContentFile(b'2'))
+        self.make_old(old_name)
+        self.assertEqual(prune_job_statuses(max_age=86400), (0, 1))
+        self.assertFalse(job_file_storage.exists(old_name))
+        self.assertTrue(job_file_storage.exists(new_name))
+
+    def test_keeps_files_outside_the_package_directories(self):
+        # E.g. the site's own media in a shared storage
+        name = job_file_storage.save('photos/cat.jpg', ContentFile(b'1'))
+        self.make_old(name)
+        self.assertEqual(prune_job_statuses(max_age=86400), (0, 0))
+        self.assertTrue(job_file_storage.exists(name))
+
+    def test_deletes_only_stale_uploads(self):
+        with mock.patch.object(conf, 'UPLOAD_DIR', self.location):
+            upload = ChunkedUpload.create('data.csv', 6)
+            upload_paths = [upload.path, upload.meta_path]
+        other = os.path.join(self.location, 'notes.txt')
+        open(other, 'w').close()
+        old = time.time() - 3 * 86400
+        for path in upload_paths + [other]:
+            os.utime(path, (old, old))
+        with mock.patch.object(conf, 'UPLOAD_DIR', self.location):
+            ChunkedUpload.delete_stale(86400)
+        self.assertEqual([os.path.exists(path) for path in upload_paths], [False, False])
+        self.assertTrue(os.path.exists(other))
+
+
+class ChunkedUploadTest(TestCase):
+
+    def setUp(self):
+        upload_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, upload_dir)
+        patcher = mock.patch.object(conf, 'UPLOAD_DIR', upload_dir)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.admin = User.objects.create_user('admin', password='secret', is_staff=True)
+
+    def test_append_checks_the_offset(self):
+        upload = ChunkedUpload.create('data.csv', 6)
+        self.assertEqual(upload.append(0, io.BytesIO(b'abc'), 3), 3)
+        with self.assertRaises(ChunkedUploadError):
+            upload.append(0, io.BytesIO(b'abc'), 3)
+        self.assertEqual(upload.append(3, io.BytesIO(b'def'), 3), 6)
+        self.assertTrue(upload.is_complete())
+
+    def test_append_rejects_chunks_beyond_the_size(self):
+        upload = ChunkedUpload.create('data.csv', 2)
+        with self.assertRaises(ChunkedUploadError):
+            upload.append(0, io.BytesIO(b'abc'), 3)
+        self.assertEqual(upload.offset, 0)
+
+    def test_uploaded_file_is_opened_on_read(self):
+        upload = ChunkedUpload.create('data.csv', 3)
+        upload.append(0, io.BytesIO(b'abc'), 3)
+        uploaded_file = upload.as_uploaded_file()
+        self.assertIsNone(uploaded_file._file)
+        self.assertEqual(b''.join(uploaded_file.chunks()), b'abc')
+        uploaded_file.close()
+        self.assertTrue(uploaded_file.closed)
+
+    def test_upload_views_need_staff(self):
+        User.objects.create_user('user', password='secret')
+        self.client.login(username='user', password='secret')
+        response = self.client.post(reverse('admin-rq-upload'), {'name': 'data.csv', 'size': 3})
+        self.assertEqual(response.status_code, 403)
+
+    @mock.patch.object(conf, 'UPLOAD_MAX_SIZE', 2)
+    def test_upload_size_is_limited(self):
+        self.client.login(username='admin', password='secret')
+        response = self.client.post(reverse('admin-rq-upload'), {'name': 'data.csv', 'size': 3})
+        self.assertEqual(response.status_code, 413)
+        response = self.client.post(reverse('admin-rq-upload'), {'name': 'data.csv', 'size': 2})
+        self.assertEqual(response.status_code, 201)
+
+
+@mock.patch.object(conf, 'DEDUPLICATE_FILES', True)
+class DeduplicatedFileTest(TestCase):
+
+    def setUp(self):
+        self.location = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.location)
+        for target, value in ((job_file_storage, 'location'), (conf, 'UPLOAD_DIR')):
+            patcher = mock.patch.object(target, value, self.location)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def test_same_content_is_stored_once(self):
+        first = save_job_file(SimpleUploadedFile('a.csv', b'1,2,3'))
+        second = save_job_file(SimpleUploadedFile('b.csv', b'1,2,3'))
+        self.assertEqual(first, second)
+        self.assertEqual(JobFile.objects.count(), 1)
+
+    def test_concurrent_duplicate_is_deleted(self):
+        content = b'1,2,3'
+        digest = hashlib.sha256(content).hexdigest()
+        name = job_file_storage.save('cas/{}/{}.csv'.format(digest[:2], digest), ContentFile(content))
+        real_filter = JobFile.objects.filter
+
+        def filter_missing_row(*args, **kwargs):
+            # The other upload's row is created after this upload looked for it
+            if kwargs == {'digest': digest} and not JobFile.objects.exists():
+                JobFile.objects.create(digest=digest, name=name)
+                return JobFile.objects.none()
+            return real_filter(*args, **kwargs)
+
+        with mock.patch.object(JobFile.objects, 'filter', side_effect=filter_missing_row):
+            self.assertEqual(save_job_file(SimpleUploadedFile('a.csv', content)), name)
+        self.assertEqual(list(iter_stored_files()), [name])
+
+    def test_chunked_upload_is_hashed_on_completion(self):
+        upload = ChunkedUpload.create('data.csv', 6)
+        upload.append(0, io.BytesIO(b'abc'), 3)
+        self.assertIsNone(ChunkedUpload.load(upload.upload_id).digest)
+        upload.append(3, io.BytesIO(b'def'), 3)
+        uploaded_file = ChunkedUpload.load(upload.upload_id).as_uploaded_file()
+        self.assertEqual(uploaded_file.digest, hashlib.sha256(b'abcdef').hexdigest())
+        with mock.patch('django_admin_rq.storage.get_file_digest') as get_file_digest:
+            name = save_job_file(uploaded_file)
+        get_file_digest.assert_not_called()
+        self.assertEqual(JobFile.objects.get().name, name)
+
+    def test_unused_files_are_deleted(self):
+        name = save_job_file(SimpleUploadedFile('a.csv', b'1,2,3'))
+        JobFile.objects.update(last_used_on=timezone.now() - timedelta(days=3))
+        acquire_files([name])
+        JobFile.objects.update(last_used_on=timezone.now() - timedelta(days=3))
+        self.assertEqual(delete_unused_files(86400), [])
+        release_files([name])
+        self.assertEqual(delete_unused_files(86400), [name])
+        self.assertFalse(job_file_storage.exists(name))
+
+
+class SerializationTest(TestCase):
+
+    def test_encode_ranges(self):
+        self.assertEqual(encode_ranges([10, 1, 2, 3, 7, 9, 3]), '1-3,7,9-10')
+        self.assertEqual(encode_ranges([5]), '5')
+        self.assertEqual(encode_ranges([]), '')
+
+    def test_decode_ranges(self):
+        self.assertEqual(decode_ranges('1-3,7,9-10'), ([(1, 3), (9, 10)], [7]))
+        self.assertEqual(decode_ranges(''), ([], []))
+
+    def test_queryset_round_trip(self):
+        users = [User.objects.create(username='user{}'.format(i)) for i in range(5)]
+        selected = [users[0], users[1], users[3]]
+        reference, count, model = serialize_queryset(User.objects.filter(pk__in=[user.pk for user in selected]))
+        self.assertEqual((count, model), (3, User))
+        queryset = deserialize_queryset(*parse_queryset_reference(reference))
+        self.assertEqual(set(queryset), set(selected))
+        self.assertFalse(deserialize_queryset('auth', 'user', 'r', '').exists())
+
+    def test_pickled_queryset_contains_no_rows(self):
+        for i in range(50):
+            User.objects.create(username='pickled-user-{}'.format(i))
+        reference, count, model = serialize_queryset(User.objects.all())
+        queryset = deserialize_queryset(*parse_queryset_reference(reference))
+        with self.assertNumQueries(0):
+            payload = pickle.dumps(({'users': queryset},), protocol=pickle.HIGHEST_PROTOCOL)
+        self.assertNotIn(b'pickled-user', payload)
+        self.assertLess(len(payload), 1024)
+        self.assertEqual(pickle.loads(payload)[0]['users'].count(), 50)
+
+    def test_derived_queryset_is_pickled_as_usual(self):
+        User.objects.create(username='first')
+        User.objects.create(username='second')
+        reference, count, model = serialize_queryset(User.objects.all())
+        queryset = deserialize_queryset(*parse_queryset_reference(reference)).filter(username='first')
+        self.assertEqual([user.username for user in pickle.loads(pickle.dumps(queryset))], ['first'])
+
+    def test_instances_are_loaded_with_one_query_per_model(self):
+        users = [User.objects.create(username='user{}'.format(i)) for i in range(20)]
+        groups = [Group.objects.create(name='group{}'.format(i)) for i in range(5)]
+        serialized_data = [
+            {'name': 'field{}'.format(i), 'value': serialize_instance(instance)}
+            for i, instance in enumerate(users + groups)
+        ]
+        with self.assertNumQueries(2):
+            form_data = deserialize_form_data(serialized_data)
+        self.assertEqual([field_data['value'] for field_data in form_data], users + groups)
+
+    def test_missing_instance(self):
+        user = User.objects.create(username='deleted')
+        serialized_data = [{'name': 'user', 'value': serialize_instance(user)}]
+        user.delete()
+        with self.assertRaises(User.DoesNotExist):
+            deserialize_form_data(serialized_data)
+
+
+class PayloadTest(RedisTestCase):
+
+    def test_lazy_job_status_pickles_its_uuid(self):
+        job_status = JobStatus.objects.create(job_name='lazy')
+        lazy_job_status = LazyJobStatus(job_status.job_uuid)
+        with self.assertNumQueries(0):
+            self.assertIsInstance(lazy_job_status, JobStatus)
+            lazy_job_status = pickle.loads(pickle.dumps(lazy_job_status, protocol=pickle.HIGHEST_PROTOCOL))
+        self.assertEqual(lazy_job_status.job_name, 'lazy')
+
+    def test_create_job_uses_the_decorator_options(self):
+        self.assertEqual(get_job_callable_queue(decorated_job).name, 'low')
+        job = create_job(django_rq.get_queue('default'), decorated_job, (1,))
+        self.assertEqual((job.origin, job.timeout, job.result_ttl), ('default', 123, 45))
+        self.assertFalse(job.exists(job.get_id(), connection=self.redis))
+
+
+@mock.patch.object(conf, 'FAN_OUT_REDUCE_INTERVAL', 60)
+class FanOutTest(RedisTestCase):
+
+    def setUp(self):
+        super(FanOutTest, self).setUp()
+        self.use_status_backend(DatabaseStatusBackend())
+        self.parent = JobStatus.objects.create()
+
+    def fan_out(self, chunks):
+        return self.parent.fan_out(decorated_job, chunks, queues=['default'])
+
+    def reload(self, job_status):
+        return JobStatus.objects.get(pk=job_status.pk)
+
+    def test_children_keep_the_order_of_the_chunks(self):
+        children = self.fan_out(['a', 'b', 'c'])
+        jobs = [django_rq.get_queue('default').fetch_job(child.job_id) for child in children]
+        self.assertEqual([job.args[1] for job in jobs], ['a', 'b', 'c'])
+        self.assertEqual(self.reload(self.parent).status, STATUS_STARTED)
+
+    def test_children_are_enqueued_with_their_job_ids_on_the_decorator_queue(self):
+        children = self.parent.fan_out(decorated_job, ['a', 'b'])
+        queue = get_job_callable_queue(decorated_job)
+        self.assertEqual(queue.job_ids, [child.job_id for child in children])
+        self.assertEqual(
+            [JobStatus.objects.get(pk=child.pk).job_id for child in children], [child.job_id for child in children]
+        )
+
+    def test_no_chunks_finish_the_parent(self):
+        self.assertEqual(self.fan_out([]), [])
+        self.assertEqual(self.reload(self.parent).status, STATUS_FINISHED)
+
+    def test_last_finished_child_finishes_the_parent(self):
+        children = self.fan_out([1, 2, 3])
+        for child in children[:2]:
+            child.start()
+            child.finish()
+        self.assertEqual(self.reload(self.parent).status, STATUS_STARTED)
+        children[2].start()
+        children[2].finish()
+        parent = self.reload(self.parent)
+        self.assertEqual((parent.status, parent.progress), (STATUS_FINISHED, 100))
+
+    def test_failed_child_fails_the_parent(self):
+        children = self.fan_out([1, 2])
+        children[0].start()
+        children[0].fail()
+        parent = self.reload(self.parent)
+        self.assertEqual(parent.status, STATUS_FAILED)
+        self.assertIn(children[0].job_uuid, parent.failure_reason)
+
+    def test_finish_keeps_a_cancellation(self):
+        job_status = JobStatus.objects.create()
+        job_status.start()
+        JobStatus.objects.get(pk=job_status.pk).cancel()
+        with self.assertRaises(JobCancelled):
+            job_status.finish()
+        self.assertEqual(self.reload(job_status).status, STATUS_CANCELLED)
+
+    def test_fail_keeps_a_cancellation(self):
+        job_status = JobStatus.objects.create()
+        job_status.start()
+        JobStatus.objects.get(pk=job_status.pk).cancel()
+        job_status.fail()
+        self.assertEqual(self.reload(job_status).status, STATUS_CANCELLED)
+
+    def test_cancel_cancels_the_children_in_batches(self):
+        children = self.fan_out(range(10))
+        grandchildren = children[0].fan_out(decorated_job, range(10), queues=['default'])
+        parent = self.reload(self.parent)
+        # The parent's update, one select and one update per level, and the final select of the empty level
+        with self.assertNumQueries(6):
+            parent.cancel()
+        statuses = JobStatus.objects.filter(pk__in=[job_status.pk for job_status in children + grandchildren])
+        self.assertEqual(set(statuses.values_list('status', flat=True)), {STATUS_CANCELLED})
+        self.assertTrue(all(job_status.is_cancel_requested() for job_status in children + grandchildren))
+        self.assertEqual(django_rq.get_queue('default').count, 0)
+
+    def test_progress_is_reduced_once_per_interval(self):
+        children = self.fan_out([1, 2])
+        self.redis.flushall()  # Forget the reduction of the parent's start
+        children[0].set_progress(50)
+        self.assertEqual(self.reload(self.parent).progress, 25)
+        with self.assertNumQueries(1):
+            children[1].set_progress(50)
+        self.assertEqual(self.reload(self.parent).progress, 25)
+        self.parent.update_from_children()
+        self.assertEqual(self.reload(self.parent).progress, 50)
+
+    def test_redis_progress_does_not_overwrite_a_transition(self):
+        backend = RedisStatusBackend(self.redis)
+        job_status = JobStatus.objects.create()
+        stale = JobStatus.objects.get(pk=job_status.pk)
+        job_status.status = STATUS_FINISHED
+        backend.set_status(job_status)
+        stale.progress = 80
+        backend.set_progress(stale)
+        self.assertEqual(backend.get(job_status.job_uuid), {'status': STATUS_FINISHED, 'progress': 80})
+
+
+class RetryTest(RedisTestCase):
+
+    def setUp(self):
+        super(RetryTest, self).setUp()
+        self.use_status_backend(DatabaseStatusBackend())
+        # Policies are built once per job name
+        patcher = mock.patch.dict('django_admin_rq.retry._policies', clear=True)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.queue = django_rq.get_queue('default')
+        self.job = self.queue.enqueue_call(
+            decorated_job, args=(1,), timeout=300, result_ttl=45, ttl=600, description='import 1',
+            meta={'source': 'test'}
+        )
+        self.job_status = JobStatus.objects.create(job_name='import', job_id=self.job.get_id())
+        self.job_status.start()
+
+    def handle_failure(self, exception):
+        try:
+            raise exception
+        except Exception:
+            return exception_handler(self.job, *sys.exc_info())
+
+    def test_policy(self):
+        policy = RetryPolicy(max_attempts=3, backoff=10, backoff_factor=3, max_backoff=60)
+        self.assertTrue(policy.should_retry(OperationalError(), 2))
+        self.assertFalse(policy.should_retry(OperationalError(), 3))
+        self.assertFalse(policy.should_retry(ValueError(), 1))
+        self.assertEqual([policy.get_delay(attempts) for attempts in (1, 2, 3)], [10, 30, 60])
+
+    def test_policy_exceptions_can_be_dotted_paths(self):
+        policy = RetryPolicy(exceptions=['django.core.exceptions.ValidationError', ValueError])
+        self.assertTrue(policy.should_retry(ValidationError('invalid'), 1))
+        self.assertTrue(policy.should_retry(ValueError(), 1))
+        self.assertFalse(policy.should_retry(OperationalError(), 1))
+
+    @mock.patch.object(conf, 'RETRY_POLICIES', {'import': {'backoff': 30}})
+    def test_retry_is_scheduled_after_its_backoff(self):
+        record_scheduler_heartbeat(5)
+        self.assertFalse(self.handle_failure(OperationalError()))
+        job_status = JobStatus.objects.get(pk=self.job_status.pk)
+        self.assertEqual((job_status.status, job_status.attempts), (STATUS_SCHEDULED, 2))
+        self.assertNotEqual(job_status.job_id, self.job.get_id())
+        self.assertEqual(enqueue_due_jobs(), 0)
+        self.assertEqual(enqueue_due_jobs(timezone.now() + timedelta(seconds=30)), 1)
+        self.assertEqual(JobStatus.objects.get(pk=self.job_status.pk).status, STATUS_QUEUED)
+
+    @mock.patch.object(conf, 'RETRY_POLICIES', {'import': {'backoff': 30}})
+    def test_retry_keeps_the_job_options(self):
+        record_scheduler_heartbeat(5)
+        self.handle_failure(OperationalError())
+        job = self.queue.fetch_job(JobStatus.objects.get(pk=self.job_status.pk).job_id)
+        self.assertEqual(
+            (job.func, job.args, job.timeout, job.result_ttl, job.ttl, job.description, job.meta),
+            (decorated_job, (1,), 300, 45, 600, 'import 1', {'source': 'test'})
+        )
+
+    @mock.patch.object(conf, 'RETRY_POLICIES', {'import': {'backoff': 30}})
+    @mock.patch('django_admin_rq.retry.logger')
+    def test_retry_is_enqueued_right_away_without_a_scheduler(self, logger):
+        self.assertFalse(self.handle_failure(OperationalError()))
+        self.assertTrue(logger.warning.called)
+        job_status = JobStatus.objects.get(pk=self.job_status.pk)
+        self.assertEqual((job_status.status, job_status.attempts), (STATUS_QUEUED, 2))
+        self.assertIn(job_status.job_id, self.queue.job_ids)
+
+    @mock.patch.object(conf, 'RETRY_POLICIES', {'import': {'max_attempts': 1}})
+    def test_last_attempt_fails(self):
+        self.handle_failure(OperationalError())
+        job_status = JobStatus.objects.get(pk=self.job_status.pk)
+        self.assertEqual((job_status.status, job_status.attempts), (STATUS_FAILED, 1))
+        self.assertIn('OperationalError', job_status.failure_reason)
+
+
+class SchedulerTest(RedisTestCase):
+
+    def setUp(self):
+        super(SchedulerTest, self).setUp()
+        self.use_status_backend(DatabaseStatusBackend())
+        self.queue = django_rq.get_queue('default')
+        record_scheduler_heartbeat(5)
+
+    def test_now_in_the_window_is_returned(self):
+        now = datetime(2020, 1, 1, 23, 0)
+        self.assertEqual(get_next_window_start(('22:00', '06:00'), now), now)
+        self.assertEqual(get_next_window_start(('22:00', '06:00'), datetime(2020, 1, 1, 5, 59)),
+                         datetime(2020, 1, 1, 5, 59))
+        self.assertEqual(get_next_window_start((datetime(2020, 1, 1, 1).time(), '03:00'), datetime(2020, 1, 1, 1, 0)),
+                         datetime(2020, 1, 1, 1, 0))
+
+    def test_next_start_of_the_window(self):
+        # Later today, tomorrow, and the end of a window is not in it
+        self.assertEqual(get_next_window_start(('22:00', '06:00'), datetime(2020, 1, 1, 12, 0)),
+                         datetime(2020, 1, 1, 22, 0))
+        self.assertEqual(get_next_window_start(('01:00', '03:00'), datetime(2020, 1, 1, 4, 0)),
+                         datetime(2020, 1, 2, 1, 0))
+        self.assertEqual(get_next_window_start(('22:00', '06:00'), datetime(2020, 1, 1, 6, 0)),
+                         datetime(2020, 1, 1, 22, 0))
+
+    @override_settings(USE_TZ=True, TIME_ZONE='Europe/Berlin')
+    def test_window_is_in_the_current_time_zone(self):
+        # 21:30 UTC is 22:30 in Berlin, in the window
+        now = timezone.make_aware(datetime(2020, 1, 1, 21, 30), timezone.utc)
+        self.assertEqual(get_next_window_start(('22:00', '06:00'), now), now)
+        next_start = get_next_window_start(('22:00', '06:00'), now - timedelta(hours=2))
+        self.assertEqual(next_start, timezone.make_aware(datetime(2020, 1, 1, 21, 0), timezone.utc))
+
+    def schedule(self, run_at):
+        job = schedule_job(self.queue, decorated_job, run_at, args=(1,))
+        job_status = JobStatus.objects.create(job_id=job.get_id())
+        job_status.schedule(run_at)
+        return job, job_status
+
+    def test_due_jobs_are_enqueued(self):
+        now = timezone.now()
+        due_job, due_status = self.schedule(now - timedelta(seconds=1))
+        later_job, later_status = self.schedule(now + timedelta(hours=1))
+        self.assertEqual(enqueue_due_jobs(now), 1)
+        self.assertEqual(self.queue.job_ids, [due_job.get_id()])
+        self.assertEqual(JobStatus.objects.get(pk=due_status.pk).status, STATUS_QUEUED)
+        self.assertEqual(JobStatus.objects.get(pk=later_status.pk).status, STATUS_SCHEDULED)
+        # Every due job is enqueued once
+        self.assertEqual(enqueue_due_jobs(now), 0)
+        self.assertEqual(enqueue_due_jobs(now + timedelta(hours=1)), 1)
+        self.assertEqual(self.queue.job_ids, [due_job.get_id(), later_job.get_id()])
+
+    def test_cancelled_jobs_are_not_enqueued(self):
+        job, job_status = self.schedule(timezone.now())
+        job_status.cancel()
+        self.assertEqual(enqueue_due_jobs(timezone.now() + timedelta(seconds=1)), 0)
+        self.assertEqual(self.queue.count, 0)
+        self.assertIsNone(self.queue.fetch_job(job.get_id()))
+        self.assertEqual(JobStatus.objects.get(pk=job_status.pk).status, STATUS_CANCELLED)
+
+    def test_jobs_without_job_status_are_enqueued(self):
+        job = schedule_job(self.queue, decorated_job, timezone.now(), args=(1,))
+        self.assertEqual(enqueue_due_jobs(timezone.now() + timedelta(seconds=1)), 1)
+        self.assertEqual(self.queue.job_ids, [job.get_id()])
+
+
+class IdempotencyKeyTest(RedisTestCase):
+
+    def test_free_key_is_claimed(self):
+        self.assertEqual(claim_idempotency_key('key', 'first', lambda holder: False), 'first')
+
+    def test_held_key_returns_the_holder(self):
+        claim_idempotency_key('key', 'first', lambda holder: False)
+        self.assertEqual(claim_idempotency_key('key', 'second', lambda holder: False), 'first')
+
+    def test_stale_key_is_taken_over(self):
+        claim_idempotency_key('key', 'first', lambda holder: False)
+        self.assertEqual(claim_idempotency_key('key', 'second', lambda holder: holder == 'first'), 'second')
+        self.assertEqual(claim_idempotency_key('key', 'third', lambda holder: False), 'second')
+
+    def test_contended_key_is_not_claimed(self):
+        claim_idempotency_key('key', 'first', lambda holder: False)
+        with mock.patch.object(self.redis.pipeline().__class__, 'execute', side_effect=WatchError):
+            self.assertIsNone(claim_idempotency_key('key', 'second', lambda holder: True))
+        self.assertEqual(claim_idempotency_key('key', 'third', lambda holder: False), 'first')
+
+
+
+class JobAliveTest(RedisTestCase):
+
+    def setUp(self):
+        super(JobAliveTest, self).setUp()
+        self.use_status_backend(DatabaseStatusBackend())
+        self.queue = django_rq.get_queue('default')
+        self.job = self.queue.enqueue(decorated_job, 1)
+        self.job_status = self.create_job_status(job_id=self.job.get_id())
+
+    def create_job_status(self, **kwargs):
+        job_status = JobStatus.objects.create(**kwargs)
+        # Past the grace period of a job status that was not enqueued yet
+        JobStatus.objects.filter(pk=job_status.pk).update(created_on=timezone.now() - timedelta(minutes=5))
+        return JobStatus.objects.get(pk=job_status.pk)
+
+    def start_job(self, expires_in):
+        self.job.set_status(RQJobStatus.STARTED)
+        zadd(self.redis, StartedJobRegistry(self.queue.name, connection=self.redis).key,
+             {self.job.get_id(): time.time() + expires_in})
+        self.job_status.start()
+
+    def test_queued_job_is_alive(self):
+        self.assertTrue(self.job_status.is_alive())
+
+    def test_started_job_is_alive_within_its_timeout(self):
+        self.start_job(60)
+        self.assertTrue(self.job_status.is_alive())
+
+    def test_started_job_of_a_killed_worker_is_not_alive(self):
+        self.start_job(-60)
+        self.assertFalse(self.job_status.is_alive())
+
+    def test_ended_or_missing_job_is_not_alive(self):
+        self.job.set_status(RQJobStatus.FAILED)
+        self.assertFalse(self.job_status.is_alive())
+        self.job.delete()
+        self.assertFalse(self.job_status.is_alive())
+        self.job_status.finish()
+        self.assertFalse(self.job_status.is_alive())
+
+    def test_new_job_status_is_alive_until_enqueued(self):
+        self.assertTrue(JobStatus.objects.create().is_alive())
+        self.assertFalse(self.create_job_status().is_alive())
+
+    def test_fanned_out_job_is_alive_while_a_chunk_job_is(self):
+        self.job.delete()
+        child = self.create_job_status(parent=self.job_status)
+        self.assertTrue(self.job_status.is_alive())
+        child.finish()
+        self.assertFalse(self.job_status.is_alive())
+
+    def test_duplicate_run_attaches_to_the_alive_holder(self):
+        admin = UserJobAdmin(User, AdminSite())
+        new_job_status = JobStatus.objects.create()
+        with mock.patch.object(admin, 'get_job_idempotency_key', return_value='key'):
+            self.assertIsNone(admin.get_duplicate_job_status(None, 'import', self.job_status.job_uuid))
+            self.assertEqual(admin.get_duplicate_job_status(None, 'import', new_job_status.job_uuid), self.job_status)
+            self.start_job(-60)
+            self.assertIsNone(admin.get_duplicate_job_status(None, 'import', new_job_status.job_uuid))
+
+class LogTest(RedisTestCase):
+
+    def test_lines_are_read_from_an_offset(self):
+        self.assertEqual(append_log('job', ['a', 'b']), 2)
+        self.assertEqual(append_log('job', ['c']), 3)
+        self.assertEqual(read_log('job'), (0, ['a', 'b', 'c'], 3))
+        self.assertEqual(read_log('job', 2), (2, ['c'], 3))
+        self.assertEqual(read_log('job', 3), (3, [], 3))
+
+    def test_nothing_is_appended_without_lines(self):
+        self.assertIsNone(append_log('job', []))
+        self.assertEqual(read_log('job'), (0, [], 0))
+
+    def test_dropped_lines_keep_the_offsets(self):
+        append_log('job', ['a', 'b', 'c'], max_length=2)
+        append_log('job', ['d'], max_length=2)
+        self.assertEqual(read_log('job'), (2, ['c', 'd'], 4))
+        self.assertEqual(read_log('job', 3), (3, ['d'], 4))
+
+    def test_concurrent_appends_return_no_lines(self):
+        append_log('job', ['a'])
+
+        def execute(pipe, *args, **kwargs):
+            pipe.reset()  # Like a transaction that failed on its watched key
+            raise WatchError
+
+        with mock.patch.object(self.redis.pipeline().__class__, 'execute', autospec=True, side_effect=execute):
+            self.assertEqual(read_log('job', 0), (0, [], 0))
+
+    def test_job_status_log(self):
+        job_status = JobStatus.objects.create()
+        job_status.log('first', 2)
+        self.assertEqual(job_status.get_log(), (0, ['first', '2'], 2))
+        self.assertEqual(JobStatus.objects.create().get_log(), (0, [], 0))
+
+
+class ConcurrencyLimitTest(RedisTestCase):
+
+    def setUp(self):
+        super(ConcurrencyLimitTest, self).setUp()
+        self.use_status_backend(DatabaseStatusBackend())
+        self.queue = django_rq.get_queue('default')
+        self.semaphores = [('imports', 1)]
+
+    def run_job(self, job_status, value):
+        args = (decorated_job, job_status.job_uuid, self.semaphores, value)
+        job = create_job(self.queue, run_with_concurrency_limits, args)
+        with mock.patch('django_admin_rq.jobs.get_current_job', return_value=job):
+            return run_with_concurrency_limits(*args)
+
+    def test_limited_job_is_enqueued_on_its_decorator_queue(self):
+        admin = UserJobAdmin(User, AdminSite())
+        job_status = JobStatus.objects.create(job_name='export')
+        with mock.patch.object(admin, 'get_job_args', return_value=(job_status, {}, {})), \
+                mock.patch.object(admin, 'get_job_semaphores', return_value=self.semaphores):
+            job = admin.enqueue_job(None, 'export', job_status, decorated_job)
+        self.assertEqual(job.func, run_with_concurrency_limits)
+        self.assertEqual(job.origin, 'low')
+        self.assertEqual(job.timeout, 123)
+
+    def test_semaphore_slots(self):
+        self.assertTrue(acquire_semaphore('imports', 2, 'first'))
+        self.assertTrue(acquire_semaphore('imports', 2, 'second'))
+        self.assertFalse(acquire_semaphore('imports', 2, 'third'))
+        release_semaphore('imports', 'first')
+        self.assertTrue(acquire_semaphore('imports', 2, 'third'))
+
+    def test_refresh_extends_the_slot(self):
+        acquire_semaphore('imports', 1, 'first', timeout=1)
+        self.assertTrue(refresh_semaphore('imports', 'first', timeout=60))
+        with mock.patch('time.time', return_value=time.time() + 30):
+            self.assertFalse(acquire_semaphore('imports', 1, 'second'))
+        self.assertFalse(refresh_semaphore('imports', 'second'))
+
+    def test_job_under_the_limit_runs(self):
+        job_status = JobStatus.objects.create()
+        self.assertEqual(self.run_job(job_status, 5), 5)
+        self.assertTrue(acquire_semaphore('imports', 1, 'other'))
+
+    def test_blocked_job_is_parked_until_a_slot_is_released(self):
+        acquire_semaphore('imports', 1, 'other')
+        job_status = JobStatus.objects.create()
+        self.assertIsNone(self.run_job(job_status, 5))
+        job_status = JobStatus.objects.get(pk=job_status.pk)
+        self.assertEqual(job_status.status, STATUS_WAITING)
+        self.assertEqual(self.queue.count, 0)
+        release_semaphores(self.semaphores, 'other')
+        self.assertEqual(self.queue.job_ids, [job_status.job_id])
+
+    def test_jobs_waiting_for_expired_slots_are_woken(self):
+        acquire_semaphore('imports', 1, 'crashed', timeout=1)
+        job_status = JobStatus.objects.create()
+        self.run_job(job_status, 5)
+        self.assertEqual(wake_waiting_jobs(), 0)
+        with mock.patch('time.time', return_value=time.time() + 2):
+            self.assertEqual(wake_waiting_jobs(), 1)
+        self.assertEqual(self.queue.count, 1)
+
+
+class RedisArtifactCacheTest(RedisTestCase):
+
+    def setUp(self):
+        super(RedisArtifactCacheTest, self).setUp()
+        self.cache = RedisArtifactCache(max_size=len(self.cache_dumps('x' * 100)) * 2)
+
+    def cache_dumps(self, value):
+        return RedisArtifactCache().dumps(value)
+
+    def total_size(self):
+        return int(self.redis.get(RedisArtifactCache.total_size_key) or 0)
+
+    def test_total_size_is_counted(self):
+        self.cache.set('a', 'x' * 100)
+        size = self.total_size()
+        self.cache.set('a', 'y' * 100)
+        self.assertEqual(self.total_size(), size)
+        self.cache.delete('a')
+        self.cache.delete('a')
+        self.assertEqual(self.total_size(), 0)
+
+    def test_least_recently_used_artifacts_are_evicted(self):
+        # Only the cache's clock, redis keeps its own
+        with mock.patch('django_admin_rq.artifacts.time') as clock:
+            clock.time.side_effect = [1, 2, 3, 4]
+            self.cache.set('a', 'x' * 100)
+            self.cache.set('b', 'x' * 100)
+            self.cache.get('a')
+            self.cache.set('c', 'x' * 100)
+        self.assertEqual(self.cache.get('a'), 'x' * 100)
+        self.assertIsNone(self.cache.get('b'))
+        self.assertEqual(self.cache.get('c'), 'x' * 100)
+        self.assertLessEqual(self.total_size(), self.cache.max_size)
+
+    def test_evict_forgets_expired_artifacts(self):
+        self.cache.set('a', 'x' * 100)
+        self.cache.set('b', 'x' * 100)
+        self.redis.delete(RedisArtifactCache.key_prefix + 'a')  # Expired
+        self.cache.set('c', 'x' * 100)
+        self.assertEqual(self.cache.get('b'), 'x' * 100)
+        self.assertEqual(self.redis.hkeys(RedisArtifactCache.sizes_key), [b'b', b'c'])
+
+
+class UserJobAdmin(JobAdminMixin, ModelAdmin):
+    pass
+
+
+class UserActionJobAdmin(UserJobAdmin):
+
+    def get_job_action_callable(self, job_name, request=None):
+        return decorated_job
+
+
+class JobActionTest(RedisTestCase):
+
+    def setUp(self):
+        super(JobActionTest, self).setUp()
+        self.use_status_backend(DatabaseStatusBackend())
+        self.admin = UserActionJobAdmin(User, AdminSite())
+        # The test project doesn't route this admin's workflow urls
+        patcher = mock.patch.object(self.admin, 'get_workflow_url', return_value='/run/')
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.request = RequestFactory().post('/')
+        self.request.user = User.objects.create_user('admin', password='secret')
+
+    def get_main_job_status(self):
+        return JobStatus.objects.get(parent=None)
+
+    def test_objects_are_chunked_by_the_default_chunk_size(self):
+        User.objects.bulk_create([User(username='user{}'.format(index)) for index in range(150)])
+        self.admin.run_job_action(self.request, 'reindex', User.objects.all())
+        children = self.get_main_job_status().children.all()
+        self.assertEqual(len(children), 2)
+        # On the queue of the callable's decorator
+        jobs = [django_rq.get_queue('low').fetch_job(child.job_id) for child in children]
+        self.assertEqual(sorted(len(job.args[1]) for job in jobs), [51, 100])
+        # The options of the callable's decorator apply to the chunk jobs
+        self.assertEqual([(job.timeout, job.result_ttl) for job in jobs], [(123, 45)] * 2)
+
+    def test_selecting_across_an_empty_changelist_finishes_right_away(self):
+        response = self.admin.run_job_action(self.request, 'reindex', User.objects.none())
+        self.assertEqual(response.status_code, 302)
+        job_status = self.get_main_job_status()
+        self.assertEqual((job_status.status, job_status.progress), (STATUS_FINISHED, 100))
+        self.assertFalse(job_status.children.exists())
+        self.assertEqual(django_rq.get_queue('low').count, 0)
+
+
+class JobRunTest(TestCase):
+
+    def setUp(self):
+        self.user = User.objects.create_user('admin', password='secret')
+        self.admin = UserJobAdmin(User, AdminSite())
+        self.job_run = JobRun.objects.create(run_id='a' * 32, job_name='export', user=self.user)
+        self.request = RequestFactory().get('/', {'job-id': self.job_run.run_id})
+        self.request.user = self.user
+
+    def test_session_names_are_deprecated_aliases(self):
+        with warnings.catch_warnings(record=True) as caught:
+            warnings.simplefilter('always')
+            self.assertEqual(self.admin.get_session_data(self.request, 'export'), self.job_run)
+            self.assertEqual(self.admin.get_session_form_data_as_list(self.request, 'export'), [])
+            self.assertEqual(self.admin.get_session_form_data_as_dict(self.request, 'export'), {})
+            self.assertIsNone(self.admin.get_session_job_status(self.request, 'export', 'main_run'))
+            job_status = JobStatus.objects.create()
+            self.admin.set_session_job_status(self.request, 'export', job_status, 'main_run')
+        self.assertEqual(self.admin.get_run_job_status(self.request, 'export', 'main_run'), job_status)
+        self.assertEqual([warning.category for warning in caught], [DeprecationWarning] * 5)
+
+    def test_concurrently_created_run_is_used(self):
+        request = RequestFactory().get('/', {'job-id': 'b' * 32})
+        request.user = self.user
+
+        # The concurrent request created the run after this one looked it up
+        JobRun.objects.create(run_id='b' * 32, job_name='export', user=self.user)
+        with mock.patch.object(JobRun.objects, 'get_or_create', side_effect=IntegrityError):
+            self.assertIsNone(self.admin.check_job_id(request, 'export'))
+        self.assertEqual(self.admin.get_job_run(request, 'export').run_id, 'b' * 32)
+
+
+@override_settings(ROOT_URLCONF='django_admin_rq.urls')
+class ViewTestCase(RedisTestCase):
+    """
+    Requests the views of django-admin-rq as a logged in staff user.
+    """
+
+    def setUp(self):
+        super(ViewTestCase, self).setUp()
+        self.user = User.objects.create_user('admin', password='secret', is_staff=True)
+        self.client.force_login(self.user)
+
+
+class JobStatusViewTest(ViewTestCase):
+
+    def setUp(self):
+        super(JobStatusViewTest, self).setUp()
+        self.backend = self.use_status_backend(RedisStatusBackend(self.redis))
+        self.job_status = JobStatus.objects.create()
+        self.job_status.start()
+
+    def test_unchanged_job_is_not_modified(self):
+        response = self.client.get(self.job_status.url())
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(json.loads(response.content.decode('utf-8'))['status'], STATUS_STARTED)
+        self.assertEqual(response['ETag'], '"STARTED-0"')
+        self.assertEqual(response['Cache-Control'], 'no-cache')
+
+        response = self.client.get(self.job_status.url(), HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.content, b'')
+        self.assertEqual(response['ETag'], '"STARTED-0"')
+
+    def test_progress_changes_the_etag(self):
+        etag = self.client.get(self.job_status.url())['ETag']
+        self.job_status.set_progress(40)
+        response = self.client.get(self.job_status.url(), HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(json.loads(response.content.decode('utf-8'))['progress'], 40)
+        self.assertEqual(response['ETag'], '"STARTED-40"')
+
+    def test_running_job_is_answered_from_the_status_backend(self):
+        self.job_status.set_progress(40)
+        # Only the session and the user are loaded
+        with self.assertNumQueries(2):
+            response = self.client.get(self.job_status.url(), HTTP_IF_NONE_MATCH='"STARTED-40"')
+        self.assertEqual(response.status_code, 304)
+
+    def test_finished_job_is_answered_with_its_summary(self):
+        self.job_status.finish()
+        response = self.client.get(self.job_status.url(), HTTP_IF_NONE_MATCH='"STARTED-0"')
+        self.assertEqual(response.status_code, 200)
+        data = json.loads(response.content.decode('utf-8'))
+        self.assertEqual((data['job_uuid'], data['status']), (self.job_status.job_uuid, STATUS_FINISHED))
+        self.assertEqual(response['ETag'], '"FINISHED-0"')
+
+    def test_unknown_job(self):
+        self.assertEqual(self.client.get(reverse('admin-rq-job-status', args=['unknown'])).status_code, 404)
+
+
+class JobStatusBatchViewTest(ViewTestCase):
+
+    def setUp(self):
+        super(JobStatusBatchViewTest, self).setUp()
+        self.backend = self.use_status_backend(RedisStatusBackend(self.redis))
+        self.url = reverse('admin-rq-job-status-batch')
+
+    def get_states(self, *args, **kwargs):
+        response = self.client.get(*args, **kwargs)
+        self.assertEqual(response.status_code, 200)
+        return json.loads(response.content.decode('utf-8'))
+
+    def test_states_are_returned_in_the_requested_order(self):
+        started, queued = JobStatus.objects.create(), JobStatus.objects.create()
+        started.start()
+        started.set_progress(40)
+        # The queued job is only in the database, the started one only in the status backend
+        states = self.get_states(self.url, {'job_uuid': [
+            '{},unknown'.format(queued.job_uuid), started.job_uuid, queued.job_uuid
+        ]})
+        self.assertEqual(states, [
+            {'job_uuid': queued.job_uuid, 'status': STATUS_QUEUED, 'progress': 0},
+            {'job_uuid': started.job_uuid, 'status': STATUS_STARTED, 'progress': 40},
+        ])
+
+    def test_backend_states_need_no_query(self):
+        job_statuses = [JobStatus.objects.create() for _ in range(3)]
+        for job_status in job_statuses:
+            job_status.start()
+        # Only the session and the user are loaded
+        with self.assertNumQueries(2):
+            states = self.get_states(self.url, {'job_uuid': ','.join(
+                job_status.job_uuid for job_status in job_statuses
+            )})
+        self.assertEqual([state['job_uuid'] for state in states], [job_status.job_uuid for job_status in job_statuses])
+
+    def test_too_many_jobs(self):
+        with mock.patch.object(conf, 'BATCH_STATUS_LIMIT', 2):
+            response = self.client.get(self.url, {'job_uuid': 'a,b,c'})
+        self.assertEqual(response.status_code, 400)
+
+    def test_no_jobs(self):
+        self.assertEqual(self.get_states(self.url), [])
+
+
+class JobStatusWaitViewTest(ViewTestCase):
+
+    def setUp(self):
+        super(JobStatusWaitViewTest, self).setUp()
+        self.use_status_backend(RedisStatusBackend(self.redis))
+        self.job_status = JobStatus.objects.create()
+        self.job_status.start()
+
+    def wait(self, message=None, **params):
+        """
+        Requests the wait view, whose subscription receives message, and returns the state and the subscription.
+        """
+        pubsub = mock.Mock()
+        pubsub.get_message.return_value = message
+        with mock.patch.object(self.redis, 'pubsub', return_value=pubsub):
+            response = self.client.get(self.job_status.wait_url(), params)
+        self.assertEqual(response.status_code, 200)
+        pubsub.subscribe.assert_called_once_with(get_status_channel(self.job_status.job_uuid))
+        pubsub.close.assert_called_once_with()
+        return json.loads(response.content.decode('utf-8')), pubsub
+
+    def test_changed_state_is_returned_right_away(self):
+        state, pubsub = self.wait(status=STATUS_QUEUED, progress=0, timeout=10)
+        self.assertEqual(state, {'job_uuid': self.job_status.job_uuid, 'status': STATUS_STARTED, 'progress': 0})
+        pubsub.get_message.assert_not_called()
+
+    def test_published_update_ends_the_wait(self):
+        message = {'type': 'message', 'data': json.dumps({'status': STATUS_STARTED, 'progress': 60})}
+        state, pubsub = self.wait(message, status=STATUS_STARTED, progress=0, timeout=10)
+        self.assertEqual(state['progress'], 60)
+        self.assertEqual(pubsub.get_message.call_count, 1)
+
+    def test_unchanged_state_is_returned_after_the_timeout(self):
+        state, pubsub = self.wait(status=STATUS_STARTED, progress=0, timeout=0.01)
+        self.assertEqual((state['status'], state['progress']), (STATUS_STARTED, 0))
+        self.assertTrue(pubsub.get_message.called)
+
+    def test_timeout_is_capped(self):
+        with mock.patch.object(conf, 'LONG_POLL_TIMEOUT', 0.01):
+            state, pubsub = self.wait(status=STATUS_STARTED, progress=0, timeout=600)
+        self.assertLessEqual(pubsub.get_message.call_args[1]['timeout'], 0.01)
+
+    def test_ended_job_is_not_waited_for(self):
+        self.job_status.finish()
+        state, pubsub = self.wait(status=STATUS_FINISHED, progress=0, timeout=10)
+        self.assertEqual(state['status'], STATUS_FINISHED)
+        pubsub.get_message.assert_not_called()
+
+
+class JobStatusResultViewTest(ViewTestCase):
+
+    def setUp(self):
+        super(JobStatusResultViewTest, self).setUp()
+        self.job_status = JobStatus.objects.create(status=STATUS_FINISHED, result='<p>{}</p>'.format('é' * 20))
+
+    def test_result_is_streamed_in_chunks(self):
+        with mock.patch.object(conf, 'RESULT_CHUNK_SIZE', 8):
+            response = self.client.get(self.job_status.result_url())
+            self.assertTrue(response.streaming)
+            chunks = [force_text(chunk) for chunk in response.streaming_content]
+        self.assertEqual(response['Content-Type'], 'text/html; charset=utf-8')
+        self.assertEqual([len(chunk) for chunk in chunks], [8, 8, 8, 3])
+        self.assertEqual(''.join(chunks), self.job_status.result)
+
+    def test_result_is_gzipped(self):
+        response = self.client.get(self.job_status.result_url(), HTTP_ACCEPT_ENCODING='gzip')
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        content = gzip.GzipFile(fileobj=io.BytesIO(b''.join(response.streaming_content))).read()
+        self.assertEqual(content.decode('utf-8'), self.job_status.result)
+
+    def test_empty_result(self):
+        JobStatus.objects.filter(pk=self.job_status.pk).update(result='')
+        response = self.client.get(self.job_status.result_url())
+        self.assertEqual(b''.join(response.streaming_content), b'')
+
+    def test_unknown_job(self):
+        self.assertEqual(self.client.get(reverse('admin-rq-job-result', args=['unknown'])).status_code, 404)
+
+
+class JobMetricsViewTest(ViewTestCase):
+
+    def setUp(self):
+        super(JobMetricsViewTest, self).setUp()
+        self.url = reverse('admin-rq-job-metrics')
+        now = timezone.now()
+        for job_name, status, wait, duration, finished_ago in (
+                ('import', STATUS_FINISHED, 1, 10, 60),
+                ('import', STATUS_FAILED, 3, 20, 60),
+                ('import', STATUS_FINISHED, 5, 30, 60 * 60 * 48),
+                ('export', STATUS_FINISHED, 2, 4, 60)):
+            finished_on = now - timedelta(seconds=finished_ago)
+            started_on = finished_on - timedelta(seconds=duration)
+            job_status = JobStatus.objects.create(
+                job_name=job_name, status=status, started_on=started_on, finished_on=finished_on,
+                items_processed=100
+            )
+            JobStatus.objects.filter(pk=job_status.pk).update(created_on=started_on - timedelta(seconds=wait))
+        parent = JobStatus.objects.get(job_name='export')
+        JobStatus.objects.create(job_name='export', status=STATUS_FINISHED, parent=parent, started_on=now,
+                                 finished_on=now)
+        JobStatus.objects.create(job_name='import', status=STATUS_STARTED, started_on=now)
+
+    def get_metrics(self, params=None):
+        response = self.client.get(self.url, params or {})
+        self.assertEqual(response.status_code, 200)
+        return dict((metrics['job_name'], metrics) for metrics in json.loads(response.content.decode('utf-8')))
+
+    def test_metrics_of_the_ended_jobs(self):
+        metrics = self.get_metrics()
+        self.assertEqual(sorted(metrics), ['export', 'export:chunk', 'import'])
+        self.assertEqual((metrics['import']['count'], metrics['import']['failed']), (2, 1))
+        self.assertEqual((metrics['import']['queue_wait_p50'], metrics['import']['queue_wait_p95']), (3, 3))
+        self.assertEqual((metrics['import']['run_duration_p50'], metrics['import']['run_duration_p95']), (20, 20))
+        self.assertEqual(metrics['import']['items_per_second_p50'], 10)
+        self.assertEqual(metrics['export:chunk']['count'], 1)
+
+    def test_max_age_and_job_names(self):
+        metrics = self.get_metrics({'max_age': 60 * 60 * 72, 'job_name': ['import', 'unknown']})
+        self.assertEqual(list(metrics), ['import'])
+        self.assertEqual(metrics['import']['count'], 3)
+        self.assertEqual(self.client.get(self.url, {'max_age': 'a day'}).status_code, 400)
+
+    def test_only_staff_users(self):
+        self.client.force_login(User.objects.create_user('user', password='secret'))
+        self.assertEqual(self.client.get(self.url).status_code, 403)
@@ -0,0 +1,199 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+import hashlib
+import json
+import os
+import re
+import time
+from uuid import uuid4
+
+from django.core.files import locks
+from django.core.files.uploadedfile import UploadedFile
+
+from django_admin_rq import conf
+
+_UPLOAD_ID_RE = re.compile(r'^[a-f0-9]{32}$')
+# The partial files, metadata and temporary metadata files of uploads
+_UPLOAD_FILE_RE = re.compile(r'^[a-f0-9]{32}\.(part|json|json\.[a-f0-9]{32}\.tmp)$')
+_READ_SIZE = 64 * 1024
+
+
+class ChunkedUploadError(Exception):
+    pass
+
+
+def get_upload_dir():
+    if not os.path.isdir(conf.UPLOAD_DIR):
+        os.makedirs(conf.UPLOAD_DIR)
+    return conf.UPLOAD_DIR
+
+
+class ChunkedUpload(object):
+    """
+    A file that is uploaded in chunks over several requests.
+    Chunks are appended to a partial file in ``DJANGO_ADMIN_RQ_UPLOAD_DIR``, an interrupted upload resumes at
+    :attr:`offset`.
+    """
+
+    def __init__(self, upload_id, name, size, user_id=None, digest=None):
+        self.upload_id = upload_id
+        self.name = name
+        self.size = size
+        self.user_id = user_id
+        # The sha256 hex digest of a completed upload with DJANGO_ADMIN_RQ_DEDUPLICATE_FILES
+        self.digest = digest
+
+    @classmethod
+    def create(cls, name, size, user_id=None):
+        upload = cls(uuid4().hex, os.path.basename(name), int(size), user_id)
+        upload.save_meta()
+        open(upload.path, 'wb').close()
+        return upload
+
+    def save_meta(self):
+        # Written to a temporary file first so load() never reads partial metadata
+        tmp_path = '{}.{}.tmp'.format(self.meta_path, uuid4().hex)
+        with open(tmp_path, 'w') as meta:
+            json.dump({'name': self.name, 'size': self.size, 'user_id': self.user_id, 'digest': self.digest}, meta)
+        os.rename(tmp_path, self.meta_path)
+
+    @classmethod
+    def load(cls, upload_id):
+        """
+        Returns the upload with the given id or None if it doesn't exist.
+        """
+        if not upload_id or not _UPLOAD_ID_RE.match(upload_id):
+            return None
+        upload = cls(upload_id, None, None)
+        try:
+            with open(upload.meta_path) as meta:
+                data = json.load(meta)
+        except (IOError, OSError, ValueError):
+            return None
+        upload.name, upload.size, upload.user_id = data['name'], data['size'], data['user_id']
+        upload.digest = data.get('digest')
+        return upload
+
+    @classmethod
+    def delete_stale(cls, max_age):
+        """
+        Deletes the partial files and metadata of uploads that weren't written to in max_age seconds.
+        Other files in the directory are kept.
+        """
+        directory = get_upload_dir()
+        cutoff = time.time() - max_age
+        for name in os.listdir(directory):
+            if not _UPLOAD_FILE_RE.match(name):
+                continue
+            path = os.path.join(directory, name)
+            if os.path.isfile(path) and os.path.getmtime(path) < cutoff:
+                os.remove(path)
+
+    @property
+    def path(self):
+        return os.path.join(get_upload_dir(), '{}.part'.format(self.upload_id))
+
+    @property
+    def meta_path(self):
+        return os.path.join(get_upload_dir(), '{}.json'.format(self.upload_id))
+
+    @property
+    def offset(self):
+        try:
+            return os.path.getsize(self.path)
+        except OSError:
+            return 0
+
+    def is_complete(self):
+        return self.offset == self.size
+
+    def append(self, offset, stream, length):
+        """
+        Appends length bytes read from stream at offset.  Returns the new offset.
+        Concurrent requests for the same upload are serialized by a lock on the partial file, a chunk is only appended
+        if offset still is the size of the file once the lock is held.
+        With ``DJANGO_ADMIN_RQ_DEDUPLICATE_FILES`` the request that completes the upload hashes it, so submitting the
+        form doesn't read the whole file again.
+        """
+        if offset + length > self.size:
+            raise ChunkedUploadError('The chunk exceeds the size of the upload.')
+        with open(self.path, 'ab') as destination:
+            locks.lock(destination, locks.LOCK_EX)
+            try:
+                current_offset = os.fstat(destination.fileno()).st_size
+                if offset != current_offset:
+                    raise ChunkedUploadError('Expected a chunk at offset {}.'.format(current_offset))
+                remaining = length
+                while remaining > 0:
+                    data = stream.read(min(_READ_SIZE, remaining))
+                    if not data:
+                        break
+                    destination.write(data)
+                    remaining -= len(data)
+                destination.flush()
+                if conf.DEDUPLICATE_FILES and offset + length - remaining == self.size:
+                    self.digest = self.get_digest()
+                    self.save_meta()
+            finally:
+                locks.unlock(destination)
+        return self.offset
+
+    def get_digest(self):
+        sha256 = hashlib.sha256()
+        with open(self.path, 'rb') as source:
+            for data in iter(lambda: source.read(_READ_SIZE), b''):
+                sha256.update(data)
+        return sha256.hexdigest()
+
+    def as_uploaded_file(self):
+        if not self.is_complete():
+            raise ChunkedUploadError('The upload is incomplete.')
+        return ChunkedUploadedFile(self)
+
+    def delete(self):
+        for path in (self.path, self.meta_path):
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+
+class ChunkedUploadedFile(UploadedFile):
+    """
+    A completed :class:`ChunkedUpload`.  Like Django's TemporaryUploadedFile it is moved into place by storages
+    instead of being copied.  The partial file is only opened once it is read, so a form that fails validation
+    leaves no open file behind.
+    """
+
+    def __init__(self, upload):
+        self.upload = upload
+        self.digest = upload.digest
+        self._file = None
+        super(ChunkedUploadedFile, self).__init__(None, upload.name, 'application/octet-stream', upload.size, None)
+
+    def _get_file(self):
+        if self._file is None:
+            self._file = open(self.upload.path, 'rb')
+        return self._file
+
+    def _set_file(self, file):
+        self._file = file
+
+    file = property(_get_file, _set_file)
+
+    @property
+    def closed(self):
+        return self._file is None or self._file.closed
+
+    def temporary_file_path(self):
+        return self.upload.path
+
+    def close(self):
+        if self._file is None:
+            return
+        try:
+            return self._file.close()
+        except OSError:
+            # The file was moved into place
+            pass
@@ -1,7 +1,33 @@
 # -*- coding: utf-8 -*-
 from django.conf.urls import url
+from django.views.decorators.gzip import gzip_page
+
 from django_admin_rq import views
 
 urlpatterns = [
+    url(r'^upload/$', views.ChunkedUploadView.as_view(), name='admin-rq-upload'),
+    url(r'^upload/(?P<upload_id>[a-f0-9]{32})/$', views.ChunkedUploadChunkView.as_view(), name='admin-rq-upload-chunk'),
+    url(r'^job/status/$', views.JobStatusBatchView.as_view(), name='admin-rq-job-status-batch'),
+    url(r'^job/metrics/$', views.JobMetricsView.as_view(), name='admin-rq-job-metrics'),
+    url(
+        r'^job/status/(?P<job_uuid>[a-zA-Z0-9-_]+)/wait/$',
+        views.JobStatusWaitView.as_view(),
+        name='admin-rq-job-status-wait'
+    ),
+    url(
+        r'^job/status/(?P<job_uuid>[a-zA-Z0-9-_]+)/cancel/$',
+        views.JobStatusCancelView.as_view(),
+        name='admin-rq-job-status-cancel'
+    ),
+    url(
+        r'^job/status/(?P<job_uuid>[a-zA-Z0-9-_]+)/log/$',
+        views.JobStatusLogView.as_view(),
+        name='admin-rq-job-status-log'
+    ),
+    url(
+        r'^job/result/(?P<job_uuid>[a-zA-Z0-9-_]+)/$',
+        gzip_page(views.JobStatusResultView.as_view()),
+        name='admin-rq-job-result'
+    ),
     url(r'^job/status/(?P<job_uuid>[a-zA-Z0-9-_]+)/', views.JobStatusView.as_view(), name='admin-rq-job-status'),
 ]
@@ -1,17 +1,293 @@
 # -*- coding: utf-8 -*-
+import json
+import re
+import time
+
+from django.core.urlresolvers import reverse
+from django.db.models.functions import Length, Substr
+from django.http import Http404, StreamingHttpResponse
+from django.utils.encoding import force_text
+from rest_framework import status
 from rest_framework.authentication import SessionAuthentication
-from rest_framework.permissions import IsAuthenticated
+from rest_framework.permissions import IsAdminUser, IsAuthenticated
 from rest_framework.response import Response
 from rest_framework.views import APIView
 
-from django_admin_rq.models import JobStatus
-from django_admin_rq.serializers import JobStatusSerializer
+from django_admin_rq import conf
+from django_admin_rq.backends import get_redis_connection, get_status_backend, get_status_channel
+from django_admin_rq.logs import read_log
+from django_admin_rq.metrics import get_job_metrics
+from django_admin_rq.models import ACTIVE_STATUSES, JobStatus, LARGE_FIELDS
+from django_admin_rq.serializers import JobStatusLightSerializer, JobStatusSummarySerializer
+from django_admin_rq.uploads import ChunkedUpload, ChunkedUploadError
+
+_CONTENT_RANGE_RE = re.compile(r'^bytes (\d+)-(\d+)/(\d+)$')
+
+
+def get_job_state(job_uuid):
+    """
+    Returns a dict with job_uuid, status and progress of the given job.
+    The status backend is asked first, the database only if the backend doesn't know the job.
+    """
+    state = get_status_backend().get(job_uuid)
+    if state is None:
+        state = JobStatus.objects.filter(job_uuid=job_uuid).values('status', 'progress').first()
+        if state is None:
+            raise Http404
+    state['job_uuid'] = job_uuid
+    return state
+
+
+def get_job_state_etag(state):
+    return '"{}-{}"'.format(state['status'], state['progress'])
 
 
 class JobStatusView(APIView):
+    """
+    Returns the status of a job.  Responses carry an ETag derived from status and progress,
+    conditional requests for an unchanged job are answered with 304 Not Modified.
+    """
+    authentication_classes = (SessionAuthentication,)
+    permission_classes = (IsAuthenticated,)
+
+    def get(self, request, job_uuid=None, format=None):
+        state = get_job_state(job_uuid)
+        etag = get_job_state_etag(state)
+        if_none_match = [tag.strip() for tag in request.META.get('HTTP_IF_NONE_MATCH', '').split(',')]
+        if etag in if_none_match or '*' in if_none_match:
+            response = Response(status=status.HTTP_304_NOT_MODIFIED)
+        elif state['status'] in ACTIVE_STATUSES:
+            # Running jobs are answered without loading the whole row
+            response = Response(state)
+        else:
+            job_status = JobStatus.objects.defer(*LARGE_FIELDS).get(job_uuid=job_uuid)
+            response = Response(JobStatusSummarySerializer(job_status).data)
+        response['ETag'] = etag
+        response['Cache-Control'] = 'no-cache'
+        return response
+
+
+class JobStatusResultView(APIView):
+    """
+    Streams a job's result as html.  The result is read from the database in chunks of
+    ``DJANGO_ADMIN_RQ_RESULT_CHUNK_SIZE`` characters so large results are never loaded at once.
+    """
     authentication_classes = (SessionAuthentication,)
     permission_classes = (IsAuthenticated,)
 
     def get(self, request, job_uuid=None, format=None):
-        job_status = JobStatus.objects.get(job_uuid=job_uuid)
-        return Response(JobStatusSerializer(job_status).data)
+        job_status = JobStatus.objects.filter(job_uuid=job_uuid).annotate(result_length=Length('result')) \
+            .values('pk', 'result_length').first()
+        if job_status is None:
+            raise Http404
+        return StreamingHttpResponse(
+            self.iter_result(job_status['pk'], job_status['result_length'] or 0),
+            content_type='text/html; charset=utf-8'
+        )
+
+    def iter_result(self, pk, length):
+        chunk_size = conf.RESULT_CHUNK_SIZE
+        for start in range(1, length + 1, chunk_size):
+            yield JobStatus.objects.filter(pk=pk).annotate(chunk=Substr('result', start, chunk_size)) \
+                .values_list('chunk', flat=True).first() or ''
+
+
+class JobStatusBatchView(APIView):
+    """
+    Returns job_uuid, status and progress for all jobs given as ``job_uuid`` query parameters
+    (repeated or comma separated) with one lookup in the status backend and one query for the rest.
+    Unknown jobs are left out of the response.
+    """
+    authentication_classes = (SessionAuthentication,)
+    permission_classes = (IsAuthenticated,)
+
+    def get(self, request, format=None):
+        job_uuids = []
+        for value in request.query_params.getlist('job_uuid'):
+            for job_uuid in value.split(','):
+                job_uuid = job_uuid.strip()
+                if job_uuid and job_uuid not in job_uuids:
+                    job_uuids.append(job_uuid)
+        if len(job_uuids) > conf.BATCH_STATUS_LIMIT:
+            return Response(
+                {'detail': 'At most {} jobs can be requested at once.'.format(conf.BATCH_STATUS_LIMIT)},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        states = get_status_backend().get_many(job_uuids)
+        missing = [job_uuid for job_uuid in job_uuids if job_uuid not in states]
+        if missing:
+            job_statuses = JobStatus.objects.filter(job_uuid__in=missing).only('job_uuid', 'status', 'progress') \
+                .order_by()
+            for data in JobStatusLightSerializer(job_statuses, many=True).data:
+                states[data['job_uuid']] = data
+
+        data = []
+        for job_uuid in job_uuids:
+            if job_uuid in states:
+                state = dict(states[job_uuid])
+                state['job_uuid'] = job_uuid
+                data.append(state)
+        return Response(data)
+
+
+class JobStatusCancelView(APIView):
+    """
+    Cancels a queued or running job, see :meth:`~django_admin_rq.models.JobStatus.cancel`.
+    Answers 409 Conflict if the job already finished, failed or was cancelled.
+    """
+    authentication_classes = (SessionAuthentication,)
+    permission_classes = (IsAdminUser,)
+
+    def post(self, request, job_uuid=None, format=None):
+        job_status = JobStatus.objects.defer(*LARGE_FIELDS).filter(job_uuid=job_uuid).first()
+        if job_status is None:
+            raise Http404
+        state = get_job_state(job_uuid)
+        if state['status'] not in ACTIVE_STATUSES:
+            return Response(state, status=status.HTTP_409_CONFLICT)
+        # The row's progress may lag behind the status backend
+        job_status.progress = state['progress']
+        job_status.cancel()
+        return Response(get_job_state(job_uuid))
+
+
+class JobStatusLogView(APIView):
+    """
+    Returns the lines a job logged from the ``offset`` query parameter on, see
+    :meth:`~django_admin_rq.models.JobStatus.log`.  The response's offset is the one of its first line, the client
+    asks for offset plus the number of lines next.
+    """
+    authentication_classes = (SessionAuthentication,)
+    permission_classes = (IsAuthenticated,)
+
+    def get(self, request, job_uuid=None, format=None):
+        try:
+            offset = max(0, int(request.query_params.get('offset', 0)))
+        except ValueError:
+            return Response({'detail': 'offset must be a number of lines.'}, status=status.HTTP_400_BAD_REQUEST)
+        first, lines, total = read_log(job_uuid, offset)
+        response = Response({'offset': first, 'lines': lines, 'total': total})
+        response['Cache-Control'] = 'no-cache'
+        return response
+
+
+class JobMetricsView(APIView):
+    """
+    Returns queue wait and run duration percentiles per job name, see :func:`~django_admin_rq.metrics.get_job_metrics`.
+    ``max_age`` limits the jobs to those that finished in the last seconds, ``job_name`` (repeated) to some jobs.
+    """
+    authentication_classes = (SessionAuthentication,)
+    permission_classes = (IsAdminUser,)
+
+    def get(self, request, format=None):
+        try:
+            max_age = int(request.query_params.get('max_age', conf.METRICS_MAX_AGE))
+        except ValueError:
+            return Response({'detail': 'max_age must be a number of seconds.'}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(get_job_metrics(max_age, request.query_params.getlist('job_name')))
+
+
+class JobStatusWaitView(APIView):
+    """
+    Long polling version of :class:`JobStatusView`.
+    Blocks until status or progress differ from the ``status`` and ``progress`` query parameters the client saw last,
+    or until ``timeout`` seconds (capped by ``DJANGO_ADMIN_RQ_LONG_POLL_TIMEOUT``) passed.
+    Changes are received from the redis channel the status backend publishes to.
+    Every request holds a web worker while it waits, the run page only uses this view with
+    ``DJANGO_ADMIN_RQ_LONG_POLLING``.
+    """
+    authentication_classes = (SessionAuthentication,)
+    permission_classes = (IsAuthenticated,)
+
+    def get(self, request, job_uuid=None, format=None):
+        try:
+            timeout = min(float(request.query_params.get('timeout', conf.LONG_POLL_TIMEOUT)), conf.LONG_POLL_TIMEOUT)
+        except ValueError:
+            timeout = conf.LONG_POLL_TIMEOUT
+        seen = (request.query_params.get('status'), request.query_params.get('progress'))
+
+        pubsub = get_redis_connection().pubsub(ignore_subscribe_messages=True)
+        # Subscribe before reading the current state so no update between the two is lost
+        pubsub.subscribe(get_status_channel(job_uuid))
+        try:
+            state = get_job_state(job_uuid)
+            deadline = time.time() + timeout
+            while (state['status'], force_text(state['progress'])) == seen and \
+                    state['status'] in ACTIVE_STATUSES:
+                remaining = deadline - time.time()
+                if remaining <= 0:
+                    break
+                message = pubsub.get_message(timeout=remaining)
+                if message is not None:
+                    state.update(json.loads(force_text(message['data'])))
+        finally:
+            pubsub.close()
+        return Response(state)
+
+
+def get_upload_data(upload):
+    return {
+        'upload_id': upload.upload_id,
+        'url': reverse('admin-rq-upload-chunk', kwargs={'upload_id': upload.upload_id}),
+        'offset': upload.offset,
+        'size': upload.size,
+    }
+
+
+class ChunkedUploadView(APIView):
+    """
+    Starts a chunked upload for the ``name`` and ``size`` (in bytes) posted.
+    Answers 413 if size exceeds ``DJANGO_ADMIN_RQ_UPLOAD_MAX_SIZE``.
+    """
+    authentication_classes = (SessionAuthentication,)
+    permission_classes = (IsAdminUser,)
+
+    def post(self, request, format=None):
+        name = request.data.get('name')
+        try:
+            size = int(request.data.get('size'))
+        except (TypeError, ValueError):
+            size = -1
+        if not name or size < 0:
+            return Response({'detail': 'name and size are required.'}, status=status.HTTP_400_BAD_REQUEST)
+        if conf.UPLOAD_MAX_SIZE is not None and size > conf.UPLOAD_MAX_SIZE:
+            return Response(
+                {'detail': 'The file exceeds the maximum upload size of {} bytes.'.format(conf.UPLOAD_MAX_SIZE)},
+                status=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE
+            )
+        upload = ChunkedUpload.create(name, size, user_id=request.user.pk)
+        return Response(get_upload_data(upload), status=status.HTTP_201_CREATED)
+
+
+class ChunkedUploadChunkView(APIView):
+    """
+    GET returns the offset an interrupted upload resumes at.
+    PUT appends the request body at the offset given by the ``Content-Range`` header.
+    """
+    authentication_classes = (SessionAuthentication,)
+    permission_classes = (IsAdminUser,)
+
+    def get_upload(self, request, upload_id):
+        upload = ChunkedUpload.load(upload_id)
+        if upload is None or upload.user_id != request.user.pk:
+            raise Http404
+        return upload
+
+    def get(self, request, upload_id=None, format=None):
+        return Response(get_upload_data(self.get_upload(request, upload_id)))
+
+    def put(self, request, upload_id=None, format=None):
+        upload = self.get_upload(request, upload_id)
+        match = _CONTENT_RANGE_RE.match(request.META.get('HTTP_CONTENT_RANGE', ''))
+        if match is None or int(match.group(3)) != upload.size or int(match.group(2)) < int(match.group(1)):
+            return Response({'detail': 'Invalid Content-Range header.'}, status=status.HTTP_400_BAD_REQUEST)
+        start, end = int(match.group(1)), int(match.group(2))
+        try:
+            # Read the raw body bypassing the parsers so the chunk is never held in memory as a whole
+            upload.append(start, request.stream, end - start + 1)
+        except ChunkedUploadError as e:
+            data = get_upload_data(upload)
+            data['detail'] = str(e)
+            return Response(data, status=status.HTTP_409_CONFLICT)
+        return Response(get_upload_data(upload))